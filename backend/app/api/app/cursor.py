@@ -1,5 +1,16 @@
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
 from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlmodel import Session, and_, or_
+
+from app.models import Diary
+
+# 所有分页接口单页条数的上限
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 
 def encode_cursor(date: datetime, entity_id: int) -> str:
@@ -10,3 +21,74 @@ def decode_cursor(cursor: str) -> tuple[datetime, int]:
     raw = urlsafe_b64decode(cursor.encode()).decode()
     date_raw, entity_id_raw = raw.rsplit("|", 1)
     return datetime.fromisoformat(date_raw), int(entity_id_raw)
+
+
+def encode_rank_cursor(rank: float, date: datetime, entity_id: int) -> str:
+    """相关度排序的游标：得分 + 日期游标（得分相同时按日期、id 继续排序）"""
+    return f"{float(rank)!r}:{encode_cursor(date, entity_id)}"
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, datetime, int]:
+    rank_raw, date_cursor = cursor.split(":", 1)
+    return (float(rank_raw), *decode_cursor(date_cursor))
+
+
+def diary_keyset_page(session: Session, statement, cursor: Optional[str], limit: int) -> tuple[list[Diary], Optional[str]]:
+    """
+    按 (date DESC, id DESC) 键集分页查询日记：从 cursor 之后取 limit + 1 行判断是否还有下一页
+    返回本页日记与下一页 cursor（没有下一页时为 None）；cursor 无法解析时返回 400
+    """
+    statement = statement.order_by(Diary.date.desc(), Diary.id.desc())
+    if cursor:
+        try:
+            cursor_date, cursor_id = decode_cursor(cursor)
+        except (Base64Error, UnicodeDecodeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(
+            or_(
+                Diary.date < cursor_date,
+                and_(Diary.date == cursor_date, Diary.id < cursor_id),
+            )
+        )
+
+    rows = session.exec(statement.limit(limit + 1)).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].date, items[-1].id) if len(rows) > limit and items else None
+    return items, next_cursor
+
+
+def diary_rank_keyset_page(
+    session: Session, statement, rank, cursor: Optional[str], limit: int
+) -> tuple[list[tuple[Diary, float]], Optional[str]]:
+    """
+    按 (rank DESC, date DESC, id DESC) 键集分页，rank 为得分表达式（如 diary_text_rank）
+    返回本页 (日记, 得分) 与下一页 cursor；cursor 无法解析时返回 400
+    """
+    statement = statement.add_columns(rank).order_by(rank.desc(), Diary.date.desc(), Diary.id.desc())
+    if cursor:
+        try:
+            cursor_rank, cursor_date, cursor_id = decode_rank_cursor(cursor)
+        except (Base64Error, UnicodeDecodeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(
+            or_(
+                rank < cursor_rank,
+                and_(rank == cursor_rank, Diary.date < cursor_date),
+                and_(rank == cursor_rank, Diary.date == cursor_date, Diary.id < cursor_id),
+            )
+        )
+
+    # 在单实体的 select 上追加列，exec 仍会按标量返回，这里用 execute 取完整的行
+    rows = session.execute(statement.limit(limit + 1)).all()
+    items = [(diary, score) for diary, score in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last, last_rank = items[-1]
+        next_cursor = encode_rank_cursor(last_rank, last.date, last.id)
+    return items, next_cursor
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """列表型旧接口保持返回数组，下一页 cursor 放在响应头中"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,15 @@
+from sqlmodel import Session, update
+
+from app.api.app.response_cache import public_response_cache, response_cache
+from app.models import User
+
+
+def bump_data_version(session: Session, user_id) -> None:
+    """
+    日记 / 日记本 / 分享写入后递增用户的 data_version（不提交，随写入同一事务），并清除该用户的服务端响应缓存
+    user_id 也可以是标量子查询（此时缓存不清除，旧版本的键本身已不会再命中）
+    """
+    session.exec(update(User).where(User.id == user_id).values(data_version=User.data_version + 1))
+    if isinstance(user_id, int):
+        response_cache.invalidate_user(user_id)
+        public_response_cache.invalidate_user(user_id)
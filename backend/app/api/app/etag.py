@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from app.auth import get_current_user
+from app.models import User
+from app.modules.journaling.helpers.local_dates import to_user_local
+
+
+def data_etag_value(user: User, request: Request) -> str:
+    """
+    弱 ETag：用户数据版本 + 请求路径与参数 + 当天日期
+    （"那年今日"、统计趋势等随日期变化的内容在跨天后也会失效）
+    """
+    now = datetime.now(timezone.utc)
+    local_day = to_user_local(now, user.timezone, user.time_offset_mins).date()
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{now.date()}|{local_day}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f'W/"{user.id}.{user.data_version}.{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 的弱比较：忽略 W/ 前缀，支持逗号分隔的多个值与 *"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def data_etag(request: Request, response: Response, user: User = Depends(get_current_user)) -> str:
+    """
+    路由依赖：客户端缓存仍有效时直接返回 304（在查询数据库之前，只用到认证时已读出的 data_version），
+    否则在响应上带 ETag，要求客户端每次使用缓存前重新验证
+    """
+    etag = data_etag_value(user, request)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return etag
@@ -1,66 +1,76 @@
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, and_, select
+from sqlalchemy import column
+from sqlmodel import Session, and_, literal, select, true, union_all
 
+from app.api.app.etag import data_etag
+from app.api.app.response_cache import CachedView, cached_view
 from app.api.app.schemas import EntryCard, HomePayload
 from app.auth import get_current_user
-from app.database import get_session
-from app.models import Diary, Notebook, User
+from app.database import get_read_session
+from app.models import Diary, User
+from app.modules.journaling.helpers.local_dates import local_day_start, local_month_day
 
 router = APIRouter(prefix="/api/app", tags=["app"])
 
 
-def to_entry_card(diary: Diary) -> EntryCard:
-    return EntryCard(
-        id=diary.id,
-        notebook_id=diary.notebook_id,
-        title=diary.title,
-        cover_image_url=diary.cover_image_url,
-        date=diary.date,
-        updated_at=diary.updated_at,
-        word_count=diary.word_count,
-        image_count=diary.image_count,
-        is_pinned=diary.is_pinned,
-        mood=diary.mood,
-        weather_snapshot=diary.weather_snapshot,
+# 卡片只需要的列（不读正文）：列表接口按列查询，行直接校验为 EntryCard
+CARD_COLUMNS = (
+    Diary.id, Diary.notebook_id, Diary.title, Diary.cover_image_url, Diary.date, Diary.updated_at,
+    Diary.word_count, Diary.image_count, Diary.is_pinned, Diary.mood, Diary.weather_snapshot,
+)
+
+
+def to_entry_card(diary) -> EntryCard:
+    """Diary 对象或 CARD_COLUMNS 查询的行 -> EntryCard"""
+    return EntryCard.model_validate(diary)
+
+
+def home_section(name: str, condition, limit: int):
+    """首页的一个分区：带分区名的卡片列，按 (date DESC, id DESC) 取前 limit 条（子查询内排序与 LIMIT，供 UNION ALL 合并）"""
+    rows = (
+        select(*CARD_COLUMNS)
+        .where(condition)
+        .order_by(Diary.date.desc(), Diary.id.desc())
+        .limit(limit)
+        .subquery(name)
     )
+    return select(literal(name).label("section"), *rows.c)
 
 
-@router.get("/home", response_model=HomePayload)
+@router.get("/home", response_model=HomePayload, dependencies=[Depends(data_etag)])
 def get_home_payload(
     limit: int = Query(5, ge=1, le=20),
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
+    view: CachedView = Depends(cached_view),
 ):
-    now = datetime.now(timezone.utc)
-    start = datetime(now.year - 1, now.month, now.day, 0, 0, 0, tzinfo=timezone.utc)
-    end = datetime(now.year - 1, now.month, now.day, 23, 59, 59, tzinfo=timezone.utc)
+    """
+    置顶、最近与那年今日在一条 UNION ALL 语句中查询，各分区分别走
+    置顶部分索引、(user_id, date, id) 与 (user_id, month_day, date, id) 索引；
+    那年今日为用户本地日历上同月同日的所有往年日记；同一数据版本的结果由服务端缓存直接返回
+    """
+    if (cached := view.hit()) is not None:
+        return cached
 
-    pinned = session.exec(
-        select(Diary)
-        .join(Notebook)
-        .where(and_(Notebook.user_id == user.id, Diary.is_pinned == True))
-        .order_by(Diary.date.desc())
-        .limit(limit)
-    ).all()
-    recent = session.exec(
-        select(Diary)
-        .join(Notebook)
-        .where(Notebook.user_id == user.id)
-        .order_by(Diary.date.desc())
-        .limit(limit)
-    ).all()
-    on_this_day = session.exec(
-        select(Diary)
-        .join(Notebook)
-        .where(and_(Notebook.user_id == user.id, Diary.date >= start, Diary.date <= end))
-        .order_by(Diary.date.desc())
-        .limit(limit)
-    ).all()
+    now = datetime.now(timezone.utc)
+    today = local_month_day(now, user.timezone, user.time_offset_mins)
+    today_start = local_day_start(now, user.timezone, user.time_offset_mins)
 
-    return HomePayload(
-        pinned=[to_entry_card(entry) for entry in pinned],
-        recent=[to_entry_card(entry) for entry in recent],
-        on_this_day=[to_entry_card(entry) for entry in on_this_day],
+    statement = union_all(
+        home_section("pinned", and_(Diary.user_id == user.id, Diary.is_pinned == true()), limit),
+        home_section("recent", Diary.user_id == user.id, limit),
+        home_section(
+            "on_this_day",
+            and_(Diary.user_id == user.id, Diary.month_day == today, Diary.date < today_start),
+            limit,
+        ),
+    ).order_by(
+        # 子查询内的 ORDER BY 只决定 LIMIT 取哪几条，UNION ALL 的结果顺序要靠外层排序保证
+        column("section"), column("date").desc(), column("id").desc()
     )
+    sections: dict[str, list[EntryCard]] = {"pinned": [], "recent": [], "on_this_day": []}
+    for row in session.execute(statement):
+        sections[row.section].append(to_entry_card(row))
+    return view.store(HomePayload(**sections))
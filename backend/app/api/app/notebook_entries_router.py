@@ -1,49 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, and_, or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session, select
 
-from app.api.app.cursor import decode_cursor, encode_cursor
-from app.api.app.home_router import to_entry_card
+from app.api.app.cursor import MAX_PAGE_SIZE, diary_keyset_page
+from app.api.app.etag import data_etag
+from app.api.app.home_router import CARD_COLUMNS, to_entry_card
+from app.api.app.responses import app_json
 from app.api.app.schemas import CursorPage, TimelinePayload
 from app.auth import get_current_user
-from app.database import get_session
+from app.database import get_read_session
 from app.models import Diary, Notebook, User
 
 router = APIRouter(prefix="/api/app", tags=["app"])
 
 
-@router.get("/notebooks/{notebook_id}/entries", response_model=TimelinePayload)
+@router.get("/notebooks/{notebook_id}/entries", response_model=TimelinePayload, dependencies=[Depends(data_etag)])
 def get_notebook_entries(
     notebook_id: int,
+    response: Response,
     cursor: str | None = Query(None),
-    limit: int = Query(20, ge=1, le=100),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     notebook = session.get(Notebook, notebook_id)
     if not notebook or notebook.user_id != user.id:
         raise HTTPException(status_code=404, detail="Notebook not found")
 
     statement = (
-        select(Diary)
+        select(*CARD_COLUMNS)
         .where(Diary.notebook_id == notebook_id)
-        .order_by(Diary.date.desc(), Diary.id.desc())
     )
 
-    if cursor:
-        cursor_date, cursor_id = decode_cursor(cursor)
-        statement = statement.where(
-            or_(
-                Diary.date < cursor_date,
-                and_(Diary.date == cursor_date, Diary.id < cursor_id),
-            )
-        )
+    items, next_cursor = diary_keyset_page(session, statement, cursor, limit)
+    has_more = next_cursor is not None
 
-    rows = session.exec(statement.limit(limit + 1)).all()
-    has_more = len(rows) > limit
-    items = rows[:limit]
-    next_cursor = encode_cursor(items[-1].date, items[-1].id) if has_more and items else None
-
-    return TimelinePayload(
-        items=[to_entry_card(entry) for entry in items],
-        page=CursorPage(next_cursor=next_cursor, has_more=has_more),
+    return app_json(
+        TimelinePayload(
+            items=[to_entry_card(entry) for entry in items],
+            page=CursorPage(next_cursor=next_cursor, has_more=has_more),
+        ),
+        response,
     )
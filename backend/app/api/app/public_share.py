@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from binascii import Error as Base64Error
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+from sqlmodel import Session, select
+
+from app.api.app.cursor import decode_cursor, encode_cursor
+from app.api.app.etag import etag_matches
+from app.api.app.response_cache import CachedView, public_response_cache
+from app.config import settings
+from app.database import get_read_session
+from app.models import ShareToken, User
+
+
+@dataclass(frozen=True)
+class ResolvedShare:
+    """分享 token 解析结果：目标、过期时间、是否有效，以及解析时分享者的 data_version"""
+
+    id: int
+    diary_id: Optional[int]
+    notebook_id: Optional[int]
+    owner_id: int
+    expires_at: Optional[datetime]
+    is_active: bool
+    data_version: int
+
+
+class ShareResolutionCache:
+    """
+    进程内 token → ResolvedShare 的 TTL 缓存（LRU 淘汰）
+    分享的修改 / 撤销都会递增分享者的 data_version，命中后仍按主键核对一次版本，
+    版本不同即重新解析，因此其他 worker 上的修改也能立即生效；update_share / delete_share 另外直接清除本进程的条目
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, ResolvedShare]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[ResolvedShare]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def put(self, token: str, share: ResolvedShare) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (time.monotonic() + self.ttl_seconds, share)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+share_resolution_cache = ShareResolutionCache(settings.SHARE_RESOLUTION_CACHE_ENTRIES, settings.SHARE_RESOLUTION_TTL_SECONDS)
+
+
+def _load_share(session: Session, token: str) -> Optional[ResolvedShare]:
+    row = session.exec(
+        select(ShareToken, User.data_version)
+        .join(User, User.id == ShareToken.created_by)
+        .where(ShareToken.token == token)
+    ).first()
+    if row is None:
+        return None
+    share, data_version = row
+    expires_at = share.expires_at
+    if expires_at is not None and expires_at.tzinfo is None:
+        # 数据库里取出的无时区时间按 UTC 处理
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return ResolvedShare(
+        id=share.id,
+        diary_id=share.diary_id,
+        notebook_id=share.notebook_id,
+        owner_id=share.created_by,
+        expires_at=expires_at,
+        is_active=share.is_active,
+        data_version=data_version,
+    )
+
+
+def resolve_share(session: Session, token: str) -> ResolvedShare:
+    """
+    解析分享 token：缓存命中时只按主键读一次分享者的 data_version；
+    不存在或已撤销返回 404，已过期返回 410
+    """
+    share = share_resolution_cache.get(token)
+    if share is not None:
+        data_version = session.exec(select(User.data_version).where(User.id == share.owner_id)).first()
+        if data_version != share.data_version:
+            share = None
+    if share is None:
+        share = _load_share(session, token)
+        if share is None:
+            share_resolution_cache.invalidate(token)
+            raise HTTPException(status_code=404, detail="Share not found or expired")
+        share_resolution_cache.put(token, share)
+
+    if not share.is_active:
+        raise HTTPException(status_code=404, detail="Share not found or expired")
+    if share.expires_at and share.expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=410, detail="Share link has expired")
+    return share
+
+
+class PublicShareView(CachedView):
+    """
+    公开分享请求的缓存位：渲染好的载荷按分享者写入 public_response_cache，写入后随 data_version 失效
+    ETag 由接口调用 page() 时传入的、已规范化的参数确定，请求中的其他参数不参与（匿名请求无法借此制造新的缓存键）
+    """
+
+    def __init__(self, share: ResolvedShare, request: Request):
+        super().__init__(share.owner_id, "", cache_control="public, no-cache", cache=public_response_cache)
+        self.share = share
+        self.request = request
+
+    def page(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> "PublicShareView":
+        """确定本次请求的 ETag；客户端缓存仍有效时直接返回 304"""
+        self.etag = public_share_etag(self.share, self.request.url.path, normalize_cursor(cursor), limit)
+        if etag_matches(self.request.headers.get("if-none-match"), self.etag):
+            raise HTTPException(status_code=304, headers={"ETag": self.etag})
+        return self
+
+
+def normalize_cursor(cursor: Optional[str]) -> Optional[str]:
+    """解析并重新编码 cursor（无法解析时返回 400），同一位置的不同写法对应同一个缓存键"""
+    if not cursor:
+        return None
+    try:
+        return encode_cursor(*decode_cursor(cursor))
+    except (Base64Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def public_share_etag(share: ResolvedShare, path: str, cursor: Optional[str], limit: Optional[int]) -> str:
+    """弱 ETag：分享 id + 分享者数据版本 + 路径与规范化后的分页参数（公开内容不随日期变化）"""
+    digest = hashlib.sha1(f"{path}|{cursor or ''}|{limit or ''}".encode()).hexdigest()[:16]
+    return f'W/"s{share.id}.{share.data_version}.{digest}"'
+
+
+def public_share_view(token: str, request: Request, session: Session = Depends(get_read_session)) -> PublicShareView:
+    """公开分享路由依赖：解析 token（404 / 410），提供服务端缓存位；接口确定分页参数后调用 view.page()"""
+    return PublicShareView(resolve_share(session, token), request)
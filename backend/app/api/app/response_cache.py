@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import Depends, Response
+
+from app.api.app.etag import data_etag
+from app.api.app.responses import dump_json
+from app.auth import get_current_user
+from app.config import settings
+from app.models import User
+
+
+class ResponseCache:
+    """
+    进程内 LRU：序列化好的 JSON 响应字节，键为 (用户, data_etag)
+    data_etag 已包含数据版本、路径参数与日期，写入后旧键自然失效；写路径再按用户清除，及时释放内存与文件
+    directory 不为空时同时落盘（按用户分目录），多个 worker 共享、重启后仍可命中
+    """
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self._entries: OrderedDict[tuple[int, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, user_id: int, key: str) -> Path:
+        return self.directory / str(user_id) / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def get(self, user_id: int, key: str) -> Optional[bytes]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            body = self._entries.get((user_id, key))
+            if body is not None:
+                self._entries.move_to_end((user_id, key))
+                return body
+        if self.directory is None:
+            return None
+        try:
+            body = self._path(user_id, key).read_bytes()
+        except OSError:
+            return None
+        self._remember(user_id, key, body)
+        return body
+
+    def put(self, user_id: int, key: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._remember(user_id, key, body)
+        if self.directory is None:
+            return
+        path = self._path(user_id, key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temp_path.write_bytes(body)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"[ResponseCache] Failed to write {path}: {e}")
+            return
+        self._prune_user_files(user_id, path)
+
+    def _remember(self, user_id: int, key: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[(user_id, key)] = body
+            self._entries.move_to_end((user_id, key))
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+        if self.directory is not None:
+            # 淘汰的条目连同落盘文件一起删除，目录不会随日期、版本变化的键无限增长
+            for evicted_user_id, evicted_key in evicted:
+                self._path(evicted_user_id, evicted_key).unlink(missing_ok=True)
+
+    def _prune_user_files(self, user_id: int, written: Path) -> None:
+        """
+        每个用户目录最多保留 max_entries 个文件（刚写入的与其余按修改时间最新的）：
+        其他 worker 或重启前写入、已不在本进程内存中的文件也会被清理
+        """
+        try:
+            files = sorted(
+                (path for path in written.parent.glob("*.json") if path != written),
+                key=lambda path: path.stat().st_mtime_ns,
+                reverse=True,
+            )
+            for path in files[self.max_entries - 1:]:
+                path.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"[ResponseCache] Failed to prune cache files for user {user_id}: {e}")
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == user_id]:
+                del self._entries[entry_key]
+        if self.directory is not None:
+            shutil.rmtree(self.directory / str(user_id), ignore_errors=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_ENTRIES, settings.RESPONSE_CACHE_DIR or None)
+# 匿名公开分享的渲染结果单独一个只在内存中的 LRU：匿名请求不会挤掉已登录用户的缓存条目，也不写文件
+public_response_cache = ResponseCache(settings.PUBLIC_RESPONSE_CACHE_ENTRIES)
+
+
+class CachedView:
+    """
+    一个请求对应的缓存位：hit() 命中时直接返回缓存的 JSON 字节（跳过 SQL 与 Pydantic 序列化），
+    未命中时由 store() 序列化载荷、写入缓存并返回响应；两者都带上 ETag 头
+    store() 传入的额外响应头（如 X-Next-Cursor）以一行 JSON 存在正文之前，命中时一并还原
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        etag: str,
+        cache_control: str = "private, no-cache",
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.user_id = user_id
+        self.etag = etag
+        self.cache_control = cache_control
+        self.cache = cache or response_cache
+
+    def _response(self, body: bytes, headers: dict[str, str]) -> Response:
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**headers, "ETag": self.etag, "Cache-Control": self.cache_control},
+        )
+
+    def hit(self) -> Optional[Response]:
+        entry = self.cache.get(self.user_id, self.etag)
+        if entry is None:
+            return None
+        header_line, _, body = entry.partition(b"\n")
+        return self._response(body, json.loads(header_line))
+
+    def store(self, payload: Any, headers: Optional[dict[str, str]] = None) -> Response:
+        body = dump_json(payload)
+        headers = headers or {}
+        self.cache.put(self.user_id, self.etag, json.dumps(headers).encode() + b"\n" + body)
+        return self._response(body, headers)
+
+
+def cached_view(etag: str = Depends(data_etag), user: User = Depends(get_current_user)) -> CachedView:
+    """路由依赖：在 data_etag（304 判断）之后提供服务端缓存位"""
+    return CachedView(user.id, etag)
@@ -0,0 +1,43 @@
+import json
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # 未安装 fast-json 可选依赖：uv sync --extra fast-json
+    orjson = None
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    app 查询层的 JSON 序列化：Pydantic 模型由 pydantic-core 一次序列化为字节（不经 dict 中转）；
+    其余内容（FastAPI 按 response_model 转换后的数据、dict 载荷）优先用 orjson，
+    未安装时与 FastAPI 默认 JSONResponse 的输出一致
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class AppJSONResponse(JSONResponse):
+    """app 查询路由的默认响应类（orjson 输出）"""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def app_json(payload: BaseModel, response: Optional[Response] = None) -> AppJSONResponse:
+    """
+    直接序列化已构造好的载荷，跳过 FastAPI 按 response_model 的二次校验与 dict 转换；
+    直接返回 Response 时 FastAPI 不会合并依赖设置的响应头（如 ETag），这里从 response 带过来
+    """
+    result = AppJSONResponse(payload)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from app.api.app.responses import AppJSONResponse
+
 from app.api.app.entry_detail_router import router as entry_detail_router
 from app.api.app.home_router import router as home_router
 from app.api.app.notebook_detail_router import router as notebook_detail_router
@@ -11,7 +13,7 @@ from app.api.app.search_entries_router import router as search_entries_router
 from app.api.app.stats_router import router as stats_router
 from app.api.app.timeline_router import router as timeline_router
 
-router = APIRouter()
+router = APIRouter(default_response_class=AppJSONResponse)
 
 router.include_router(entry_detail_router)
 router.include_router(home_router)
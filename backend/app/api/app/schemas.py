@@ -1,10 +1,20 @@
 from datetime import datetime
 from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, field_validator
+
+
+def tag_names(tags: Any) -> Any:
+    """ORM 的 Tag 对象列表转为标签名列表"""
+    if isinstance(tags, list):
+        return [tag.name if hasattr(tag, "name") else tag for tag in tags]
+    return tags
 
 
 class EntryCard(BaseModel):
+    # 可直接从 ORM 对象或按列查询的行校验构造：Card.model_validate(row)，不经过 model_dump 中转
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     notebook_id: int
     title: Optional[str]
@@ -28,10 +38,23 @@ class TimelinePayload(BaseModel):
     page: CursorPage
 
 
+class SearchEntryCard(EntryCard):
+    snippet: Optional[str] = None
+    # snippet 中命中查询词的 [start, end) 区间
+    highlights: list[tuple[int, int]] = []
+
+
+class SearchEntriesPayload(BaseModel):
+    items: list[SearchEntryCard]
+    page: CursorPage
+
+
 class PublicEntryCard(EntryCard):
     content: dict[str, Any]
     tags: list[str] = []
 
+    _tag_names = field_validator("tags", mode="before")(tag_names)
+
 
 class PublicTimelinePayload(BaseModel):
     items: list[PublicEntryCard]
@@ -45,6 +68,8 @@ class HomePayload(BaseModel):
 
 
 class NotebookDetailPayload(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     description: Optional[str] = None
@@ -62,6 +87,8 @@ class EntryDetailPayload(EntryCard):
     stats: dict[str, Any]
     tags: list[str] = []
 
+    _tag_names = field_validator("tags", mode="before")(tag_names)
+
 
 class HomePayload(BaseModel):
     pinned: list[EntryCard]
@@ -1,50 +1,72 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, col, func, or_, select
+from sqlmodel import Session, col, or_, select
 
-from app.api.app.home_router import to_entry_card
-from app.api.app.schemas import EntryCard
+from app.api.app.cursor import MAX_PAGE_SIZE, diary_keyset_page, diary_rank_keyset_page
+from app.api.app.etag import data_etag
+from app.api.app.schemas import CursorPage, SearchEntriesPayload, SearchEntryCard
 from app.auth import get_current_user
-from app.database import get_session
+from app.database import get_read_session
 from app.models import Diary, DiaryTagLink, Notebook, Tag, User
+from app.modules.journaling.helpers.snippets import build_snippet
+from app.sql_expressions import diary_text_match, diary_text_rank, mood_label, weather_label
 
 router = APIRouter(prefix="/api/app/search", tags=["app"])
 
 
-@router.get("/entries", response_model=list[EntryCard])
+def to_search_card(diary: Diary, q: Optional[str]) -> SearchEntryCard:
+    card = SearchEntryCard.model_validate(diary)
+    if q:
+        card.snippet, card.highlights = build_snippet(diary.content_text or "", q)
+    return card
+
+
+@router.get("/entries", response_model=SearchEntriesPayload, dependencies=[Depends(data_etag)])
 def search_entries(
     q: Optional[str] = Query(None),
     tag: Optional[str] = Query(None),
     mood: Optional[str] = Query(None),
     weather: Optional[str] = Query(None),
     notebook_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    order: Literal["date", "relevance"] = Query("date"),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
-    statement = select(Diary).join(Notebook).where(Notebook.user_id == current_user.id)
+    statement = select(Diary).where(Diary.user_id == current_user.id)
 
     if q:
       q_pattern = f"%{q}%"
-      statement = statement.where(
+      statement = statement.join(Notebook).where(
           or_(
-              col(Diary.title).ilike(q_pattern),
-              func.cast(Diary.content, col(Diary.content).type).ilike(f"%{q}%"),
+              diary_text_match(Diary.title, Diary.content_text, q),
               col(Notebook.name).ilike(q_pattern),
           )
       )
 
     if tag:
-      statement = statement.join(DiaryTagLink).join(Tag).where(Tag.name == tag)
+      tagged_ids = select(DiaryTagLink.diary_id).join(Tag).where(Tag.name == tag)
+      statement = statement.where(col(Diary.id).in_(tagged_ids))
 
     if notebook_id is not None:
       statement = statement.where(Diary.notebook_id == notebook_id)
 
     if mood:
-      statement = statement.where(func.json_extract(Diary.mood, "$.label") == mood)
+      statement = statement.where(mood_label(Diary.mood) == mood)
 
     if weather:
-      statement = statement.where(func.json_extract(Diary.weather_snapshot, "$.weather") == weather)
+      statement = statement.where(weather_label(Diary.weather_snapshot) == weather)
+
+    # relevance 只在有关键词时生效；两种排序都按键集分页，翻到深页不需要重新扫描前面的结果
+    if q and order == "relevance":
+        ranked, next_cursor = diary_rank_keyset_page(session, statement, diary_text_rank(Diary.title, Diary.content_text, q), cursor, limit)
+        rows = [entry for entry, _ in ranked]
+    else:
+        rows, next_cursor = diary_keyset_page(session, statement, cursor, limit)
 
-    rows = session.exec(statement.order_by(Diary.date.desc()).limit(50)).all()
-    return [to_entry_card(entry) for entry in rows]
+    return SearchEntriesPayload(
+        items=[to_search_card(entry, q) for entry in rows],
+        page=CursorPage(next_cursor=next_cursor, has_more=next_cursor is not None),
+    )
@@ -1,26 +1,32 @@
-from typing import Any
-
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, func, select
+from fastapi import APIRouter, Depends, Query, Response
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timedelta, timezone
 
+from app.api.app.etag import data_etag
+from app.api.app.response_cache import CachedView, cached_view
 from app.auth import get_current_user
-from app.database import get_session
-from app.models import Diary, Notebook, User
+from app.database import get_async_session
+from app.models import Diary, User
+from app.sql_expressions import date_text
 
 router = APIRouter(prefix="/api/app", tags=["app"])
 
 
-@router.get("/stats")
+@router.get("/stats", dependencies=[Depends(data_etag)])
 async def get_stats_summary(
     days: int = Query(30),
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
-) -> dict[str, Any]:
-    total_words = session.exec(select(func.sum(Diary.word_count)).join(Notebook).where(Notebook.user_id == user.id)).one() or 0
-    total_entries = session.exec(select(func.count(Diary.id)).join(Notebook).where(Notebook.user_id == user.id)).one() or 0
+    session: AsyncSession = Depends(get_async_session),
+    view: CachedView = Depends(cached_view),
+) -> Response:
+    if (cached := view.hit()) is not None:
+        return cached
+
+    total_words = (await session.exec(select(func.sum(Diary.word_count)).where(Diary.user_id == user.id))).one() or 0
+    total_entries = (await session.exec(select(func.count(Diary.id)).where(Diary.user_id == user.id))).one() or 0
 
-    all_diaries = session.exec(select(Diary).join(Notebook).where(Notebook.user_id == user.id).order_by(Diary.date.desc())).all()
+    all_diaries = (await session.exec(select(Diary).where(Diary.user_id == user.id).order_by(Diary.date.desc()))).all()
 
     mood_counts: dict[str, int] = {}
     for diary in all_diaries:
@@ -30,13 +36,12 @@ async def get_stats_summary(
 
     start_date = datetime.now(timezone.utc) - timedelta(days=days)
     trend_stmt = (
-        select(func.date(Diary.date).label("day"), func.count(Diary.id).label("count"))
-        .join(Notebook)
-        .where(Notebook.user_id == user.id, Diary.date >= start_date)
+        select(date_text(Diary.date).label("day"), func.count(Diary.id).label("count"))
+        .where(Diary.user_id == user.id, Diary.date >= start_date)
         .group_by("day")
         .order_by("day")
     )
-    trend_map = {row.day: row.count for row in session.exec(trend_stmt).all()}
+    trend_map = {row.day: row.count for row in (await session.exec(trend_stmt)).all()}
     activity_trend = []
     for index in range(days + 1):
         day = (start_date + timedelta(days=index)).strftime("%Y-%m-%d")
@@ -58,8 +63,8 @@ async def get_stats_summary(
             else:
                 break
 
-    return {
+    return view.store({
         "summary": {"total_words": total_words, "total_entries": total_entries, "streak": streak},
         "mood_distribution": [{"label": label, "count": count} for label, count in mood_counts.items()],
         "activity_trend": activity_trend,
-    }
+    })
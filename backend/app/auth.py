@@ -4,8 +4,9 @@ from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
 from app.models import User, Diary, Notebook
 from app.config import settings
 
@@ -27,7 +28,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 async def get_current_user(
     token: Optional[str] = Depends(oauth2_scheme), 
     query_token: Optional[str] = Query(None, alias="token"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     actual_token = token or query_token
     credentials_exception = HTTPException(
@@ -47,19 +48,21 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
         
-    user = session.exec(select(User).where(User.username == username)).first()
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if user is None:
         raise credentials_exception
+    # 脱离异步会话，路由中的同步 Session 可以直接 add / 修改该对象
+    session.expunge(user)
     return user
 
 
 async def verify_notebook_ownership(
     notebook_id: int,
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ) -> Notebook:
-    """验证笔记本归属权，返回笔记本对象"""
-    notebook = session.get(Notebook, notebook_id)
+    """验证笔记本归属权，返回笔记本对象（异步只读会话，路由需要写入时应在写任务中按主键重新读取）"""
+    notebook = await session.get(Notebook, notebook_id)
     if not notebook:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notebook not found")
     if notebook.user_id != user.id:
@@ -70,13 +73,12 @@ async def verify_notebook_ownership(
 async def verify_diary_ownership(
     diary_id: int,
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ) -> Diary:
-    """验证日记归属权（通过笔记本间接验证），返回日记对象"""
-    diary = session.get(Diary, diary_id)
+    """验证日记归属权（依据冗余的 Diary.user_id），返回日记对象"""
+    diary = await session.get(Diary, diary_id)
     if not diary:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Diary not found")
-    notebook = session.get(Notebook, diary.notebook_id)
-    if not notebook or notebook.user_id != user.id:
+    if diary.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
     return diary
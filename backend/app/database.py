@@ -1,107 +1,146 @@
-from sqlmodel import create_engine, SQLModel, Session, select
-from sqlalchemy import event, text, inspect
+from sqlmodel import create_engine, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 import os
 from app.config import settings
 from app.models import User, UserRole
+from app.migrations import run_migrations
+from app.write_queue import WriteQueue
 
-# 动态获取数据库路径并确保目录存在
-sqlite_url = settings.DATABASE_URL
-db_path = sqlite_url.replace("sqlite:///", "")
-if not os.path.exists(os.path.dirname(db_path)) and os.path.dirname(db_path):
-    os.makedirs(os.path.dirname(db_path))
+database_url = make_url(settings.DATABASE_URL)
+
+if database_url.get_backend_name() == "sqlite":
+    # 动态获取数据库路径并确保目录存在
+    db_path = database_url.database or ""
+    if not os.path.exists(os.path.dirname(db_path)) and os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path))
+
+    connect_args = {"check_same_thread": False}
+    read_connect_args = connect_args
+    async_url = database_url.set(drivername="sqlite+aiosqlite")
+    async_connect_args = {}
+    # 写引擎：SQLite 同一时刻只允许一个写事务，单连接让写请求在连接池排队，
+    # 而不是多个连接争抢库锁后报 database is locked。迁移、后台任务与写接口都使用它
+    writer_pool = {"pool_size": 1, "max_overflow": 0}
+    pool_options = {}
+else:
+    # PostgreSQL：psycopg 3 同时提供同步与异步驱动；行级锁允许并发写，写引擎使用普通连接池
+    if database_url.drivername == "postgresql":
+        database_url = database_url.set(drivername="postgresql+psycopg")
+    connect_args = {}
+    # 只读连接在会话级默认只读事务，与 SQLite 的 query_only 等价
+    read_connect_args = {"options": "-c default_transaction_read_only=on"}
+    async_url = database_url
+    async_connect_args = read_connect_args
+    writer_pool = {"pool_size": 20, "max_overflow": 10}
+    # 多节点部署时连接可能被服务端或中间件断开，取用前探活
+    pool_options = {"pool_pre_ping": True}
 
-connect_args = {"check_same_thread": False}
 engine = create_engine(
-    sqlite_url, 
+    database_url,
     connect_args=connect_args,
+    pool_timeout=30,
+    pool_recycle=1800,
+    **writer_pool,
+    **pool_options,
+)
+
+# 只读连接池：WAL 模式下读不阻塞写；query_only / 只读事务保证读连接不会意外写入
+read_engine = create_engine(
+    database_url,
+    connect_args=read_connect_args,
     pool_size=20,
     max_overflow=10,
     pool_timeout=30,
-    pool_recycle=1800
+    pool_recycle=1800,
+    **pool_options,
 )
 
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
+# 异步只读引擎：与同步引擎指向同一个库（aiosqlite / psycopg 异步驱动），供 async def 路由读取；
+# async 路由的写入通过 app.write_queue 提交到写引擎
+async_engine = create_async_engine(
+    async_url,
+    connect_args=async_connect_args,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_recycle=1800,
+    **pool_options,
+)
+
+# async 路由的写入口：所有写任务在写引擎上分批提交
+write_queue = WriteQueue(engine)
+
+def connection_pragmas(read_only: bool = False) -> list[str]:
+    """按 Settings 生成新连接需要执行的 pragma"""
+    # 页缓存按连接池区分：单个写连接用大缓存，数量多的读连接用小缓存
+    cache_size_kib = settings.SQLITE_READ_CACHE_SIZE_KIB if read_only else settings.SQLITE_CACHE_SIZE_KIB
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+        f"PRAGMA cache_size=-{int(cache_size_kib)}",  # 负数单位为 KiB
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    else:
+        # checkpoint 由提交写事务的连接执行，WAL 上限只需在写连接上设置
+        pragmas.append(f"PRAGMA wal_autocheckpoint={int(settings.SQLITE_WAL_AUTOCHECKPOINT)}")
+        pragmas.append(f"PRAGMA journal_size_limit={int(settings.SQLITE_JOURNAL_SIZE_LIMIT)}")
+    return pragmas
+
+
+def _apply_pragmas(dbapi_connection, pragmas: list[str]) -> None:
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.execute("PRAGMA synchronous=NORMAL")
+    for pragma in pragmas:
+        cursor.execute(pragma)
     cursor.close()
 
 
-def get_existing_tables() -> set:
-    """获取数据库中已存在的表名"""
-    inspector = inspect(engine)
-    return set(inspector.get_table_names())
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, connection_pragmas())
 
 
-def get_existing_columns(table_name: str) -> set:
-    """获取表中已存在的列名"""
-    inspector = inspect(engine)
-    try:
-        columns = inspector.get_columns(table_name)
-        return {col['name'] for col in columns}
-    except Exception:
-        return set()
+def set_read_pragma(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, connection_pragmas(read_only=True))
 
 
-def migrate_database():
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(read_engine, "connect", set_read_pragma)
+    event.listen(async_engine.sync_engine, "connect", set_read_pragma)
+
+
+def run_sqlite_maintenance(target=None) -> dict:
     """
-    自动迁移数据库：
-    - 检测并添加新表
-    - 检测并添加新列
-    - 保留现有数据
+    SQLite 定期维护：把 WAL 全部写回主库并截断 WAL 文件，再让 SQLite 按需更新查询规划统计
+    在写连接上执行，返回 wal_checkpoint 的结果
     """
-    existing_tables = get_existing_tables()
-    
-    # 获取所有模型对应的表
-    for table in SQLModel.metadata.sorted_tables:
-        table_name = table.name
-        
-        if table_name not in existing_tables:
-            # 表不存在，创建新表
-            print(f"[Migration] Creating new table: {table_name}")
-            table.create(engine, checkfirst=True)
-        else:
-            # 表存在，检查是否需要添加新列
-            existing_columns = get_existing_columns(table_name)
-            new_columns = []
-            
-            for column in table.columns:
-                if column.name not in existing_columns:
-                    new_columns.append(column)
-            
-            if new_columns:
-                print(f"[Migration] Adding new columns to {table_name}: {[c.name for c in new_columns]}")
-                with engine.connect() as conn:
-                    for column in new_columns:
-                        # 构建 ALTER TABLE 语句
-                        col_type = column.type.compile(engine.dialect)
-                        col_def = f'"{column.name}" {col_type}'
-                        
-                        # 处理默认值
-                        if column.default is not None:
-                            col_def += f" DEFAULT '{column.default.arg}'"
-                        elif column.nullable:
-                            col_def += " DEFAULT NULL"
-                        
-                        sql = f'ALTER TABLE "{table_name}" ADD COLUMN {col_def}'
-                        try:
-                            conn.execute(text(sql))
-                            conn.commit()
-                            print(f"[Migration] Added column {column.name} to {table_name}")
-                        except Exception as e:
-                            print(f"[Migration] Warning: Could not add column {column.name}: {e}")
+    target = target or engine
+    with target.connect() as conn:
+        busy, log_frames, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+        conn.exec_driver_sql("PRAGMA optimize")
+    return {"busy": busy, "log_frames": log_frames, "checkpointed_frames": checkpointed}
+
+
+async def dispose_engines():
+    """停止写队列并关闭全部连接池（导入数据库文件、进程退出前调用）"""
+    await write_queue.stop()
+    engine.dispose()
+    read_engine.dispose()
+    await async_engine.dispose()
 
 
 def create_db_and_tables():
     # 导入为了避免循环依赖
     from app.auth import get_password_hash
     
-    # 先执行自动迁移
-    migrate_database()
-    
-    # 确保所有表存在
-    SQLModel.metadata.create_all(engine)
+    # 执行版本化迁移（已是最新版本时只读取版本表）
+    run_migrations(engine)
     
     # 初始化管理员
     with Session(engine) as session:
@@ -118,5 +157,22 @@ def create_db_and_tables():
 
 
 def get_session():
+    """写会话：使用唯一的写连接，只在需要写入的接口中使用"""
     with Session(engine) as session:
         yield session
+
+
+def get_read_session():
+    """只读会话：GET 等纯读取接口使用"""
+    with Session(read_engine) as session:
+        yield session
+
+
+async def get_async_session():
+    # 只读；expire_on_commit=False 避免在 async 上下文触发隐式懒加载
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+def get_write_queue() -> WriteQueue:
+    return write_queue
@@ -4,10 +4,12 @@ from fastapi.responses import FileResponse
 from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.app import router as app_query_router
+from app.api.app.cursor import NEXT_CURSOR_HEADER
 from app.api.v1 import router as v1_router
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, dispose_engines
 from app.scheduler import start_scheduler, shutdown_scheduler
 from app.config import settings
+from app.rate_limit import RateLimitMiddleware
 import os
 import asyncio
 import shutil
@@ -20,8 +22,8 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 STATIC_DIR_ABSOLUTE = PROJECT_ROOT / "static"
 
 # 数据库路径和备份配置
-SQLITE_FILE_PATH = settings.DATABASE_URL.replace("sqlite:///", "")
-BACKUP_DIR = os.path.join(os.path.dirname(SQLITE_FILE_PATH), "backups")
+SQLITE_FILE_PATH = settings.sqlite_path
+BACKUP_DIR = os.path.join(settings.data_dir, "backups")
 BACKUP_INTERVAL_HOURS = 1  # 备份间隔（小时）
 MAX_BACKUPS = 3  # 保留备份数量
 
@@ -35,6 +37,9 @@ app = FastAPI(
     openapi_url=None if is_prod else "/openapi.json"
 )
 
+# 匿名公开分享的限流（Immich 代理流在路由内按签名所属用户限流；先注册，位于 CORS 内层，429 响应同样带 CORS 头）
+app.add_middleware(RateLimitMiddleware)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Retry-After"],  # 旧列表接口的下一页 cursor；限流时的重试间隔
 )
 
 @app.middleware("http")
@@ -97,8 +103,9 @@ async def auto_backup_task():
 @app.on_event("startup")
 async def on_startup():
     create_db_and_tables()
-    # 启动自动备份后台任务
-    asyncio.create_task(auto_backup_task())
+    # 启动自动备份后台任务（文件级备份仅适用于 SQLite，PostgreSQL 使用数据库自身的备份方案）
+    if settings.is_sqlite:
+        asyncio.create_task(auto_backup_task())
     # 启动任务调度器
     start_scheduler()
 
@@ -106,6 +113,7 @@ async def on_startup():
 @app.on_event("shutdown")
 async def on_shutdown():
     shutdown_scheduler()
+    await dispose_engines()
 
 # Health check - 必须在 SPA fallback 之前
 @app.get("/health")
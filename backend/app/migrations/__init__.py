@@ -0,0 +1,4 @@
+"""Versioned schema and data migrations."""
+from app.migrations.runner import current_version, head_version, run_migrations
+
+__all__ = ["current_version", "head_version", "run_migrations"]
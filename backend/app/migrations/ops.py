@@ -0,0 +1,81 @@
+"""
+迁移脚本可复用的幂等操作
+
+所有操作都在调用方传入的连接（即迁移事务）上执行，
+重复执行不会报错，便于新库与旧库共用同一套迁移脚本。
+方言相关的 SQL 片段（JSON 取值、布尔字面量）由这里的辅助函数按连接方言生成。
+"""
+
+from sqlalchemy import Column, inspect, literal_column
+from sqlalchemy.engine import Connection
+
+from app.sql_expressions import json_text
+
+
+def table_names(conn: Connection) -> set[str]:
+    return set(inspect(conn).get_table_names())
+
+
+def column_names(conn: Connection, table_name: str) -> set[str]:
+    return {col["name"] for col in inspect(conn).get_columns(table_name)}
+
+
+def index_names(conn: Connection, table_name: str) -> set[str]:
+    return {index["name"] for index in inspect(conn).get_indexes(table_name)}
+
+
+def column_ddl(conn: Connection, column: Column) -> str:
+    """按模型列定义生成 ADD COLUMN 使用的列声明"""
+    col_type = column.type.compile(conn.dialect)
+    col_def = f'"{column.name}" {col_type}'
+
+    # 处理默认值
+    if column.default is not None and not callable(column.default.arg):
+        col_def += f" DEFAULT '{column.default.arg}'"
+    elif column.nullable:
+        col_def += " DEFAULT NULL"
+    return col_def
+
+
+def add_column(conn: Connection, table_name: str, column: Column) -> bool:
+    """列不存在时添加，返回是否实际执行了 ALTER TABLE"""
+    if column.name in column_names(conn, table_name):
+        return False
+    conn.exec_driver_sql(f'ALTER TABLE "{table_name}" ADD COLUMN {column_ddl(conn, column)}')
+    print(f"[Migration] Added column {column.name} to {table_name}")
+    return True
+
+
+def json_text_sql(conn: Connection, column: str, key: str) -> str:
+    """JSON 列取值的索引表达式，直接复用查询侧的 json_text 编译结果以保证逐字一致"""
+    return str(json_text(literal_column(column), key).compile(dialect=conn.dialect))
+
+
+def true_sql(conn: Connection) -> str:
+    """部分索引条件中的布尔真值（SQLite 布尔存为整数）"""
+    return "true" if conn.dialect.name == "postgresql" else "1"
+
+
+def create_index(
+    conn: Connection,
+    name: str,
+    table_name: str,
+    expressions: str,
+    unique: bool = False,
+    where: str | None = None,
+    using: str | None = None,
+) -> None:
+    """
+    创建索引；expressions 为原始 SQL 列/表达式列表，如 "user_id, date DESC"，where 用于部分索引，
+    using 指定索引方法（如 PostgreSQL 的 gin）
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    using_sql = f" USING {using}" if using else ""
+    where_sql = f" WHERE {where}" if where else ""
+    conn.exec_driver_sql(
+        f'CREATE {unique_sql}INDEX IF NOT EXISTS "{name}" ON "{table_name}"{using_sql} ({expressions}){where_sql}'
+    )
+
+
+def drop_index(conn: Connection, name: str) -> None:
+    conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
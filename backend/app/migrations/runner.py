@@ -0,0 +1,165 @@
+"""
+迁移执行器
+
+- 版本表 schema_version 记录每个迁移的状态（running / applied）
+- 迁移脚本位于 app/migrations/versions，按 VERSION 升序执行
+- 结构迁移：模块提供 upgrade(conn)，整个脚本在一个事务内提交
+- 数据迁移：模块提供 run_batch(conn, cursor) -> 下一个 cursor | None，
+  每个批次与进度游标在同一个事务内提交，进程中断后从上次游标继续
+- 数据库已处于最新版本时只读取一次版本表，不做任何表结构探测
+"""
+
+import importlib
+import pkgutil
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+VERSION_TABLE = "schema_version"
+STATE_RUNNING = "running"
+STATE_APPLIED = "applied"
+
+_MODULE_NAME = re.compile(r"^v\d{4}_\w+$")
+
+
+def load_migrations() -> list[ModuleType]:
+    """加载 versions 包内全部迁移脚本并按版本号排序"""
+    from app.migrations import versions
+
+    modules = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        if _MODULE_NAME.match(info.name):
+            modules.append(importlib.import_module(f"{versions.__name__}.{info.name}"))
+
+    modules.sort(key=lambda module: module.VERSION)
+    seen: set[int] = set()
+    for module in modules:
+        if module.VERSION in seen:
+            raise RuntimeError(f"Duplicate migration version: {module.VERSION}")
+        seen.add(module.VERSION)
+    return modules
+
+
+def head_version(migrations: Optional[Sequence[ModuleType]] = None) -> int:
+    migrations = load_migrations() if migrations is None else migrations
+    return migrations[-1].VERSION if migrations else 0
+
+
+@contextmanager
+def _transaction(engine: Engine) -> Iterator[Connection]:
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite 不会在 DDL 前自动开启事务，显式 BEGIN 才能让整批 DDL/DML 原子提交
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with _transaction(engine) as conn:
+        conn.exec_driver_sql(
+            f'CREATE TABLE IF NOT EXISTS "{VERSION_TABLE}" ('
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR NOT NULL, "
+            "state VARCHAR NOT NULL, "
+            "cursor VARCHAR, "
+            "applied_at VARCHAR)"
+        )
+
+
+def _record(conn: Connection, migration: ModuleType, state: str, cursor: Optional[str] = None) -> None:
+    params = {
+        "version": migration.VERSION,
+        "name": getattr(migration, "__name__", f"v{migration.VERSION:04d}").rsplit(".", 1)[-1],
+        "state": state,
+        "cursor": cursor,
+        "applied_at": datetime.now(timezone.utc).isoformat() if state == STATE_APPLIED else None,
+    }
+    updated = conn.execute(
+        text(
+            f'UPDATE "{VERSION_TABLE}" SET name = :name, state = :state, cursor = :cursor, '
+            "applied_at = :applied_at WHERE version = :version"
+        ),
+        params,
+    )
+    if updated.rowcount == 0:
+        conn.execute(
+            text(
+                f'INSERT INTO "{VERSION_TABLE}" (version, name, state, cursor, applied_at) '
+                "VALUES (:version, :name, :state, :cursor, :applied_at)"
+            ),
+            params,
+        )
+
+
+def _migration_states(engine: Engine) -> dict[int, tuple[str, Optional[str]]]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f'SELECT version, state, cursor FROM "{VERSION_TABLE}"').all()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def _applied_versions(engine: Engine) -> set[int]:
+    try:
+        states = _migration_states(engine)
+    except Exception:
+        # 版本表尚不存在（新库或旧版自动迁移创建的库）
+        return set()
+    return {version for version, (state, _) in states.items() if state == STATE_APPLIED}
+
+
+def current_version(engine: Engine) -> int:
+    """返回已完成的最高版本号；版本表不存在时返回 0"""
+    return max(_applied_versions(engine), default=0)
+
+
+def _run_schema_migration(engine: Engine, migration: ModuleType) -> None:
+    with _transaction(engine) as conn:
+        migration.upgrade(conn)
+        _record(conn, migration, STATE_APPLIED)
+
+
+def _run_data_migration(engine: Engine, migration: ModuleType, cursor: Optional[str]) -> None:
+    if cursor:
+        print(f"[Migration] Resuming v{migration.VERSION:04d} from cursor {cursor}")
+    while True:
+        with _transaction(engine) as conn:
+            next_cursor = migration.run_batch(conn, cursor)
+            if next_cursor is None:
+                _record(conn, migration, STATE_APPLIED)
+                return
+            _record(conn, migration, STATE_RUNNING, next_cursor)
+        cursor = next_cursor
+
+
+def run_migrations(engine: Engine, migrations: Optional[Sequence[ModuleType]] = None) -> int:
+    """执行全部待执行的迁移，返回执行后的版本号"""
+    migrations = load_migrations() if migrations is None else list(migrations)
+    head = head_version(migrations)
+
+    if {migration.VERSION for migration in migrations} <= _applied_versions(engine):
+        return head
+
+    _ensure_version_table(engine)
+    states = _migration_states(engine)
+
+    for migration in migrations:
+        state, cursor = states.get(migration.VERSION, (None, None))
+        if state == STATE_APPLIED:
+            continue
+
+        print(f"[Migration] Applying v{migration.VERSION:04d}: {migration.DESCRIPTION}")
+        if hasattr(migration, "run_batch"):
+            _run_data_migration(engine, migration, cursor)
+        else:
+            _run_schema_migration(engine, migration)
+
+    return head
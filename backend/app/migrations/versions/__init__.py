@@ -0,0 +1 @@
+"""Ordered migration scripts, one module per version (vNNNN_name.py)."""
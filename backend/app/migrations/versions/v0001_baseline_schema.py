@@ -0,0 +1,30 @@
+"""
+基线结构
+
+新库：按当前模型创建全部表。
+旧库（由原运行时自动迁移维护、没有版本表）：补齐缺失的表与列，保留现有数据。
+"""
+
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  确保全部模型已注册到 metadata
+from app.migrations import ops
+
+VERSION = 1
+DESCRIPTION = "baseline schema (create missing tables and columns)"
+
+
+def upgrade(conn: Connection) -> None:
+    existing_tables = ops.table_names(conn)
+
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            print(f"[Migration] Creating new table: {table.name}")
+            table.create(conn, checkfirst=False)
+            continue
+
+        for column in table.columns:
+            ops.add_column(conn, table.name, column)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
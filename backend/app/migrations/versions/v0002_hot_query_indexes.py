@@ -0,0 +1,39 @@
+"""
+热点查询的复合索引与表达式索引
+
+- 时间线 / 笔记本分页：(notebook_id, date DESC, id DESC)，与 ORDER BY 一致，免排序
+- 置顶：WHERE is_pinned = 1 的部分索引，替代全局的 is_pinned 单列索引
+  （布尔单列索引区分度低，会诱导规划器跨用户扫描全部置顶日记）；
+  查询需写成 Diary.is_pinned == true() 使条件以字面量出现，才能命中部分索引
+- 按用户取笔记本：(user_id, updated_at DESC)
+- 分享列表与按目标查找分享：created_by / diary_id / notebook_id
+- 标签筛选：diarytaglink.tag_id（主键只覆盖 diary_id 开头的查找）
+- mood / weather 筛选：JSON 取值表达式索引，需与 app.sql_expressions 生成的表达式一致
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+
+VERSION = 2
+DESCRIPTION = "composite and expression indexes for hot queries"
+
+INDEXES = [
+    ("ix_diary_notebook_date_id", "diary", "notebook_id, date DESC, id DESC"),
+    ("ix_notebook_user_updated", "notebook", "user_id, updated_at DESC"),
+    ("ix_diarytaglink_tag_id", "diarytaglink", "tag_id"),
+    ("ix_sharetoken_created_by", "sharetoken", "created_by, is_active, created_at DESC"),
+    ("ix_sharetoken_diary_id", "sharetoken", "diary_id"),
+    ("ix_sharetoken_notebook_id", "sharetoken", "notebook_id"),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for name, table_name, expressions in INDEXES:
+        ops.create_index(conn, name, table_name, expressions)
+    ops.create_index(conn, "ix_diary_mood_label", "diary", ops.json_text_sql(conn, "mood", "label"))
+    ops.create_index(conn, "ix_diary_weather", "diary", ops.json_text_sql(conn, "weather_snapshot", "weather"))
+    ops.create_index(
+        conn, "ix_diary_pinned_notebook_date", "diary", "notebook_id, date DESC", where=f"is_pinned = {ops.true_sql(conn)}"
+    )
+    ops.drop_index(conn, "ix_diary_is_pinned")
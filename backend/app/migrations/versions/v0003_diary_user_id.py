@@ -0,0 +1,33 @@
+"""
+Diary.user_id 冗余列与按用户的索引
+
+- (user_id, date DESC, id DESC)：按用户的时间线 / 最近 / 统计直接走单个索引区间
+- 置顶部分索引与 mood / weather 表达式索引改为以 user_id 开头、以 date DESC 结尾，
+  等值筛选后可直接按日期有序返回，替换 v0002 中的全局版本
+- 数据回填见 v0004
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import Diary
+
+VERSION = 3
+DESCRIPTION = "diary.user_id column and per-user indexes"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "diary", Diary.__table__.c.user_id)
+
+    ops.create_index(conn, "ix_diary_user_date_id", "diary", "user_id, date DESC, id DESC")
+    ops.create_index(
+        conn, "ix_diary_pinned_user_date", "diary", "user_id, date DESC", where=f"is_pinned = {ops.true_sql(conn)}"
+    )
+    mood = ops.json_text_sql(conn, "mood", "label")
+    weather = ops.json_text_sql(conn, "weather_snapshot", "weather")
+    ops.create_index(conn, "ix_diary_user_mood_label", "diary", f"user_id, {mood}, date DESC")
+    ops.create_index(conn, "ix_diary_user_weather", "diary", f"user_id, {weather}, date DESC")
+
+    ops.drop_index(conn, "ix_diary_pinned_notebook_date")
+    ops.drop_index(conn, "ix_diary_mood_label")
+    ops.drop_index(conn, "ix_diary_weather")
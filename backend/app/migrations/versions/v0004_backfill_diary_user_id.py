@@ -0,0 +1,30 @@
+"""按 id 分批从 notebook 回填 diary.user_id（可中断续跑）"""
+
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+VERSION = 4
+DESCRIPTION = "backfill diary.user_id from notebook"
+
+BATCH_SIZE = 1000
+
+
+def run_batch(conn: Connection, cursor: Optional[str]) -> Optional[str]:
+    last_id = int(cursor or 0)
+    upper_id = conn.execute(
+        text("SELECT MAX(id) FROM (SELECT id FROM diary WHERE id > :last_id ORDER BY id LIMIT :limit) AS batch"),
+        {"last_id": last_id, "limit": BATCH_SIZE},
+    ).scalar()
+    if upper_id is None:
+        return None
+
+    conn.execute(
+        text(
+            "UPDATE diary SET user_id = (SELECT notebook.user_id FROM notebook WHERE notebook.id = diary.notebook_id) "
+            "WHERE id > :last_id AND id <= :upper_id"
+        ),
+        {"last_id": last_id, "upper_id": upper_id},
+    )
+    return str(upper_id)
@@ -0,0 +1,24 @@
+"""
+PostgreSQL 日记全文检索索引
+
+标题 + 正文 JSON 文本的 tsvector GIN 索引（v0015 起改为基于正文纯文本的新索引并删除本索引）；
+SQLite 下关键词搜索为子串匹配，无需索引，本迁移不做任何操作。
+mood / weather 筛选是等值比较，沿用 v0003 的 ->> 表达式 B-tree 索引（jsonb 的 GIN 索引只服务 @> 等包含查询）。
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.migrations import ops
+from app.sql_expressions import diary_search_document
+
+VERSION = 5
+DESCRIPTION = "postgresql full-text search index on diary"
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    config = settings.POSTGRES_TEXT_SEARCH_CONFIG
+    document = diary_search_document("title", "CAST(content AS TEXT)")
+    ops.create_index(conn, "ix_diary_search_tsv", "diary", f"to_tsvector('{config}', {document})", using="gin")
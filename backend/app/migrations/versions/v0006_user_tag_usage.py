@@ -0,0 +1,20 @@
+"""
+用户标签使用统计表 usertagusage
+
+- 主键 (user_id, tag)：标签补全的前缀区间查询直接走主键
+- (user_id, count DESC, last_used DESC)：无前缀时按频次分页免排序
+- 数据回填见 v0007
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import UserTagUsage
+
+VERSION = 6
+DESCRIPTION = "usertagusage table"
+
+
+def upgrade(conn: Connection) -> None:
+    UserTagUsage.__table__.create(conn, checkfirst=True)
+    ops.create_index(conn, "ix_usertagusage_user_count", "usertagusage", "user_id, count DESC, last_used DESC")
@@ -0,0 +1,35 @@
+"""按用户分批从 diary / diarytaglink 聚合回填 usertagusage（可中断续跑）"""
+
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+VERSION = 7
+DESCRIPTION = "backfill usertagusage from diary tags"
+
+BATCH_SIZE = 100
+
+
+def run_batch(conn: Connection, cursor: Optional[str]) -> Optional[str]:
+    last_user_id = int(cursor or 0)
+    upper_user_id = conn.execute(
+        text('SELECT MAX(id) FROM (SELECT id FROM "user" WHERE id > :last_id ORDER BY id LIMIT :limit) AS batch'),
+        {"last_id": last_user_id, "limit": BATCH_SIZE},
+    ).scalar()
+    if upper_user_id is None:
+        return None
+
+    conn.execute(
+        text(
+            "INSERT INTO usertagusage (user_id, tag, count, last_used) "
+            "SELECT diary.user_id, tag.name, COUNT(*), COALESCE(MAX(diary.updated_at), MAX(diary.date), CURRENT_TIMESTAMP) "
+            "FROM diary "
+            "JOIN diarytaglink ON diarytaglink.diary_id = diary.id "
+            "JOIN tag ON tag.id = diarytaglink.tag_id "
+            "WHERE diary.user_id > :last_id AND diary.user_id <= :upper_id "
+            "GROUP BY diary.user_id, tag.name"
+        ),
+        {"last_id": last_user_id, "upper_id": upper_user_id},
+    )
+    return str(upper_user_id)
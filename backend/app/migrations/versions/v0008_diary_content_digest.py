@@ -0,0 +1,17 @@
+"""
+diary.content_digest 列
+
+旧日记不回填：摘要为 NULL 时下一次保存按正文已变化处理并写入摘要
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import Diary
+
+VERSION = 8
+DESCRIPTION = "diary.content_digest column"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "diary", Diary.__table__.c.content_digest)
@@ -0,0 +1,17 @@
+"""
+diary.version 列（PATCH 乐观并发校验）
+
+旧日记取默认值 1
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import Diary
+
+VERSION = 9
+DESCRIPTION = "diary.version column"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "diary", Diary.__table__.c.version)
@@ -0,0 +1,15 @@
+"""
+task.last_result 列：记录任务最近一次运行的结果（如 stats_snapshot 对账纠正的偏差）
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import Task
+
+VERSION = 10
+DESCRIPTION = "task.last_result column"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "task", Task.__table__.c.last_result)
@@ -0,0 +1,26 @@
+"""
+筛选索引补上 id DESC 结尾
+
+搜索与旧列表接口改为按 (date DESC, id DESC) 键集分页后，
+mood / weather 表达式索引与置顶部分索引需以同样的列结尾，等值筛选后才能直接有序返回而不额外排序
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+
+VERSION = 11
+DESCRIPTION = "id tiebreak on filtered diary indexes"
+
+
+def upgrade(conn: Connection) -> None:
+    mood = ops.json_text_sql(conn, "mood", "label")
+    weather = ops.json_text_sql(conn, "weather_snapshot", "weather")
+    indexes = [
+        ("ix_diary_user_mood_label", f"user_id, {mood}, date DESC, id DESC", None),
+        ("ix_diary_user_weather", f"user_id, {weather}, date DESC, id DESC", None),
+        ("ix_diary_pinned_user_date", "user_id, date DESC, id DESC", f"is_pinned = {ops.true_sql(conn)}"),
+    ]
+    for name, expressions, where in indexes:
+        ops.drop_index(conn, name)
+        ops.create_index(conn, name, "diary", expressions, where=where)
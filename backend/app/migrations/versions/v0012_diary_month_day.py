@@ -0,0 +1,18 @@
+"""
+diary.month_day 列与 (user_id, month_day, date DESC, id DESC) 索引
+
+"那年今日"按用户本地月-日等值查找所有往年的日记，数据由 v0013 按用户时区回填
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import Diary
+
+VERSION = 12
+DESCRIPTION = "diary.month_day column and index"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "diary", Diary.__table__.c.month_day)
+    ops.create_index(conn, "ix_diary_user_month_day", "diary", "user_id, month_day, date DESC, id DESC")
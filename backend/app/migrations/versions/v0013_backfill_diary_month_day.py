@@ -0,0 +1,38 @@
+"""按用户分批回填 diary.month_day（时区换算在 Python 中完成，可中断续跑）"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.modules.journaling.helpers.local_dates import local_month_day
+
+VERSION = 13
+DESCRIPTION = "backfill diary.month_day in user timezone"
+
+BATCH_SIZE = 100
+
+
+def run_batch(conn: Connection, cursor: Optional[str]) -> Optional[str]:
+    last_user_id = int(cursor or 0)
+    users = conn.execute(
+        text('SELECT id, timezone, time_offset_mins FROM "user" WHERE id > :last_id ORDER BY id LIMIT :limit'),
+        {"last_id": last_user_id, "limit": BATCH_SIZE},
+    ).all()
+    if not users:
+        return None
+
+    for user_id, timezone_name, offset_mins in users:
+        rows = conn.execute(text("SELECT id, date FROM diary WHERE user_id = :user_id"), {"user_id": user_id}).all()
+        params = [
+            # SQLite 中日期以文本存储
+            {"id": diary_id, "month_day": local_month_day(
+                datetime.fromisoformat(date) if isinstance(date, str) else date, timezone_name, offset_mins or 0
+            )}
+            for diary_id, date in rows
+            if date is not None
+        ]
+        if params:
+            conn.execute(text("UPDATE diary SET month_day = :month_day WHERE id = :id"), params)
+    return str(users[-1][0])
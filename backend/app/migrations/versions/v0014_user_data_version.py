@@ -0,0 +1,17 @@
+"""
+user.data_version 列（app 查询接口的 ETag）
+
+旧用户取默认值 0
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import User
+
+VERSION = 14
+DESCRIPTION = "user.data_version column"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "user", User.__table__.c.data_version)
@@ -0,0 +1,26 @@
+"""
+diary.content_text 列（正文纯文本），数据由 v0016 回填
+
+PostgreSQL 的全文检索索引改为基于标题 + 纯文本：v0005 的索引对正文 JSON 文本分词，
+"type" / "paragraph" 等结构键也会命中，这里删除后按新的 diary_text_match 表达式重建
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.migrations import ops
+from app.models import Diary
+from app.sql_expressions import diary_search_document
+
+VERSION = 15
+DESCRIPTION = "diary.content_text column and plain-text search index"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "diary", Diary.__table__.c.content_text)
+    if conn.dialect.name != "postgresql":
+        return
+    config = settings.POSTGRES_TEXT_SEARCH_CONFIG
+    ops.drop_index(conn, "ix_diary_search_tsv")
+    document = diary_search_document("title", "content_text")
+    ops.create_index(conn, "ix_diary_search_text_tsv", "diary", f"to_tsvector('{config}', {document})", using="gin")
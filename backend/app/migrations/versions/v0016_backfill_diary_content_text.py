@@ -0,0 +1,32 @@
+"""按 id 分批回填 diary.content_text（纯文本在 Python 中由 analyze_content 提取，可中断续跑）"""
+
+import json
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.modules.journaling.helpers.content_stats import analyze_content
+
+VERSION = 16
+DESCRIPTION = "backfill diary.content_text from content"
+
+BATCH_SIZE = 500
+
+
+def run_batch(conn: Connection, cursor: Optional[str]) -> Optional[str]:
+    last_id = int(cursor or 0)
+    rows = conn.execute(
+        text("SELECT id, content FROM diary WHERE id > :last_id ORDER BY id LIMIT :limit"),
+        {"last_id": last_id, "limit": BATCH_SIZE},
+    ).all()
+    if not rows:
+        return None
+
+    params = [
+        # SQLite 中 JSON 以文本存储
+        {"id": diary_id, "content_text": analyze_content(json.loads(content) if isinstance(content, str) else content).text}
+        for diary_id, content in rows
+    ]
+    conn.execute(text("UPDATE diary SET content_text = :content_text WHERE id = :id"), params)
+    return str(rows[-1][0])
@@ -0,0 +1,18 @@
+"""
+usertagusage.tag_key 列（小写标签名），数据由 v0018 回填
+
+- (user_id, tag_key)：标签补全不区分大小写的前缀区间查询
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations import ops
+from app.models import UserTagUsage
+
+VERSION = 17
+DESCRIPTION = "usertagusage.tag_key column and prefix index"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "usertagusage", UserTagUsage.__table__.c.tag_key)
+    ops.create_index(conn, "ix_usertagusage_user_key", "usertagusage", "user_id, tag_key")
@@ -0,0 +1,37 @@
+"""按用户分批回填 usertagusage.tag_key（小写在 Python 中计算，SQLite 的 LOWER 只处理 ASCII，可中断续跑）"""
+
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.modules.journaling.helpers.tags import tag_key
+
+VERSION = 18
+DESCRIPTION = "backfill usertagusage.tag_key from tag"
+
+BATCH_SIZE = 100
+
+
+def run_batch(conn: Connection, cursor: Optional[str]) -> Optional[str]:
+    last_user_id = int(cursor or 0)
+    upper_user_id = conn.execute(
+        text('SELECT MAX(id) FROM (SELECT id FROM "user" WHERE id > :last_id ORDER BY id LIMIT :limit) AS batch'),
+        {"last_id": last_user_id, "limit": BATCH_SIZE},
+    ).scalar()
+    if upper_user_id is None:
+        return None
+
+    rows = conn.execute(
+        text(
+            "SELECT user_id, tag FROM usertagusage "
+            "WHERE user_id > :last_id AND user_id <= :upper_id AND tag_key IS NULL"
+        ),
+        {"last_id": last_user_id, "upper_id": upper_user_id},
+    ).all()
+    if rows:
+        conn.execute(
+            text("UPDATE usertagusage SET tag_key = :tag_key WHERE user_id = :user_id AND tag = :tag"),
+            [{"user_id": user_id, "tag": tag, "tag_key": tag_key(tag)} for user_id, tag in rows],
+        )
+    return str(upper_user_id)
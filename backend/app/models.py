@@ -4,6 +4,10 @@ from sqlmodel import SQLModel, Field, Relationship, Column, JSON
 from enum import Enum
 from uuid import UUID, uuid4
 import secrets
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSON 列类型：SQLite 下为 JSON 文本，PostgreSQL 下为 JSONB
+JSONType = JSON().with_variant(JSONB(), "postgresql")
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -18,6 +22,15 @@ class Tag(SQLModel, table=True):
     name: str = Field(index=True, unique=True)
     diaries: List["Diary"] = Relationship(back_populates="tags", link_model=DiaryTagLink)
 
+class UserTagUsage(SQLModel, table=True):
+    # 用户维度的标签使用统计：count 为该用户带此标签的日记数，归零即删除；支撑按频次排序的标签补全
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    tag: str = Field(primary_key=True)
+    # 小写后的标签名，标签补全按它做不区分大小写的前缀匹配（索引见 v0017，旧数据由 v0018 回填）
+    tag_key: Optional[str] = None
+    count: int = Field(default=0)
+    last_used: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(index=True, unique=True)
@@ -25,13 +38,15 @@ class User(SQLModel, table=True):
     role: UserRole = Field(default=UserRole.USER)
     timezone: str = Field(default="UTC")
     time_offset_mins: int = Field(default=0)
+    # 数据版本：该用户的日记 / 日记本每次写入 +1，app 查询接口的 ETag 由它派生
+    data_version: int = Field(default=0)
     immich_url: Optional[str] = None
     immich_api_key: Optional[str] = None
-    immich_config: Dict[str, Any] = Field(default_factory=lambda: {"mode": "link"}, sa_column=Column(JSON))
+    immich_config: Dict[str, Any] = Field(default_factory=lambda: {"mode": "link"}, sa_column=Column(JSONType))
     
     karakeep_url: Optional[str] = None
     karakeep_api_key: Optional[str] = None
-    karakeep_config: Dict[str, Any] = Field(default_factory=lambda: {}, sa_column=Column(JSON))
+    karakeep_config: Dict[str, Any] = Field(default_factory=lambda: {}, sa_column=Column(JSONType))
     
     ai_provider: Optional[str] = Field(default="openai")
     ai_base_url: Optional[str] = None
@@ -43,10 +58,10 @@ class User(SQLModel, table=True):
     geo_api_key: Optional[str] = None
     
     notion_api_key: Optional[str] = None  # Notion API Key (加密存储)
-    notion_config: Dict[str, Any] = Field(default_factory=lambda: {}, sa_column=Column(JSON))
+    notion_config: Dict[str, Any] = Field(default_factory=lambda: {}, sa_column=Column(JSONType))
     
     # 用户任务配置 (e.g. {"daily_summary": {"enabled": true}})
-    task_configs: Dict[str, Any] = Field(default_factory=lambda: {}, sa_column=Column(JSON))
+    task_configs: Dict[str, Any] = Field(default_factory=lambda: {}, sa_column=Column(JSONType))
     
     avatar_url: Optional[str] = None
     notebooks: List["Notebook"] = Relationship(back_populates="user")
@@ -59,26 +74,36 @@ class Notebook(SQLModel, table=True):
     user_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    stats_snapshot: Dict[str, Any] = Field(default_factory=lambda: {"total_words": 0, "total_entries": 0}, sa_column=Column(JSON))
+    stats_snapshot: Dict[str, Any] = Field(default_factory=lambda: {"total_words": 0, "total_entries": 0}, sa_column=Column(JSONType))
     user: User = Relationship(back_populates="notebooks")
     diaries: List["Diary"] = Relationship(back_populates="notebook")
 
 class Diary(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     notebook_id: int = Field(foreign_key="notebook.id")
+    # 冗余的归属用户（= notebook.user_id），按用户查询时免去 Notebook 连接
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     title: Optional[str] = Field(default="Untitled Entry")
     date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+    # 按用户时区与时间偏移换算后的本地月-日（"MM-DD"），"那年今日"按它走索引；用户修改时区时重算
+    month_day: Optional[str] = None
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    content: Dict[str, Any] = Field(sa_column=Column(JSON))
+    content: Dict[str, Any] = Field(sa_column=Column(JSONType))
+    # 正文摘要：更新时摘要不变则跳过字数统计与封面解析
+    content_digest: Optional[str] = None
+    # 正文纯文本（analyze_content().text），关键词搜索的匹配 / 排序与摘要片段都基于它，不匹配 JSON 结构
+    content_text: Optional[str] = None
+    # 乐观并发版本号：每次写入 +1，PATCH 携带的 version 不一致时拒绝
+    version: int = Field(default=1)
     cover_image_url: Optional[str] = None
     word_count: int = Field(default=0, index=True)
     image_count: int = Field(default=0)
-    mood: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    mood: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONType))
     is_favorite: bool = Field(default=False, index=True)
-    is_pinned: bool = Field(default=False, index=True)
-    stats: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
-    location_snapshot: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
-    weather_snapshot: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    is_pinned: bool = Field(default=False)
+    stats: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONType))
+    location_snapshot: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONType))
+    weather_snapshot: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONType))
     notebook: Notebook = Relationship(back_populates="diaries")
     tags: List[Tag] = Relationship(back_populates="diaries", link_model=DiaryTagLink)
 
@@ -117,6 +142,7 @@ class Task(SQLModel, table=True):
     is_enabled: bool = Field(default=True)  # 全局开关
     cron_expr: str = Field(default="0 0 * * *")  # cron 表达式，默认每日0点
     last_run: Optional[datetime] = None
+    last_result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONType))  # 最近一次运行的结果 / 指标
     next_run: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -144,7 +170,7 @@ class XiaohongshuPost(SQLModel, table=True):
     source_url: str
     created_at: Optional[datetime] = None  # 原帖发布时间
     fetched_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    comments: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSON))
+    comments: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSONType))
     
     # 关联图片
     images: List["XiaohongshuImage"] = Relationship(back_populates="post")
@@ -187,4 +213,4 @@ class BilibiliVideo(SQLModel, table=True):
     source_url: str
     created_at: Optional[datetime] = None  # 视频发布时间
     fetched_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    comments: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSON))
+    comments: Optional[List[Dict[str, Any]]] = Field(default=None, sa_column=Column(JSONType))
@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session, get_read_session, read_engine, write_queue
 from app.models import User, Notebook, Diary, Task
 from app.auth import get_current_user
 from app.security import decrypt_data
 from app.scheduler import reschedule_task
+from app.api.app.data_version import bump_data_version
+from app.modules.journaling.helpers.content_stats import analyze_content
+from app.modules.journaling.helpers.local_dates import local_month_day
+from app.modules.notebooks.helpers.stats_snapshot import update_stats_snapshot
 import httpx
 from datetime import datetime, timezone
 from pydantic import BaseModel
+import asyncio
 import json
 import re
 
@@ -72,8 +78,8 @@ def parse_inline_markdown(text: str) -> list:
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
 @router.post("/trigger-daily-summary")
-async def trigger_daily_summary(background_tasks: BackgroundTasks, session: Session = Depends(get_session)):
-    # Trigger for all users
+def trigger_daily_summary(background_tasks: BackgroundTasks, session: Session = Depends(get_read_session)):
+    # Trigger for all users（只读会话：后台任务需要写入时不会被本请求占着的写连接卡住）
     users = session.exec(select(User)).all()
     started_count = 0
     for user in users:
@@ -93,9 +99,9 @@ class UserTaskToggle(BaseModel):
     enabled: bool
 
 @router.get("/")
-async def list_tasks(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def list_tasks(current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     """获取所有任务状态"""
-    tasks = session.exec(select(Task)).all()
+    tasks = (await session.exec(select(Task))).all()
     user_configs = current_user.task_configs or {}
     
     result = []
@@ -109,6 +115,7 @@ async def list_tasks(current_user: User = Depends(get_current_user), session: Se
             "is_enabled": task.is_enabled,
             "cron_expr": task.cron_expr,
             "last_run": task.last_run,
+            "last_result": task.last_result,
             "next_run": task.next_run,
             "user_enabled": user_task_config.get("enabled", True),
         })
@@ -121,30 +128,32 @@ async def update_task(
     task_name: str,
     update: TaskUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
 ):
     """更新任务全局配置（仅管理员）"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     
-    task = session.exec(select(Task).where(Task.name == task_name)).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if update.is_enabled is not None:
-        task.is_enabled = update.is_enabled
-    if update.cron_expr is not None:
-        task.cron_expr = update.cron_expr
+    def save(session: Session) -> dict:
+        task = session.exec(select(Task).where(Task.name == task_name)).first()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        if update.is_enabled is not None:
+            task.is_enabled = update.is_enabled
+        if update.cron_expr is not None:
+            task.cron_expr = update.cron_expr
+        
+        task.updated_at = datetime.now(timezone.utc)
+        session.add(task)
+        return {"name": task.name, "is_enabled": task.is_enabled, "cron_expr": task.cron_expr}
     
-    task.updated_at = datetime.now(timezone.utc)
-    session.add(task)
-    session.commit()
-    session.refresh(task)
+    # 写入经写队列提交，不在事件循环上占用写连接
+    result = await write_queue.submit(save)
     
-    # 重新调度任务
-    reschedule_task(task_name)
+    # 重新调度任务（reschedule_task 会自行获取写连接，放到线程中执行）
+    await asyncio.to_thread(reschedule_task, task_name)
     
-    return {"status": "ok", "task": {"name": task.name, "is_enabled": task.is_enabled, "cron_expr": task.cron_expr}}
+    return {"status": "ok", "task": result}
 
 
 @router.patch("/{task_name}/toggle")
@@ -152,141 +161,152 @@ async def toggle_user_task(
     task_name: str,
     toggle: UserTaskToggle,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
 ):
     """切换用户的任务开关"""
-    task = session.exec(select(Task).where(Task.name == task_name)).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    # 创建新的字典对象以确保 SQLAlchemy 检测到变化
-    task_configs = dict(current_user.task_configs or {})
-    task_configs[task_name] = {"enabled": toggle.enabled}
-    current_user.task_configs = task_configs
+    def save(session: Session) -> None:
+        task = session.exec(select(Task).where(Task.name == task_name)).first()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        # 在写事务内重新读取用户，创建新的字典对象以确保 SQLAlchemy 检测到变化
+        user = session.get(User, current_user.id)
+        task_configs = dict(user.task_configs or {})
+        task_configs[task_name] = {"enabled": toggle.enabled}
+        user.task_configs = task_configs
+        session.add(user)
     
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await write_queue.submit(save)
     
     return {"status": "ok", "task_name": task_name, "enabled": toggle.enabled}
 
 
+def load_user(user_id: int) -> User:
+    with Session(read_engine) as session:
+        return session.get(User, user_id)
+
+
 async def process_user_daily_summary(user_id: int):
-    # Re-open session since this is async background task
-    from app.database import engine
-    with Session(engine) as session:
-        user = session.get(User, user_id)
-        if not user: return
-        
-        try:
-            print(f"Processing daily summary for {user.username}")
-            
-            # 1. Fetch Bookmarks
-            karakeep_key = decrypt_data(user.karakeep_api_key)
-            headers = {"Authorization": f"Bearer {karakeep_key}"}
-            base_url = user.karakeep_url.rstrip('/')
-            
-            # Fetch recent bookmarks (Karakeep uses /api/v1/bookmarks)
-            async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
-                resp = await client.get(f"{base_url}/api/v1/bookmarks", headers=headers, params={"limit": 50})
-                if resp.status_code != 200:
-                    print(f"Failed to fetch bookmarks for {user.username}: {resp.status_code}")
-                    return
-                
-                data = resp.json()
-                bookmarks = data.get('bookmarks', [])
-                
-            # Filter for today (UTC) - Simplified logic: check if createdAt is today
-            today_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-            today_bookmarks = []
-            
-            for b in bookmarks:
-                # Karakeep returns createdAt in ISO format e.g., "2026-02-22T06:01:41.000Z"
-                c_at = b.get('createdAt', '')
-                if c_at.startswith(today_str):
-                    today_bookmarks.append(b)
-            
-            if not today_bookmarks:
-                print(f"No bookmarks for {user.username} today")
-                return
+    # 后台任务运行在事件循环上：用户从只读连接读取（放到线程中），写入通过写队列提交，
+    # 外部网络请求期间不占用任何连接
+    user = await asyncio.to_thread(load_user, user_id)
+    if not user: return
+    try:
+        print(f"Processing daily summary for {user.username}")
+
+        # 1. Fetch Bookmarks
+        karakeep_key = decrypt_data(user.karakeep_api_key)
+        headers = {"Authorization": f"Bearer {karakeep_key}"}
+        base_url = user.karakeep_url.rstrip('/')
 
-            # 2. Summarize with AI
-            summary = await generate_ai_summary(user, today_bookmarks)
-            if not summary:
-                print(f"Failed to generate summary for {user.username}")
+        # Fetch recent bookmarks (Karakeep uses /api/v1/bookmarks)
+        async with httpx.AsyncClient(verify=False, timeout=30.0) as client:
+            resp = await client.get(f"{base_url}/api/v1/bookmarks", headers=headers, params={"limit": 50})
+            if resp.status_code != 200:
+                print(f"Failed to fetch bookmarks for {user.username}: {resp.status_code}")
                 return
 
-            # 3. Create/Get Notebook
+            data = resp.json()
+            bookmarks = data.get('bookmarks', [])
+
+        # Filter for today (UTC) - Simplified logic: check if createdAt is today
+        today_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        today_bookmarks = []
+
+        for b in bookmarks:
+            # Karakeep returns createdAt in ISO format e.g., "2026-02-22T06:01:41.000Z"
+            c_at = b.get('createdAt', '')
+            if c_at.startswith(today_str):
+                today_bookmarks.append(b)
+
+        if not today_bookmarks:
+            print(f"No bookmarks for {user.username} today")
+            return
+
+        # 2. Summarize with AI
+        summary = await generate_ai_summary(user, today_bookmarks)
+        if not summary:
+            print(f"Failed to generate summary for {user.username}")
+            return
+
+        # 3. Build Diary Entry
+        title = f"Reading Summary - {today_str}"
+
+        # Build ProseMirror JSON content
+        # 解析 AI 返回的 Markdown 格式 summary
+        summary_nodes = markdown_to_prosemirror(summary)
+
+        content_json = {
+            "type": "doc",
+            "content": [
+                {
+                    "type": "heading",
+                    "attrs": {"level": 2},
+                    "content": [{"type": "text", "text": "Daily AI Summary"}]
+                },
+                *summary_nodes,
+                {
+                    "type": "heading",
+                    "attrs": {"level": 3},
+                    "content": [{"type": "text", "text": "Bookmarks"}]
+                }
+            ]
+        }
+
+        # Add bookmark cards instead of bullet list
+        for b in today_bookmarks:
+            content = b.get('content', {})
+            b_title = b.get('title') or content.get('title') or "Untitled"
+            b_url = content.get('url') or ''
+            b_desc = content.get('description') or ''
+            b_image = content.get('imageUrl') or ''
+            b_id = b.get('id', '')  # Karakeep bookmark ID
+
+            # 构建 karakeep 书签详情页 URL
+            karakeep_bookmark_url = f"{base_url}/bookmarks/{b_id}" if b_id else b_url
+
+            bookmark_node = {
+                "type": "bookmark",
+                "attrs": {
+                    "url": b_url,
+                    "title": b_title,
+                    "description": b_desc,
+                    "image": b_image
+                    # "karakeepUrl": karakeep_bookmark_url
+                }
+            }
+            content_json["content"].append(bookmark_node)
+
+        # 4. Create/Get Notebook and Create Diary Entry：在写队列的同一事务中完成
+        def save_summary(session: Session) -> None:
             notebook = session.exec(select(Notebook).where(Notebook.user_id == user.id, Notebook.name == "Everyday Reading")).first()
             if not notebook:
                 notebook = Notebook(name="Everyday Reading", user_id=user.id)
                 session.add(notebook)
-                session.commit()
-                session.refresh(notebook)
-
-            # 4. Create Diary Entry
-            title = f"Reading Summary - {today_str}"
-            
-            # Build ProseMirror JSON content
-            # 解析 AI 返回的 Markdown 格式 summary
-            summary_nodes = markdown_to_prosemirror(summary)
-            
-            content_json = {
-                "type": "doc",
-                "content": [
-                    {
-                        "type": "heading",
-                        "attrs": {"level": 2},
-                        "content": [{"type": "text", "text": "Daily AI Summary"}]
-                    },
-                    *summary_nodes,
-                    {
-                        "type": "heading",
-                        "attrs": {"level": 3},
-                        "content": [{"type": "text", "text": "Bookmarks"}]
-                    }
-                ]
-            }
-            
-            # Add bookmark cards instead of bullet list
-            for b in today_bookmarks:
-                content = b.get('content', {})
-                b_title = b.get('title') or content.get('title') or "Untitled"
-                b_url = content.get('url') or ''
-                b_desc = content.get('description') or ''
-                b_image = content.get('imageUrl') or ''
-                b_id = b.get('id', '')  # Karakeep bookmark ID
-                
-                # 构建 karakeep 书签详情页 URL
-                karakeep_bookmark_url = f"{base_url}/bookmarks/{b_id}" if b_id else b_url
-                
-                bookmark_node = {
-                    "type": "bookmark",
-                    "attrs": {
-                        "url": b_url,
-                        "title": b_title,
-                        "description": b_desc,
-                        "image": b_image
-                        # "karakeepUrl": karakeep_bookmark_url
-                    }
-                }
-                content_json["content"].append(bookmark_node)
+                session.flush()
 
+            now = datetime.now(timezone.utc)
             new_diary = Diary(
                 notebook_id=notebook.id,
+                user_id=user.id,
                 title=title,
                 content=content_json,
-                date=datetime.now(timezone.utc),
+                content_text=analyze_content(content_json).text,
+                date=now,
+                month_day=local_month_day(now, user.timezone, user.time_offset_mins),
                 word_count=len(summary),
                 stats={"ai_generated": True},
                 image_count=0
             )
             session.add(new_diary)
-            session.commit()
-            print(f"Created summary diary for {user.username}")
+            notebook.stats_snapshot = update_stats_snapshot(notebook.stats_snapshot, words_delta=new_diary.word_count, entries_delta=1)
+            session.add(notebook)
+            bump_data_version(session, user.id)
 
-        except Exception as e:
-            print(f"Error processing summary for {user.username}: {e}")
+        await write_queue.submit(save_summary)
+        print(f"Created summary diary for {user.username}")
+
+    except Exception as e:
+        print(f"Error processing summary for {user.username}: {e}")
 
 async def generate_ai_summary(user: User, bookmarks: list) -> str:
     if not user.ai_api_key: return None
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select, or_, col, func
-from app.database import get_session
+from sqlalchemy.orm import selectinload
+from sqlmodel import select, or_, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
 from app.models import Diary, Notebook, Tag, User, DiaryTagLink
 from app.auth import get_current_user
 from app.security import decrypt_data
+from app.sql_expressions import diary_text_match
 import httpx
 from typing import List, Optional, Any, Dict
 
@@ -16,31 +19,26 @@ async def search_unified(
     include_diaries: bool = True,
     include_bookmarks: bool = True,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     results = {"diaries": [], "bookmarks": []}
     
     # 1. Search Diaries
     if include_diaries:
-        statement = select(Diary).join(Notebook).where(Notebook.user_id == current_user.id)
+        statement = select(Diary).where(Diary.user_id == current_user.id)
         if q:
-            # SQLite case-insensitive match often requires simple logic or custom collation
-            # For this simple app, we assume standard ILIKE or similar
+            # Title / content match (full-text search on PostgreSQL) or notebook name
             q_pattern = f"%{q}%"
-            statement = statement.where(or_(
-                col(Diary.title).ilike(q_pattern),
-                # col(Diary.content).ilike(q_pattern), # JSON content search is tricky in generic SQL
-                # Simple fallback: search title only or assume simple JSON structure
-                # In timeline.py: content_match = func.cast(Diary.content, col(Diary.content).type).ilike(f'%: "%{q}%"%')
-                # Let's use similar logic
-                func.cast(Diary.content, col(Diary.content).type).ilike(f'%{q}%'),
+            statement = statement.join(Notebook).where(or_(
+                diary_text_match(Diary.title, Diary.content_text, q),
                 col(Notebook.name).ilike(q_pattern)
             ))
         if tag:
             statement = statement.join(DiaryTagLink).join(Tag).where(Tag.name == tag)
             
-        statement = statement.order_by(Diary.date.desc()).limit(50)
-        diaries = session.exec(statement).all()
+        # 预加载 tags，避免在异步会话中触发懒加载
+        statement = statement.options(selectinload(Diary.tags)).order_by(Diary.date.desc()).limit(50)
+        diaries = (await session.exec(statement)).all()
         # Transform tags for frontend (simulating schema validator)
         results["diaries"] = []
         for d in diaries:
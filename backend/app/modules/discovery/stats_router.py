@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select, func
-from app.database import get_session
-from app.models import Diary, Notebook, User
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
+from app.models import Diary, User
 from app.auth import get_current_user
+from app.sql_expressions import date_text
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List
 
 router = APIRouter(prefix="/api/stats", tags=["stats"])
 
 @router.get("/")
-async def get_stats(days: int = Query(30), user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def get_stats(days: int = Query(30), user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     # 1. Total Aggregates
-    total_words = session.exec(select(func.sum(Diary.word_count)).join(Notebook).where(Notebook.user_id == user.id)).one() or 0
-    total_entries = session.exec(select(func.count(Diary.id)).join(Notebook).where(Notebook.user_id == user.id)).one() or 0
+    total_words = (await session.exec(select(func.sum(Diary.word_count)).where(Diary.user_id == user.id))).one() or 0
+    total_entries = (await session.exec(select(func.count(Diary.id)).where(Diary.user_id == user.id))).one() or 0
 
     # 2. Complete Data Scan for Moods & Streaks (Scoped to user)
-    all_diaries = session.exec(select(Diary).join(Notebook).where(Notebook.user_id == user.id).order_by(Diary.date.desc())).all()
+    all_diaries = (await session.exec(select(Diary).where(Diary.user_id == user.id).order_by(Diary.date.desc()))).all()
     
     mood_counts: Dict[str, int] = {}
     for d in all_diaries:
@@ -26,11 +28,11 @@ async def get_stats(days: int = Query(30), user: User = Depends(get_current_user
     # 3. Dynamic Activity Trend
     start_date = datetime.now(timezone.utc) - timedelta(days=days)
     trend_stmt = (
-        select(func.date(Diary.date).label("day"), func.count(Diary.id).label("count"))
-        .join(Notebook).where(Notebook.user_id == user.id, Diary.date >= start_date)
+        select(date_text(Diary.date).label("day"), func.count(Diary.id).label("count"))
+        .where(Diary.user_id == user.id, Diary.date >= start_date)
         .group_by("day").order_by("day")
     )
-    trend_map = {r.day: r.count for r in session.exec(trend_stmt).all()}
+    trend_map = {r.day: r.count for r in (await session.exec(trend_stmt)).all()}
     activity_trend = []
     for i in range(days + 1):
         d = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
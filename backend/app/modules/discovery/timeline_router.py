@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select, and_, or_, col, func
-from app.database import get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session, select, and_, or_, col
+from app.database import get_read_session
 from app.models import Diary, Notebook, Tag, User, DiaryTagLink
 from app.schemas import DiaryRead
 from app.auth import get_current_user
+from app.api.app.cursor import MAX_PAGE_SIZE, diary_keyset_page, set_next_cursor
+from app.sql_expressions import diary_text_match, mood_label, weather_label
 from typing import List, Optional
 import json
 
@@ -11,41 +13,44 @@ router = APIRouter(prefix="/api/timeline", tags=["timeline"])
 
 @router.get("/", response_model=List[DiaryRead])
 def get_timeline(
+    response: Response,
     notebook_id: Optional[int] = Query(None),
     q: Optional[str] = Query(None),
     mood: Optional[str] = Query(None),
     weather: Optional[str] = Query(None),
     tag: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ):
-    """全域搜索引擎：支持标题、正文、日记本名称的联合检索"""
-    statement = select(Diary).join(Notebook).where(Notebook.user_id == current_user.id)
+    """
+    全域搜索引擎：支持标题、正文、日记本名称的联合检索
+    按 (date, id) 键集分页，单页最多 MAX_PAGE_SIZE 条，下一页 cursor 在 X-Next-Cursor 响应头中
+    """
+    statement = select(Diary).where(Diary.user_id == current_user.id)
     
     if q:
         q_pattern = f"%{q}%"
-        # 1. 标题匹配
-        title_match = col(Diary.title).ilike(q_pattern)
-        # 2. 内容匹配 (JSON 文本内容提取)
-        content_match = func.cast(Diary.content, col(Diary.content).type).ilike(f'%: "%{q}%"%')
-        # 3. 日记本名称匹配 (新增)
+        # 1. 标题与正文匹配 (PostgreSQL 下为全文检索)
+        text_match = diary_text_match(Diary.title, Diary.content_text, q)
+        # 2. 日记本名称匹配
         notebook_match = col(Notebook.name).ilike(q_pattern)
         
-        statement = statement.where(or_(title_match, content_match, notebook_match))
+        statement = statement.join(Notebook).where(or_(text_match, notebook_match))
         
     if notebook_id:
         statement = statement.where(Diary.notebook_id == notebook_id)
         
     if mood:
-        statement = statement.where(func.json_extract(Diary.mood, "$.label") == mood)
+        statement = statement.where(mood_label(Diary.mood) == mood)
         
     if weather:
-        statement = statement.where(func.json_extract(Diary.weather_snapshot, "$.weather") == weather)
+        statement = statement.where(weather_label(Diary.weather_snapshot) == weather)
         
     if tag:
         statement = statement.join(DiaryTagLink).join(Tag).where(Tag.name == tag)
         
-    statement = statement.order_by(Diary.date.desc())
-    diaries = session.exec(statement).all()
-    
+    diaries, next_cursor = diary_keyset_page(session, statement, cursor, limit)
+    set_next_cursor(response, next_cursor)
     return diaries
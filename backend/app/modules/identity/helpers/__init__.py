@@ -0,0 +1 @@
+"""Identity domain helpers."""
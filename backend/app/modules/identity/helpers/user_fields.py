@@ -0,0 +1,25 @@
+from typing import Any
+
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from app.models import User
+from app.write_queue import WriteJob
+
+
+def save_user_fields(user_id: int, **fields: Any) -> WriteJob:
+    """
+    返回写任务：按主键重新读取用户并写入给定字段
+    async 路由中的 current_user 来自只读的异步会话，写入需提交到 write_queue，不能在事件循环上取写连接
+    """
+
+    def save(session: Session) -> User:
+        user = session.get(User, user_id)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        for name, value in fields.items():
+            setattr(user, name, value)
+        session.add(user)
+        return user
+
+    return save
@@ -1,13 +1,19 @@
+import asyncio
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlmodel import Session, select
+from sqlmodel import Session, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth import get_current_user, get_password_hash, verify_password
-from app.database import get_session
-from app.models import User, UserRole
+from app.database import get_async_session, get_write_queue
+from app.api.app.data_version import bump_data_version
+from app.models import User, UserRole, UserTagUsage
+from app.modules.identity.helpers.user_fields import save_user_fields
+from app.modules.journaling.helpers.local_dates import refresh_user_month_days
 from app.schemas import UserAdminRead, UserCreate, UserUpdate
+from app.write_queue import WriteQueue
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -29,31 +35,36 @@ class PasswordReset(BaseModel):
 async def create_user_admin(
     user_in: UserCreate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
-    existing = session.exec(select(User).where(User.username == user_in.username)).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Username exists")
-
-    new_user = User(
-        username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
-        role=user_in.role or UserRole.USER,
-        timezone=user_in.timezone or "UTC",
-        time_offset_mins=user_in.time_offset_mins or 0,
-    )
-    session.add(new_user)
-    session.commit()
+    # bcrypt 较慢，放到线程中计算，不阻塞事件循环
+    hashed_password = await asyncio.to_thread(get_password_hash, user_in.password)
+
+    def insert(session: Session) -> User:
+        existing = session.exec(select(User).where(User.username == user_in.username)).first()
+        if existing:
+            raise HTTPException(status_code=400, detail="Username exists")
+        new_user = User(
+            username=user_in.username,
+            hashed_password=hashed_password,
+            role=user_in.role or UserRole.USER,
+            timezone=user_in.timezone or "UTC",
+            time_offset_mins=user_in.time_offset_mins or 0,
+        )
+        session.add(new_user)
+        return new_user
+
+    new_user = await write_queue.submit(insert)
     return {"status": "ok", "message": f"Created {user_in.username} as {new_user.role}"}
 
 
 @router.get("/", response_model=List[UserAdminRead])
-async def list_users(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def list_users(current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
-    users = session.exec(select(User)).all()
+    users = (await session.exec(select(User))).all()
     return [
         UserAdminRead(
             id=user.id,
@@ -77,26 +88,20 @@ async def update_user_role(
     user_id: int,
     role_in: RoleUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
-
-    target_user = session.get(User, user_id)
-    if not target_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if target_user.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot modify your own role")
-    if target_user.id == 1:
+    if user_id == 1:
         raise HTTPException(status_code=400, detail="Cannot modify the primary administrator")
-
     try:
-        target_user.role = UserRole(role_in.role)
+        role = UserRole(role_in.role)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    session.add(target_user)
-    session.commit()
+    await write_queue.submit(save_user_fields(user_id, role=role))
     return {"status": "ok", "message": f"Role updated to {role_in.role}"}
 
 
@@ -105,18 +110,13 @@ async def reset_user_password(
     user_id: int,
     pw_in: PasswordReset,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
 
-    target_user = session.get(User, user_id)
-    if not target_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    target_user.hashed_password = get_password_hash(pw_in.new_password)
-    session.add(target_user)
-    session.commit()
+    hashed_password = await asyncio.to_thread(get_password_hash, pw_in.new_password)
+    await write_queue.submit(save_user_fields(user_id, hashed_password=hashed_password))
     return {"status": "ok", "message": "Password reset"}
 
 
@@ -124,21 +124,25 @@ async def reset_user_password(
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
-
-    target_user = session.get(User, user_id)
-    if not target_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if target_user.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
-    if target_user.id == 1:
+    if user_id == 1:
         raise HTTPException(status_code=400, detail="Cannot delete the primary administrator")
 
-    session.delete(target_user)
-    session.commit()
+    def remove(session: Session) -> User:
+        target_user = session.get(User, user_id)
+        if not target_user:
+            raise HTTPException(status_code=404, detail="User not found")
+        # 标签使用统计只属于该用户，随用户一起删除（PostgreSQL 的外键也要求先删这些行）
+        session.execute(delete(UserTagUsage).where(UserTagUsage.user_id == user_id))
+        session.delete(target_user)
+        return target_user
+
+    target_user = await write_queue.submit(remove)
     return {"status": "ok", "message": f"User {target_user.username} deleted"}
 
 
@@ -169,16 +173,24 @@ async def read_user_me(current_user: User = Depends(get_current_user)):
 async def update_user_me(
     user_in: UserUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
-    if user_in.username:
-        current_user.username = user_in.username
-    if user_in.timezone:
-        current_user.timezone = user_in.timezone
-    if user_in.time_offset_mins is not None:
-        current_user.time_offset_mins = user_in.time_offset_mins
-    session.add(current_user)
-    session.commit()
+    def save(session: Session) -> None:
+        user = session.get(User, current_user.id)
+        if user_in.username:
+            user.username = user_in.username
+        local_clock = (user.timezone, user.time_offset_mins)
+        if user_in.timezone:
+            user.timezone = user_in.timezone
+        if user_in.time_offset_mins is not None:
+            user.time_offset_mins = user_in.time_offset_mins
+        session.add(user)
+        # 本地日历口径变化时重算日记的 month_day，与用户设置同一事务提交
+        if (user.timezone, user.time_offset_mins) != local_clock:
+            refresh_user_month_days(session, user)
+            bump_data_version(session, user.id)
+
+    await write_queue.submit(save)
     return {"status": "ok"}
 
 
@@ -186,11 +198,10 @@ async def update_user_me(
 async def update_password(
     pw_in: PasswordUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
-    if not verify_password(pw_in.old_password, current_user.hashed_password):
+    if not await asyncio.to_thread(verify_password, pw_in.old_password, current_user.hashed_password):
         raise HTTPException(400, "Incorrect password")
-    current_user.hashed_password = get_password_hash(pw_in.new_password)
-    session.add(current_user)
-    session.commit()
+    hashed_password = await asyncio.to_thread(get_password_hash, pw_in.new_password)
+    await write_queue.submit(save_user_fields(current_user.id, hashed_password=hashed_password))
     return {"status": "ok"}
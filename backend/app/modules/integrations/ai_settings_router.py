@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 import httpx
 from pydantic import BaseModel
-from sqlmodel import Session
 
 from app.auth import get_current_user
-from app.database import get_session
+from app.database import get_write_queue
 from app.models import User
+from app.modules.identity.helpers.user_fields import save_user_fields
 from app.security import encrypt_data
+from app.write_queue import WriteQueue
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -23,7 +24,7 @@ class AIUpdate(BaseModel):
 async def update_ai(
     ai_in: AIUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     base_url = ai_in.base_url.strip().rstrip("/") if ai_in.base_url else "https://api.openai.com/v1"
     api_key = ai_in.api_key.strip()
@@ -49,13 +50,14 @@ async def update_ai(
                     raise HTTPException(status_code=400, detail=f"AI Authentication failed: {resp.status_code}")
                 print(f"DEBUG: AI verification returned {resp.status_code}, might be ok")
 
-            current_user.ai_provider = provider
-            current_user.ai_base_url = base_url
-            current_user.ai_api_key = encrypt_data(api_key)
-            current_user.ai_model = model
-            current_user.ai_language = language
-            session.add(current_user)
-            session.commit()
+            await write_queue.submit(save_user_fields(
+                current_user.id,
+                ai_provider=provider,
+                ai_base_url=base_url,
+                ai_api_key=encrypt_data(api_key),
+                ai_model=model,
+                ai_language=language,
+            ))
             return {"status": "ok"}
         except httpx.RequestError as e:
             print(f"DEBUG: AI connection error: {str(e)}")
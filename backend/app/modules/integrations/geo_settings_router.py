@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 import httpx
 from pydantic import BaseModel
-from sqlmodel import Session
 
 from app.auth import get_current_user
-from app.database import get_session
+from app.database import get_write_queue
 from app.models import User
+from app.modules.identity.helpers.user_fields import save_user_fields
 from app.security import encrypt_data
+from app.write_queue import WriteQueue
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -20,7 +21,7 @@ class GeoUpdate(BaseModel):
 async def update_geo(
     geo_in: GeoUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     provider = geo_in.provider.strip().lower()
     api_key = geo_in.api_key.strip()
@@ -34,10 +35,7 @@ async def update_geo(
                 )
                 data = resp.json()
                 if data["status"] == "1":
-                    current_user.geo_provider = "amap"
-                    current_user.geo_api_key = encrypt_data(api_key)
-                    session.add(current_user)
-                    session.commit()
+                    await write_queue.submit(save_user_fields(current_user.id, geo_provider="amap", geo_api_key=encrypt_data(api_key)))
                     return {"status": "ok"}
                 raise HTTPException(status_code=400, detail=f"Amap API Error: {data.get('info')}")
             except Exception as e:
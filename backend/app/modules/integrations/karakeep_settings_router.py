@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 import httpx
 from pydantic import BaseModel
-from sqlmodel import Session
 
 from app.auth import get_current_user
-from app.database import get_session
+from app.database import get_write_queue
 from app.models import User
+from app.modules.identity.helpers.user_fields import save_user_fields
 from app.security import encrypt_data
+from app.write_queue import WriteQueue
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -20,7 +21,7 @@ class KarakeepUpdate(BaseModel):
 async def update_karakeep(
     karakeep_in: KarakeepUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     base_url = karakeep_in.url.strip().rstrip("/")
     api_key = karakeep_in.api_key.strip()
@@ -33,10 +34,7 @@ async def update_karakeep(
             resp = await client.get(f"{base_url}/api/v1/bookmarks", headers=headers, params={"limit": 1}, timeout=8.0)
             if resp.status_code == 200 or resp.status_code == 404:
                 print(f"DEBUG: Karakeep verification successful for {current_user.username}")
-                current_user.karakeep_url = base_url
-                current_user.karakeep_api_key = encrypt_data(api_key)
-                session.add(current_user)
-                session.commit()
+                await write_queue.submit(save_user_fields(current_user.id, karakeep_url=base_url, karakeep_api_key=encrypt_data(api_key)))
                 return {"status": "ok"}
 
             print(f"DEBUG: Karakeep failed with status {resp.status_code}: {resp.text}")
@@ -3,8 +3,9 @@
 注意：MediaCrawler 是单任务服务，一次只能运行一个爬虫
 """
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import async_engine, get_async_session
 from app.auth import get_current_user
 from app.models import User, XiaohongshuPost, XiaohongshuImage, BilibiliVideo
 from app.services.crawler_service import crawler_service
@@ -80,9 +81,6 @@ def parse_bili_url(url: str) -> Optional[str]:
 
 async def crawl_xhs_task(note_id: str, user_id: int, xsec_token: Optional[str] = None, original_url: Optional[str] = None, enable_comments: bool = False):
     """后台任务：抓取小红书帖子"""
-    from app.database import engine
-    from sqlmodel import Session as SessionLocal
-    
     # 启动爬虫 - 传递完整 URL 或 note_id
     result = await crawler_service.start_xhs_crawl(note_id, xsec_token, original_url, enable_comments=enable_comments)
     if not result.get("success"):
@@ -118,41 +116,35 @@ async def crawl_xhs_task(note_id: str, user_id: int, xsec_token: Optional[str] =
         return {"status": "failed", "message": "未找到抓取数据，请确认帖子链接有效"}
     
     # 保存到数据库
-    with SessionLocal(engine) as session:
-        result = await crawler_service.process_xhs_data(data, session)
-        return {"status": "completed", "data": result}
+    result = await crawler_service.process_xhs_data(data)
+    return {"status": "completed", "data": result}
 
 
 async def crawl_bili_task(video_id: str, user_id: int, enable_comments: bool = False):
     """后台任务：抓取B站视频"""
-    from app.database import engine
-    from sqlmodel import Session as SessionLocal
-    from app.models import BilibiliVideo
-    
     bvid = video_id if video_id.startswith("BV") else None
     
-    # 先检查数据库中是否已存在
-    with SessionLocal(engine) as session:
-        from sqlmodel import select
+    # 先检查数据库中是否已存在（异步只读会话，不占用写连接）
+    async with AsyncSession(async_engine) as session:
         existing = None
         if bvid:
-            existing = session.exec(
+            existing = (await session.exec(
                 select(BilibiliVideo).where(BilibiliVideo.bvid == bvid)
-            ).first()
+            )).first()
         if not existing:
-            existing = session.exec(
+            existing = (await session.exec(
                 select(BilibiliVideo).where(BilibiliVideo.video_id == video_id)
-            ).first()
-        
-        if existing:
-            return {
-                "status": "completed", 
-                "data": {
-                    "video_id": existing.bvid or existing.video_id,
-                    "title": existing.title,
-                    "existing": True
-                }
+            )).first()
+    
+    if existing:
+        return {
+            "status": "completed", 
+            "data": {
+                "video_id": existing.bvid or existing.video_id,
+                "title": existing.title,
+                "existing": True
             }
+        }
     
     # 启动爬虫
     result = await crawler_service.start_bili_crawl(video_id, enable_comments=enable_comments)
@@ -213,9 +205,8 @@ async def crawl_bili_task(video_id: str, user_id: int, enable_comments: bool = F
         return {"status": "failed", "message": "未找到抓取数据，请确认视频链接有效"}
     
     # 保存到数据库，传递原始 BV 号
-    with SessionLocal(engine) as session:
-        result = await crawler_service.process_bili_data([video_data], session, bvid=bvid)
-        return {"status": "completed", "data": result}
+    result = await crawler_service.process_bili_data([video_data], bvid=bvid)
+    return {"status": "completed", "data": result}
 
 
 @router.get("/check")
@@ -324,19 +315,19 @@ async def crawl_bilibili(
 async def get_xhs_post(
     note_id: str,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """获取小红书帖子数据"""
-    post = session.exec(
+    post = (await session.exec(
         select(XiaohongshuPost).where(XiaohongshuPost.note_id == note_id)
-    ).first()
+    )).first()
     
     if not post:
         raise HTTPException(status_code=404, detail="帖子未找到")
     
-    images = session.exec(
+    images = (await session.exec(
         select(XiaohongshuImage).where(XiaohongshuImage.post_id == post.id).order_by(XiaohongshuImage.image_index)
-    ).all()
+    )).all()
     
     return {
         "note_id": post.note_id,
@@ -376,22 +367,22 @@ async def get_xhs_post(
 async def get_bili_video(
     video_id: str,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """获取B站视频数据"""
     video = None
     
     # 如果是 BV 号，先通过 bvid 查询
     if video_id.startswith("BV"):
-        video = session.exec(
+        video = (await session.exec(
             select(BilibiliVideo).where(BilibiliVideo.bvid == video_id)
-        ).first()
+        )).first()
     
     # 如果没找到，再通过 video_id (avid) 查询
     if not video:
-        video = session.exec(
+        video = (await session.exec(
             select(BilibiliVideo).where(BilibiliVideo.video_id == video_id)
-        ).first()
+        )).first()
     
     if not video:
         raise HTTPException(status_code=404, detail="视频未找到")
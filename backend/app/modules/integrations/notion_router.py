@@ -1,7 +1,5 @@
 """Notion API 代理路由"""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
-from app.database import get_session
 from app.auth import get_current_user
 from app.models import User
 from app.security import decrypt_data
@@ -88,8 +86,7 @@ async def search_pages(
     query: str = "",
     page_size: int = 20,
     start_cursor: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    current_user: User = Depends(get_current_user)
 ):
     """搜索 Notion 页面"""
     if not current_user.notion_api_key:
@@ -147,8 +144,7 @@ async def search_pages(
 @router.get("/page/{page_id}")
 async def get_page(
     page_id: str,
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    current_user: User = Depends(get_current_user)
 ):
     """获取 Notion 页面详情和内容"""
     if not current_user.notion_api_key:
@@ -278,8 +274,7 @@ def parse_block(block: dict) -> NotionBlock:
 @router.get("/block/{block_id}/children")
 async def get_block_children(
     block_id: str,
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    current_user: User = Depends(get_current_user)
 ):
     """获取块的子块（用于嵌套列表等）"""
     if not current_user.notion_api_key:
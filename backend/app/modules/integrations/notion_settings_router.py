@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 import httpx
 from pydantic import BaseModel
-from sqlmodel import Session
 
 from app.auth import get_current_user
-from app.database import get_session
+from app.database import get_write_queue
 from app.models import User
+from app.modules.identity.helpers.user_fields import save_user_fields
 from app.security import encrypt_data
+from app.write_queue import WriteQueue
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -19,7 +20,7 @@ class NotionUpdate(BaseModel):
 async def update_notion(
     notion_in: NotionUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    write_queue: WriteQueue = Depends(get_write_queue),
 ):
     api_key = notion_in.api_key.strip()
     print(f"DEBUG: Verifying Notion API key for {current_user.username}")
@@ -40,9 +41,7 @@ async def update_notion(
 
             if resp.status_code == 200:
                 print(f"DEBUG: Notion verification successful for {current_user.username}")
-                current_user.notion_api_key = encrypt_data(api_key)
-                session.add(current_user)
-                session.commit()
+                await write_queue.submit(save_user_fields(current_user.id, notion_api_key=encrypt_data(api_key)))
                 return {"status": "ok"}
 
             if resp.status_code == 401:
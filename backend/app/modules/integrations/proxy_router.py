@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import httpx
 import uuid
 import os
@@ -11,7 +11,8 @@ from app.auth import get_current_user
 from app.models import User
 from app.security import decrypt_data
 from app.config import settings
-from app.database import get_session
+from app.database import get_async_session
+from app.rate_limit import proxy_limits
 
 router = APIRouter(prefix="/api/proxy/immich", tags=["immich-proxy"])
 
@@ -31,13 +32,13 @@ def generate_asset_signature(asset_id: str, user_id: int = 1) -> str:
 _sig_cache = {}  # type: dict[tuple[str, str], int]
 _user_immich_config_cache = {}  # type: dict[int, tuple[dict | None, str | None, float]]
 
-def verify_asset_signature(asset_id: str, sig: str, session: Session) -> tuple[bool, int | None]:
+async def verify_asset_signature(asset_id: str, sig: str, session: AsyncSession) -> tuple[bool, int | None]:
     """验证资源签名，返回是否有效和用户ID"""
     cache_key = (asset_id, sig)
     if cache_key in _sig_cache:
         return True, _sig_cache[cache_key]
         
-    user_ids = session.exec(select(User.id)).all()
+    user_ids = (await session.exec(select(User.id))).all()
     for uid in user_ids:
         expected = generate_asset_signature(asset_id, uid)
         if hmac.compare_digest(expected, sig):
@@ -47,7 +48,7 @@ def verify_asset_signature(asset_id: str, sig: str, session: Session) -> tuple[b
             return True, uid
     return False, None
 
-def get_immich_proxy_config(user_id: int, session: Session) -> tuple[dict | None, str | None]:
+async def get_immich_proxy_config(user_id: int, session: AsyncSession) -> tuple[dict | None, str | None]:
     """获取并缓存 Immich 的代理配置 (headers, base_url)"""
     now = time.time()
     if user_id in _user_immich_config_cache:
@@ -55,7 +56,7 @@ def get_immich_proxy_config(user_id: int, session: Session) -> tuple[dict | None
         if now < expire_time:
             return headers, base_url
             
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if user:
         headers = get_immich_headers(user)
         base_url = get_immich_base_url(user)
@@ -147,15 +148,16 @@ async def list_immich_assets(page: int = 1, size: int = 50, current_user: User =
 async def proxy_asset(
     asset_id: str, 
     sig: str = Query(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """代理缩略图 - 支持签名验证，无需 Authorization header"""
     # 通过签名验证获取用户
-    valid, user_id = verify_asset_signature(asset_id, sig, session)
+    valid, user_id = await verify_asset_signature(asset_id, sig, session)
     if not valid or not user_id:
         raise HTTPException(403, "Invalid signature")
+    proxy_limits.admit(user_id)
     
-    headers, base_url = get_immich_proxy_config(user_id, session)
+    headers, base_url = await get_immich_proxy_config(user_id, session)
     if not headers or not base_url:
         raise HTTPException(404, "Immich not configured")
     
@@ -165,7 +167,7 @@ async def proxy_asset(
                 async for chunk in response.aiter_bytes():
                     yield chunk
     
-    return StreamingResponse(generate(), media_type="image/webp")
+    return await proxy_limits.stream(user_id, generate(), media_type="image/webp")
 
 
 @router.get("/info/{asset_id}")
@@ -195,14 +197,15 @@ async def get_asset_info(asset_id: str, current_user: User = Depends(get_current
 async def proxy_original(
     asset_id: str,
     sig: str = Query(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """代理原始图片 - 支持签名验证，按需转换为预览图以支持 HEIC 等格式渲染"""
-    valid, user_id = verify_asset_signature(asset_id, sig, session)
+    valid, user_id = await verify_asset_signature(asset_id, sig, session)
     if not valid or not user_id:
         raise HTTPException(403, "Invalid signature")
+    proxy_limits.admit(user_id)
     
-    headers, base_url = get_immich_proxy_config(user_id, session)
+    headers, base_url = await get_immich_proxy_config(user_id, session)
     if not headers or not base_url:
         raise HTTPException(404, "Immich not configured")
 
@@ -236,21 +239,22 @@ async def proxy_original(
                 async for chunk in response.aiter_bytes():
                     yield chunk
     
-    return StreamingResponse(generate(), media_type=media_type)
+    return await proxy_limits.stream(user_id, generate(), media_type=media_type)
 
 
 @router.get("/video/{asset_id}")
 async def proxy_video(
     asset_id: str,
     sig: str = Query(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """代理视频播放流 - 支持签名验证，无需 Authorization header"""
-    valid, user_id = verify_asset_signature(asset_id, sig, session)
+    valid, user_id = await verify_asset_signature(asset_id, sig, session)
     if not valid or not user_id:
         raise HTTPException(403, "Invalid signature")
+    proxy_limits.admit(user_id)
     
-    headers, base_url = get_immich_proxy_config(user_id, session)
+    headers, base_url = await get_immich_proxy_config(user_id, session)
     if not headers or not base_url:
         raise HTTPException(404, "Immich not configured")
     
@@ -260,7 +264,7 @@ async def proxy_video(
                 async for chunk in response.aiter_bytes():
                     yield chunk
     
-    return StreamingResponse(generate(), media_type="video/mp4")
+    return await proxy_limits.stream(user_id, generate(), media_type="video/mp4")
 
 
 @router.post("/import")
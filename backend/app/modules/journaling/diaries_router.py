@@ -1,144 +1,384 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select, and_
-from app.database import get_session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select, and_, col, true, update
+from app.database import engine, get_read_session, get_session, get_write_queue
+from app.write_queue import WriteQueue
 from app.models import Diary, Notebook, Tag, User
-from app.schemas import DiaryCreate, DiaryRead
+from app.schemas import DiaryBulkRequest, DiaryBulkResponse, DiaryBulkResult, DiaryCreate, DiaryPatch, DiaryRead
 from app.auth import get_current_user
-from typing import List
+from app.api.app.cursor import MAX_PAGE_SIZE, diary_keyset_page, set_next_cursor
+from app.api.app.data_version import bump_data_version
+from typing import Any, List, Optional
+from collections import Counter, defaultdict
 from datetime import datetime, timezone
 
-from app.modules.journaling.helpers.content_stats import walk_content
-from app.modules.journaling.helpers.cover_image import resolve_cover_image_url
+from app.modules.journaling.helpers.content_stats import ContentAnalysis, analyze_content, content_digest
+from app.modules.journaling.helpers.cover_image import cache_remote_cover_image, cover_url_for_source, needs_cover_caching
+from app.modules.journaling.helpers.json_patch import JsonPatchError, apply_json_patch
+from app.modules.journaling.helpers.local_dates import local_month_day
+from app.modules.journaling.helpers.tags import apply_tag_usage, normalize_tag_names, sync_tags, tag_usage_deltas
 from app.modules.notebooks.helpers.stats_snapshot import update_stats_snapshot
 
 router = APIRouter(prefix="/api/diaries", tags=["diaries"])
 
-def sync_tags(session: Session, tag_names: List[str]) -> List[Tag]:
-    db_tags = []
-    for name in [n.strip() for n in tag_names if n.strip()]:
-        tag = session.exec(select(Tag).where(Tag.name == name)).first()
-        if not tag:
-            tag = Tag(name=name); session.add(tag); session.flush()
-        db_tags.append(tag)
-    return db_tags
+def cache_diary_cover(diary_id: int, source_url: str, saved_cover_url: Optional[str]) -> None:
+    """后台任务：缓存 / 重新验证远程封面，完成后把日记的 cover_image_url 指向本地缓存"""
+    try:
+        local_url = cache_remote_cover_image(source_url, refresh=True)
+    except Exception as e:
+        print(f"[Cover] Failed to cache {source_url}: {e}")
+        return
+    if not local_url or local_url == saved_cover_url:
+        return
+    with Session(engine) as session:
+        # 仅当封面仍是保存时的值才更新，期间再次编辑过的日记以新内容为准
+        result = session.exec(
+            update(Diary)
+            .where(Diary.id == diary_id, Diary.cover_image_url == saved_cover_url)
+            .values(cover_image_url=local_url)
+        )
+        if result.rowcount:
+            bump_data_version(session, select(Diary.user_id).where(Diary.id == diary_id).scalar_subquery())
+        session.commit()
 
-@router.post("/", response_model=DiaryRead)
-async def create_diary(diary_in: DiaryCreate, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def commit_diary(session: Session, diary: Diary) -> Diary:
+    """
+    提交并保留日记已加载的属性（不 refresh），返回脱离会话的日记：
+    响应序列化与后台任务运行期间都不再占用唯一的写连接，cache_diary_cover 随后就能拿到它
+    """
+    diary.tags  # 序列化需要的关系在提交前加载
+    session.expire_on_commit = False
+    session.commit()
+    session.expunge(diary)
+    return diary
+
+def schedule_cover_caching(background_tasks: BackgroundTasks, diary: Diary, first_image_src: Optional[str]) -> None:
+    source_url = needs_cover_caching(first_image_src)
+    if source_url:
+        background_tasks.add_task(cache_diary_cover, diary.id, source_url, diary.cover_image_url)
+
+class DiaryWriteBatch:
+    """
+    一个事务内若干日记写入的聚合器：
+    笔记本 stats_snapshot 与标签使用次数先累计增减量，flush 时每个笔记本 / 每个用户只写一次，并递增用户的 data_version；
+    标签对象按名称缓存，批量写入预取一次后各篇日记不再查询
+    """
+    
+    def __init__(self, session: Session, user: User):
+        self.session = session
+        self.user = user
+        self.notebook_deltas: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        self.tag_deltas: Counter = Counter()
+        self._tags: dict[str, Tag] = {}
+    
+    def owned_notebook(self, notebook_id: int) -> Optional[Notebook]:
+        notebook = self.session.get(Notebook, notebook_id)
+        return notebook if notebook and notebook.user_id == self.user.id else None
+    
+    def count(self, notebook_id: int, words: int = 0, entries: int = 0) -> None:
+        self.notebook_deltas[notebook_id][0] += words
+        self.notebook_deltas[notebook_id][1] += entries
+    
+    def tags(self, tag_names: List[str]) -> List[Tag]:
+        names = normalize_tag_names(tag_names)
+        missing = [name for name in names if name not in self._tags]
+        if missing:
+            self._tags.update({tag.name: tag for tag in sync_tags(self.session, missing)})
+        return [self._tags[name] for name in names]
+    
+    def flush(self) -> None:
+        for notebook_id, (words, entries) in self.notebook_deltas.items():
+            if words or entries:
+                notebook = self.session.get(Notebook, notebook_id)
+                notebook.stats_snapshot = update_stats_snapshot(notebook.stats_snapshot, words_delta=words, entries_delta=entries)
+                self.session.add(notebook)
+        apply_tag_usage(self.session, self.user.id, self.tag_deltas)
+        bump_data_version(self.session, self.user.id)
+        self.notebook_deltas.clear()
+        self.tag_deltas.clear()
+
+def add_new_diary(batch: DiaryWriteBatch, diary_in: DiaryCreate, analysis: ContentAnalysis) -> Diary:
+    """按已算好的正文分析结果新建日记（不提交），笔记本不属于当前用户时返回 403"""
     # 验证 notebook 归属权
-    notebook = session.get(Notebook, diary_in.notebook_id)
-    if not notebook or notebook.user_id != user.id:
+    if not batch.owned_notebook(diary_in.notebook_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this notebook")
     
-    wc, ic = walk_content(diary_in.content)
     now = datetime.now(timezone.utc)
-    
-    # 明确提取地点信息
-    loc = diary_in.location if diary_in.location else None
-    weather_data = diary_in.stats.get("weather") if diary_in.stats else None
-    
+    date = diary_in.date or now
     db_diary = Diary(
-        notebook_id=diary_in.notebook_id, title=diary_in.title, content=diary_in.content,
-        date=diary_in.date or now, updated_at=now,
-        cover_image_url=resolve_cover_image_url(diary_in.content),
-        word_count=wc, image_count=ic, mood=diary_in.mood,
-        location_snapshot=loc,
-        weather_snapshot=weather_data
+        notebook_id=diary_in.notebook_id, user_id=batch.user.id, title=diary_in.title, content=diary_in.content,
+        content_digest=analysis.digest, content_text=analysis.text,
+        date=date, month_day=local_month_day(date, batch.user.timezone, batch.user.time_offset_mins), updated_at=now,
+        cover_image_url=cover_url_for_source(analysis.first_image_src),
+        word_count=analysis.word_count, image_count=analysis.image_count, mood=diary_in.mood,
+        # 明确提取地点信息
+        location_snapshot=diary_in.location if diary_in.location else None,
+        weather_snapshot=diary_in.stats.get("weather") if diary_in.stats else None
     )
-    if diary_in.tags: db_diary.tags = sync_tags(session, diary_in.tags)
-    session.add(db_diary)
-    notebook.stats_snapshot = update_stats_snapshot(notebook.stats_snapshot, words_delta=wc, entries_delta=1)
-    session.add(notebook)
-    session.commit(); session.refresh(db_diary); return db_diary
+    db_diary.tags = batch.tags(diary_in.tags or [])
+    batch.tag_deltas.update(tag_usage_deltas([], [tag.name for tag in db_diary.tags]))
+    batch.count(diary_in.notebook_id, words=analysis.word_count, entries=1)
+    batch.session.add(db_diary)
+    return db_diary
+
+@router.post("/", response_model=DiaryRead)
+async def create_diary(diary_in: DiaryCreate, background_tasks: BackgroundTasks, user: User = Depends(get_current_user), write_queue: WriteQueue = Depends(get_write_queue)):
+    # 一次遍历得到字数、图片数、首图与摘要；字数与摘要按需计算，先在写任务之外算好
+    analysis = analyze_content(diary_in.content)
+    _ = analysis.word_count, analysis.digest
+    
+    def insert(session: Session) -> Diary:
+        batch = DiaryWriteBatch(session, user)
+        db_diary = add_new_diary(batch, diary_in, analysis)
+        batch.flush()
+        # 提交后对象脱离会话，tags 需在任务内加载
+        session.flush()
+        return db_diary
+    
+    db_diary = await write_queue.submit(insert)
+    schedule_cover_caching(background_tasks, db_diary, analysis.first_image_src)
+    return db_diary
+
+@router.post("/bulk", response_model=DiaryBulkResponse)
+def bulk_diaries(request: DiaryBulkRequest, background_tasks: BackgroundTasks, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    """
+    在一个事务中批量执行 create / update / move / tag / delete（导入、批量移动 / 打标签 / 删除）：
+    涉及的日记（连同标签）与笔记本各用一次 IN 查询预取，标签名一次解析，
+    笔记本统计与标签计数最后按聚合增减量各写一次；任一项失败整批回滚，detail 中带失败项下标
+    """
+    operations = request.operations
+    diary_ids = {op.id for op in operations if op.op != "create" and op.id is not None}
+    diaries = {
+        diary.id: diary
+        for diary in session.exec(
+            select(Diary).where(col(Diary.id).in_(diary_ids), Diary.user_id == user.id).options(selectinload(Diary.tags))
+        ).all()
+    } if diary_ids else {}
+    
+    notebook_ids = {diary.notebook_id for diary in diaries.values()}
+    notebook_ids.update(op.notebook_id for op in operations if op.notebook_id)
+    notebook_ids.update(op.diary.notebook_id for op in operations if op.diary)
+    notebook_ids.update(op.changes.notebook_id for op in operations if op.changes and op.changes.notebook_id)
+    # 载入会话的 identity map，之后的归属校验与统计更新 session.get 不再查询
+    session.exec(select(Notebook).where(col(Notebook.id).in_(notebook_ids))).all()
+    
+    batch = DiaryWriteBatch(session, user)
+    batch.tags([
+        name
+        for op in operations
+        for name in (op.diary.tags if op.diary else []) + ((op.changes.tags or []) if op.changes else []) + op.add_tags
+    ])
+    
+    results: list[tuple[str, Diary]] = []
+    covers: list[tuple[Diary, Optional[str]]] = []
+    for index, op in enumerate(operations):
+        try:
+            if op.op == "create":
+                if op.diary is None:
+                    raise HTTPException(status_code=400, detail="create requires diary")
+                analysis = analyze_content(op.diary.content)
+                diary = add_new_diary(batch, op.diary, analysis)
+                covers.append((diary, analysis.first_image_src))
+            else:
+                diary = diaries.get(op.id)
+                if diary is None:
+                    raise HTTPException(status_code=404, detail="Diary not found")
+                if op.op == "update":
+                    if op.changes is None:
+                        raise HTTPException(status_code=400, detail="update requires changes")
+                    covers.append((diary, apply_diary_changes(batch, diary, patch_changes(diary, op.changes))))
+                elif op.op == "move":
+                    if not op.notebook_id:
+                        raise HTTPException(status_code=400, detail="move requires notebook_id")
+                    apply_diary_changes(batch, diary, {"notebook_id": op.notebook_id})
+                elif op.op == "tag":
+                    removed = set(normalize_tag_names(op.remove_tags))
+                    kept = [tag.name for tag in diary.tags if tag.name not in removed]
+                    apply_diary_changes(batch, diary, {"tags": kept + op.add_tags})
+                else:
+                    remove_diary(batch, diary)
+                    # 之后的操作再引用同一篇按不存在处理
+                    del diaries[op.id]
+            results.append((op.op, diary))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail={"index": index, "detail": e.detail})
+    
+    batch.flush()
+    # flush 后新建日记取得 id；后台任务在响应发出后才运行，提交失败时不会执行
+    session.flush()
+    response = DiaryBulkResponse(results=[DiaryBulkResult(op=op, id=diary.id) for op, diary in results])
+    for diary, first_image_src in covers:
+        schedule_cover_caching(background_tasks, diary, first_image_src)
+    session.commit()
+    return response
 
 # 注意：特定路径路由必须在参数路由 /{diary_id} 之前定义
 @router.get("/recent", response_model=List[DiaryRead])
-def get_recent(limit: int = 5, offset: int = 0, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    """获取最近的日记列表，支持分页"""
-    return session.exec(select(Diary).join(Notebook).where(Notebook.user_id == user.id).order_by(Diary.date.desc()).offset(offset).limit(limit)).all()
+def get_recent(response: Response, limit: int = Query(5, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, offset: int = Query(0, ge=0, deprecated=True), user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
+    """获取最近的日记列表：按 cursor 键集分页，下一页 cursor 在 X-Next-Cursor 响应头中（offset 仅为旧客户端保留）"""
+    statement = select(Diary).where(Diary.user_id == user.id)
+    if offset and not cursor:
+        statement = statement.offset(offset)
+    items, next_cursor = diary_keyset_page(session, statement, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return items
 
 @router.get("/pinned", response_model=List[DiaryRead])
-def get_pinned(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    """获取置顶的日记列表"""
-    return session.exec(select(Diary).join(Notebook).where(and_(Notebook.user_id == user.id, Diary.is_pinned == True)).order_by(Diary.date.desc())).all()
+def get_pinned(response: Response, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
+    """获取置顶的日记列表，按 cursor 键集分页"""
+    items, next_cursor = diary_keyset_page(session, select(Diary).where(and_(Diary.user_id == user.id, Diary.is_pinned == true())), cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return items
 
 @router.get("/last-year-today", response_model=List[DiaryRead])
-def get_last_year(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def get_last_year(user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
     now = datetime.now(timezone.utc)
     s = datetime(now.year - 1, now.month, now.day, 0, 0, 0, tzinfo=timezone.utc)
     e = datetime(now.year - 1, now.month, now.day, 23, 59, 59, tzinfo=timezone.utc)
-    return session.exec(select(Diary).join(Notebook).where(and_(Notebook.user_id == user.id, Diary.date >= s, Diary.date <= e))).all()
+    return session.exec(select(Diary).where(and_(Diary.user_id == user.id, Diary.date >= s, Diary.date <= e))).all()
 
 @router.get("/notebook/{notebook_id}", response_model=List[DiaryRead])
-def list_by_notebook(notebook_id: int, limit: int = 20, offset: int = 0, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    """按日记本列出日记，支持分页"""
+def list_by_notebook(notebook_id: int, response: Response, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, offset: int = Query(0, ge=0, deprecated=True), user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
+    """按日记本列出日记：按 cursor 键集分页，下一页 cursor 在 X-Next-Cursor 响应头中（offset 仅为旧客户端保留）"""
     # 验证用户权限
     notebook = session.get(Notebook, notebook_id)
     if not notebook or notebook.user_id != user.id:
         raise HTTPException(status_code=404, detail="Notebook not found")
-    return session.exec(select(Diary).where(Diary.notebook_id == notebook_id).order_by(Diary.date.desc()).offset(offset).limit(limit)).all()
+    statement = select(Diary).where(Diary.notebook_id == notebook_id)
+    if offset and not cursor:
+        statement = statement.offset(offset)
+    items, next_cursor = diary_keyset_page(session, statement, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return items
 
 # 参数路由必须放在最后
 @router.get("/{diary_id}", response_model=DiaryRead)
-def get_diary(diary_id: int, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def get_diary(diary_id: int, user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
     """获取单个日记详情"""
     diary = session.get(Diary, diary_id)
-    if not diary:
-        raise HTTPException(status_code=404, detail="Diary not found")
-    # 验证用户权限：通过日记本关联检查
-    notebook = session.get(Notebook, diary.notebook_id)
-    if not notebook or notebook.user_id != user.id:
+    if not diary or diary.user_id != user.id:
         raise HTTPException(status_code=404, detail="Diary not found")
     return diary
 
-@router.put("/{diary_id}", response_model=DiaryRead)
-def update_diary(diary_id: int, diary_in: DiaryCreate, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    db_diary = session.get(Diary, diary_id)
-    if not db_diary: raise HTTPException(404)
-    
-    # 验证用户权限
-    old_notebook = session.get(Notebook, db_diary.notebook_id)
-    if not old_notebook or old_notebook.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Diary not found")
-    
+def apply_diary_changes(batch: DiaryWriteBatch, db_diary: Diary, changes: dict[str, Any]) -> Optional[str]:
+    """
+    把字段级变更写入日记并维护派生字段，笔记本统计与标签计数记入 batch（不提交）
+    changes 只处理出现的键：title / content / mood / location / date / weather / tags / notebook_id；
+    正文变化时返回首图地址，供提交后安排封面缓存
+    """
     old_wc = db_diary.word_count
     old_notebook_id = db_diary.notebook_id
-    wc, ic = walk_content(diary_in.content)
+    wc = old_wc
+    first_image_src = None
     
-    db_diary.title = diary_in.title
-    db_diary.content = diary_in.content
-    db_diary.cover_image_url = resolve_cover_image_url(diary_in.content)
-    db_diary.mood = diary_in.mood
-    db_diary.location_snapshot = diary_in.location
+    # 正文摘要不变（只改了标题 / 元数据的自动保存）时跳过字数统计与封面解析，只写普通列
+    if changes.get("content") is not None:
+        digest = content_digest(changes["content"])
+        if digest != db_diary.content_digest:
+            analysis = analyze_content(changes["content"], digest=digest)
+            wc, ic = analysis.word_count, analysis.image_count
+            first_image_src = analysis.first_image_src
+            db_diary.content = changes["content"]
+            db_diary.content_digest = digest
+            db_diary.content_text = analysis.text
+            db_diary.cover_image_url = cover_url_for_source(first_image_src)
+            db_diary.word_count, db_diary.image_count = wc, ic
+    
+    if "title" in changes: db_diary.title = changes["title"]
+    if "mood" in changes: db_diary.mood = changes["mood"]
+    if "location" in changes: db_diary.location_snapshot = changes["location"]
+    if "weather" in changes: db_diary.weather_snapshot = changes["weather"]
+    if changes.get("date"):
+        db_diary.date = changes["date"]
+        db_diary.month_day = local_month_day(db_diary.date, batch.user.timezone, batch.user.time_offset_mins)
     
-    if diary_in.date: db_diary.date = diary_in.date
-    if diary_in.stats and "weather" in diary_in.stats:
-        db_diary.weather_snapshot = diary_in.stats["weather"]
-        
-    db_diary.word_count, db_diary.image_count = wc, ic
     db_diary.updated_at = datetime.now(timezone.utc)
-    if diary_in.tags is not None: db_diary.tags = sync_tags(session, diary_in.tags)
+    db_diary.version += 1
+    if changes.get("tags") is not None:
+        old_tag_names = [tag.name for tag in db_diary.tags]
+        if set(normalize_tag_names(changes["tags"])) != set(old_tag_names):
+            db_diary.tags = batch.tags(changes["tags"])
+            batch.tag_deltas.update(tag_usage_deltas(old_tag_names, [tag.name for tag in db_diary.tags]))
     
-    # 处理 notebook_id 变更
-    new_notebook_id = diary_in.notebook_id
+    # 处理 notebook_id 变更：旧/新笔记本的增减量记入 batch，字数未变且未移动时不写统计
+    new_notebook_id = changes.get("notebook_id")
     if new_notebook_id and new_notebook_id != old_notebook_id:
         # 验证新笔记本存在且属于当前用户
-        new_notebook = session.get(Notebook, new_notebook_id)
-        if not new_notebook or new_notebook.user_id != user.id:
+        if not batch.owned_notebook(new_notebook_id):
             raise HTTPException(status_code=404, detail="Target notebook not found")
-        
-        old_notebook.stats_snapshot = update_stats_snapshot(old_notebook.stats_snapshot, words_delta=-old_wc, entries_delta=-1)
-        session.add(old_notebook)
-        
-        new_notebook.stats_snapshot = update_stats_snapshot(new_notebook.stats_snapshot, words_delta=wc, entries_delta=1)
-        session.add(new_notebook)
-        
-        # 更新日记的 notebook_id
+        batch.count(old_notebook_id, words=-old_wc, entries=-1)
+        batch.count(new_notebook_id, words=wc, entries=1)
         db_diary.notebook_id = new_notebook_id
-    else:
-        old_notebook.stats_snapshot = update_stats_snapshot(old_notebook.stats_snapshot, words_delta=wc - old_wc)
-        session.add(old_notebook)
-        
-    session.add(db_diary); session.commit(); session.refresh(db_diary); return db_diary
+    elif wc != old_wc:
+        batch.count(old_notebook_id, words=wc - old_wc)
+    
+    batch.session.add(db_diary)
+    return first_image_src
+
+def patch_changes(db_diary: Diary, patch: DiaryPatch) -> dict[str, Any]:
+    """校验 PATCH 的 version 并把请求转为 apply_diary_changes 的 changes（content_patch 应用到当前正文）"""
+    if patch.version is not None and patch.version != db_diary.version:
+        raise HTTPException(status_code=409, detail={"message": "Diary has been modified", "version": db_diary.version})
+    
+    changes = patch.model_dump(exclude_unset=True, exclude={"version", "content_patch"})
+    if patch.content_patch is not None:
+        if "content" in changes:
+            raise HTTPException(status_code=400, detail="content and content_patch are mutually exclusive")
+        # 增量基于客户端看到的正文版本，缺少 version 无法保证应用在同一份正文上
+        if patch.version is None:
+            raise HTTPException(status_code=400, detail="content_patch requires version")
+        try:
+            changes["content"] = apply_json_patch(db_diary.content, patch.content_patch)
+        except JsonPatchError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        # 与整篇提交的 content 一致：结果必须仍是 ProseMirror 文档对象，否则写入后每次读取都会校验失败
+        if not isinstance(changes["content"], dict) or changes["content"].get("type") != "doc":
+            raise HTTPException(status_code=422, detail="content_patch must produce a doc object")
+    return changes
+
+def remove_diary(batch: DiaryWriteBatch, diary: Diary) -> None:
+    batch.count(diary.notebook_id, words=-diary.word_count, entries=-1)
+    batch.tag_deltas.update(tag_usage_deltas([tag.name for tag in diary.tags], []))
+    batch.session.delete(diary)
+
+@router.put("/{diary_id}", response_model=DiaryRead)
+def update_diary(diary_id: int, diary_in: DiaryCreate, background_tasks: BackgroundTasks, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    db_diary = session.get(Diary, diary_id)
+    if not db_diary: raise HTTPException(404)
+    
+    # 验证用户权限
+    if db_diary.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Diary not found")
+    
+    # 整篇保存：沿用原语义，日期 / 天气 / 笔记本只在提供时覆盖
+    changes = {
+        "title": diary_in.title, "content": diary_in.content, "mood": diary_in.mood,
+        "location": diary_in.location, "date": diary_in.date, "tags": diary_in.tags,
+        "notebook_id": diary_in.notebook_id,
+    }
+    if diary_in.stats and "weather" in diary_in.stats:
+        changes["weather"] = diary_in.stats["weather"]
+    
+    batch = DiaryWriteBatch(session, user)
+    first_image_src = apply_diary_changes(batch, db_diary, changes)
+    batch.flush()
+    commit_diary(session, db_diary)
+    schedule_cover_caching(background_tasks, db_diary, first_image_src)
+    return db_diary
+
+@router.patch("/{diary_id}", response_model=DiaryRead)
+def patch_diary(diary_id: int, patch: DiaryPatch, background_tasks: BackgroundTasks, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    """字段级更新：只写入请求中出现的字段；携带 version 时做乐观并发校验，正文可用 content_patch 增量提交"""
+    db_diary = session.get(Diary, diary_id, with_for_update=True)
+    if not db_diary or db_diary.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Diary not found")
+    
+    batch = DiaryWriteBatch(session, user)
+    first_image_src = apply_diary_changes(batch, db_diary, patch_changes(db_diary, patch))
+    batch.flush()
+    commit_diary(session, db_diary)
+    schedule_cover_caching(background_tasks, db_diary, first_image_src)
+    return db_diary
 
 @router.post("/{diary_id}/toggle-pin")
 def toggle_pin(diary_id: int, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
@@ -148,15 +388,17 @@ def toggle_pin(diary_id: int, user: User = Depends(get_current_user), session: S
         raise HTTPException(status_code=404, detail="Diary not found")
     
     # 验证用户权限
-    notebook = session.get(Notebook, diary.notebook_id)
-    if not notebook or notebook.user_id != user.id:
+    if diary.user_id != user.id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    diary.is_pinned = not diary.is_pinned
+    is_pinned = diary.is_pinned = not diary.is_pinned
     diary.updated_at = datetime.now(timezone.utc)
+    diary.version += 1
     session.add(diary)
+    bump_data_version(session, user.id)
     session.commit()
-    return {"is_pinned": diary.is_pinned}
+    # 提交后不再读取过期属性，避免重新取出唯一的写连接并占用到依赖清理
+    return {"is_pinned": is_pinned}
 
 @router.delete("/{diary_id}")
 def delete_diary(diary_id: int, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
@@ -164,11 +406,10 @@ def delete_diary(diary_id: int, user: User = Depends(get_current_user), session:
     if not diary:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Diary not found")
     
-    # 验证用户权限：通过笔记本关联检查
-    notebook = session.get(Notebook, diary.notebook_id)
-    if not notebook or notebook.user_id != user.id:
+    # 验证用户权限
+    if diary.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
-    
-    notebook.stats_snapshot = update_stats_snapshot(notebook.stats_snapshot, words_delta=-diary.word_count, entries_delta=-1)
-    session.add(notebook)
-    session.delete(diary); session.commit(); return {"status": "ok"}
+    batch = DiaryWriteBatch(session, user)
+    remove_diary(batch, diary)
+    batch.flush()
+    session.commit(); return {"status": "ok"}
@@ -1,31 +1,96 @@
+import hashlib
+import json
 import re
-from typing import Any
+from functools import cached_property
+from typing import Any, Optional
+
+WORD_PATTERN = re.compile(r"[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af\u20000-\u2fa1f]|[a-zA-Z0-9]+(?:'[a-zA-Z0-9]+)?")
+
+MEDIA_NODE_TYPES = {"image", "video", "audio"}
+LOCAL_MEDIA_PREFIX = "/uploads/"
 
 
 def count_words_cjk(text: str) -> int:
     if not text:
         return 0
-    pattern = re.compile(r"[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af\u20000-\u2fa1f]|[a-zA-Z0-9]+(?:'[a-zA-Z0-9]+)?")
-    return len(pattern.findall(text))
+    return len(WORD_PATTERN.findall(text))
 
 
-def walk_content(content: dict[str, Any]) -> tuple[int, int]:
-    text = ""
+def content_digest(content: dict[str, Any] | None) -> str:
+    """正文的稳定摘要（键排序后 JSON 的 sha256），用于判断保存时正文是否变化"""
+    payload = json.dumps(content or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ContentAnalysis:
+    """
+    analyze_content 的结果
+    word_count / digest 在首次访问时计算并缓存，只需要媒体引用的调用方（如孤儿文件扫描）不付出分词与序列化的开销
+    """
+
+    def __init__(
+        self,
+        content: dict[str, Any] | None,
+        text: str,
+        image_count: int,
+        first_image_src: Optional[str],
+        local_media: set[str],
+    ):
+        self.content = content
+        self.text = text  # 文本节点按文档顺序拼接，可用于检索 / 摘要
+        self.image_count = image_count
+        self.first_image_src = first_image_src
+        self.local_media = local_media  # image / video / audio 引用的 /uploads/ 路径
+
+    @cached_property
+    def word_count(self) -> int:
+        return count_words_cjk(self.text)
+
+    @cached_property
+    def digest(self) -> str:
+        return content_digest(self.content)
+
+
+def analyze_content(content: dict[str, Any] | None, digest: Optional[str] = None) -> ContentAnalysis:
+    """
+    一次迭代遍历 ProseMirror 文档（先序，与递归遍历顺序一致），同时收集全部派生字段：
+    文本、图片数、第一张图、本地媒体引用；已知摘要可通过 digest 传入，避免重复序列化
+    """
+    parts: list[str] = []
     image_count = 0
+    first_image_src: Optional[str] = None
+    local_media: set[str] = set()
+
+    nodes = content.get("content") if isinstance(content, dict) else None
+    stack = list(reversed(nodes)) if isinstance(nodes, list) else []
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+
+        node_type = node.get("type")
+        if node_type == "text":
+            parts.append(node.get("text", ""))
+        elif node_type in MEDIA_NODE_TYPES:
+            attrs = node.get("attrs")
+            src = attrs.get("src") if isinstance(attrs, dict) else None
+            if node_type == "image":
+                image_count += 1
+                if first_image_src is None and isinstance(src, str) and src:
+                    first_image_src = src
+            if isinstance(src, str) and src.startswith(LOCAL_MEDIA_PREFIX):
+                local_media.add(src)
 
-    def rec(node: dict[str, Any]):
-        nonlocal text, image_count
-        if node.get("type") == "text":
-            text += node.get("text", "")
-        elif node.get("type") == "image":
-            image_count += 1
-        for child in node.get("content", []):
-            if isinstance(child, dict):
-                rec(child)
-
-    if "content" in content:
-        for node in content["content"]:
-            if isinstance(node, dict):
-                rec(node)
-
-    return count_words_cjk(text), image_count
+        children = node.get("content")
+        if isinstance(children, list) and children:
+            stack.extend(reversed(children))
+
+    analysis = ContentAnalysis(content, "".join(parts), image_count, first_image_src, local_media)
+    if digest is not None:
+        analysis.digest = digest
+    return analysis
+
+
+def walk_content(content: dict[str, Any]) -> tuple[int, int]:
+    analysis = analyze_content(content)
+    return analysis.word_count, analysis.image_count
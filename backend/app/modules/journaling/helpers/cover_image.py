@@ -1,5 +1,7 @@
 import hashlib
+import json
 import mimetypes
+import time
 from pathlib import Path
 from typing import Any, Optional
 from urllib.parse import urlparse
@@ -7,36 +9,15 @@ from urllib.parse import urlparse
 import httpx
 
 from app.config import settings
+from app.modules.journaling.helpers.content_stats import analyze_content
 
 
 def extract_first_image_src(content: dict[str, Any] | None) -> str | None:
-    if not content or not isinstance(content, dict):
-        return None
-
-    def walk(nodes: list[dict[str, Any]]) -> str | None:
-        for node in nodes:
-            if node.get("type") == "image":
-                src = node.get("attrs", {}).get("src")
-                if isinstance(src, str) and src:
-                    return src
-            children = node.get("content")
-            if isinstance(children, list):
-                nested = walk(children)
-                if nested:
-                    return nested
-        return None
-
-    nodes = content.get("content")
-    if not isinstance(nodes, list):
-        return None
-    return walk(nodes)
+    return analyze_content(content).first_image_src
 
 
 def get_cover_cache_dir() -> Path:
-    sqlite_url = settings.DATABASE_URL
-    db_path = sqlite_url.replace("sqlite:///", "")
-    data_dir = Path(db_path).parent if db_path else Path("data")
-    cache_dir = data_dir / "cover_cache"
+    cache_dir = Path(settings.data_dir) / "cover_cache"
     cache_dir.mkdir(parents=True, exist_ok=True)
     return cache_dir
 
@@ -51,12 +32,71 @@ def infer_extension(source_url: str, content_type: str | None) -> str:
     return suffix if suffix else ".img"
 
 
-def cache_remote_cover_image(source_url: str, cache_dir: Path | None = None) -> str | None:
+def _cover_cache_name(source_url: str) -> str:
+    return hashlib.sha256(source_url.encode()).hexdigest()
+
+
+def find_cached_cover(source_url: str, cache_dir: Path | None = None) -> Path | None:
+    """远程图已缓存时返回缓存文件（文件名为地址哈希，扩展名按响应类型推断）"""
+    cache_dir = cache_dir or get_cover_cache_dir()
+    for path in cache_dir.glob(f"{_cover_cache_name(source_url)}.*"):
+        if path.suffix != ".json":
+            return path
+    return None
+
+
+def _read_validators(sidecar: Path) -> dict[str, Any]:
+    try:
+        return json.loads(sidecar.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_validators(sidecar: Path, headers: Any) -> None:
+    validators = {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+        "checked_at": time.time(),
+    }
+    sidecar.write_text(json.dumps(validators))
+
+
+def cover_cache_is_stale(source_url: str, cache_dir: Path | None = None) -> bool:
+    """缓存文件缺失，或距上次验证超过 COVER_CACHE_MAX_AGE_DAYS"""
+    cache_dir = cache_dir or get_cover_cache_dir()
+    if find_cached_cover(source_url, cache_dir) is None:
+        return True
+    checked_at = _read_validators(cache_dir / f"{_cover_cache_name(source_url)}.json").get("checked_at", 0)
+    return time.time() - checked_at > settings.COVER_CACHE_MAX_AGE_DAYS * 86400
+
+
+def cache_remote_cover_image(source_url: str, cache_dir: Path | None = None, refresh: bool = False) -> str | None:
+    """
+    把远程图缓存到 cover_cache，返回 /cover_cache/ 路径（阻塞网络请求，只在后台任务中调用）
+    已缓存且不要求 refresh 时不发请求；refresh 时带上旁路文件 (<hash>.json) 记录的 ETag / Last-Modified
+    发送条件请求，304 则沿用现有文件
+    """
     if not source_url.startswith(("http://", "https://")):
         return None
 
     cache_dir = cache_dir or get_cover_cache_dir()
-    response = httpx.get(source_url, follow_redirects=True, timeout=5.0)
+    cached = find_cached_cover(source_url, cache_dir)
+    if cached and not refresh:
+        return f"/cover_cache/{cached.name}"
+
+    sidecar = cache_dir / f"{_cover_cache_name(source_url)}.json"
+    headers = {}
+    if cached:
+        validators = _read_validators(sidecar)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = httpx.get(source_url, headers=headers, follow_redirects=True, timeout=5.0)
+    if cached and response.status_code == 304:
+        _write_validators(sidecar, response.headers)
+        return f"/cover_cache/{cached.name}"
     response.raise_for_status()
 
     content_type = response.headers.get("content-type", "")
@@ -64,23 +104,35 @@ def cache_remote_cover_image(source_url: str, cache_dir: Path | None = None) ->
         return None
 
     suffix = infer_extension(source_url, content_type)
-    hashed_name = hashlib.sha256(source_url.encode()).hexdigest()
-    target = cache_dir / f"{hashed_name}{suffix}"
+    target = cache_dir / f"{_cover_cache_name(source_url)}{suffix}"
     target.write_bytes(response.content)
+    if cached and cached != target:
+        cached.unlink(missing_ok=True)
+    _write_validators(sidecar, response.headers)
     return f"/cover_cache/{target.name}"
 
 
-def resolve_cover_image_url(content: dict[str, Any] | None, cache_remote: bool = True) -> Optional[str]:
-    source = extract_first_image_src(content)
+def cover_url_for_source(source: str | None) -> Optional[str]:
+    """
+    保存日记时使用，不发起网络请求：本地图直接返回；远程图已缓存时返回缓存路径，
+    否则先返回原始地址，由 needs_cover_caching 判断是否交给后台任务缓存
+    """
     if not source:
         return None
     if source.startswith("/"):
         return source
     if source.startswith(("http://", "https://")):
-        if cache_remote:
-            try:
-                return cache_remote_cover_image(source)
-            except Exception:
-                return source
+        cached = find_cached_cover(source)
+        return f"/cover_cache/{cached.name}" if cached else source
+    return None
+
+
+def resolve_cover_image_url(content: dict[str, Any] | None) -> Optional[str]:
+    return cover_url_for_source(extract_first_image_src(content))
+
+
+def needs_cover_caching(source: str | None) -> str | None:
+    """首图为远程图且未缓存或缓存已过期时返回其地址"""
+    if source and source.startswith(("http://", "https://")) and cover_cache_is_stale(source):
         return source
     return None
@@ -0,0 +1,109 @@
+"""
+RFC 6902 JSON Patch（add / remove / replace / move / copy / test）
+
+用于 PATCH /api/diaries/{id} 的正文增量更新：客户端只上传变化的节点，
+服务端在当前正文上应用后按整篇正文重新计算派生字段。
+"""
+
+import copy
+from typing import Any
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+def _parse_pointer(pointer: str) -> list[str]:
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _list_index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve(document: Any, tokens: list[str]) -> Any:
+    node = document
+    for token in tokens:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return node
+
+
+def _add(document: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(tokens)}")
+    return document
+
+
+def _remove(document: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, tokens[-1]))
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_json_patch(document: Any, operations: list[dict[str, Any]]) -> Any:
+    """在 document 的副本上依次应用操作并返回结果；任一操作失败抛 JsonPatchError，原文档不变"""
+    result = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise JsonPatchError("Each operation must be an object")
+        op = operation.get("op")
+        tokens = _parse_pointer(operation.get("path"))
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op!r} requires a value")
+        if op == "add":
+            result = _add(result, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(result, tokens)
+        elif op == "replace":
+            _resolve(result, tokens)
+            if tokens:
+                _remove(result, tokens)
+            result = _add(result, tokens, copy.deepcopy(operation["value"]))
+        elif op in ("move", "copy"):
+            from_tokens = _parse_pointer(operation.get("from"))
+            if op == "move":
+                if tokens[: len(from_tokens)] == from_tokens and tokens != from_tokens:
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                value = _remove(result, from_tokens)
+            else:
+                value = copy.deepcopy(_resolve(result, from_tokens))
+            result = _add(result, tokens, value)
+        elif op == "test":
+            if _resolve(result, tokens) != operation["value"]:
+                raise JsonPatchError(f"Test failed at {operation.get('path')}")
+        else:
+            raise JsonPatchError(f"Unsupported operation: {op!r}")
+    return result
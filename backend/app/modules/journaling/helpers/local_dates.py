@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import Diary, User
+
+
+def user_zone(timezone_name: Optional[str]) -> tzinfo:
+    """用户设置的 IANA 时区，无效或为空时按 UTC 处理"""
+    try:
+        return ZoneInfo(timezone_name) if timezone_name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def to_user_local(date: datetime, timezone_name: Optional[str], offset_mins: int = 0) -> datetime:
+    """
+    UTC 时间换算为用户本地的墙上时间（不带时区）：先换到用户时区，再加上时间偏移
+    与前端 useAdjustedTime 的口径一致；数据库里取出的无时区时间按 UTC 处理
+    """
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.astimezone(user_zone(timezone_name)).replace(tzinfo=None) + timedelta(minutes=offset_mins or 0)
+
+
+def local_month_day(date: datetime, timezone_name: Optional[str], offset_mins: int = 0) -> str:
+    """日记在用户本地日历上的月-日（"MM-DD"），即 diary.month_day 的取值"""
+    return to_user_local(date, timezone_name, offset_mins).strftime("%m-%d")
+
+
+def local_day_start(now: datetime, timezone_name: Optional[str], offset_mins: int = 0) -> datetime:
+    """用户本地"今天"零点对应的 UTC 时间"""
+    start = to_user_local(now, timezone_name, offset_mins).replace(hour=0, minute=0, second=0, microsecond=0)
+    start -= timedelta(minutes=offset_mins or 0)
+    return start.replace(tzinfo=user_zone(timezone_name)).astimezone(timezone.utc)
+
+
+def refresh_user_month_days(session: Session, user: User) -> int:
+    """用户修改时区 / 时间偏移后按新口径重算其全部日记的 month_day（按主键批量 UPDATE，不提交），返回变化的条数"""
+    rows = session.exec(select(Diary.id, Diary.date, Diary.month_day).where(Diary.user_id == user.id)).all()
+    params = []
+    for diary_id, date, month_day in rows:
+        new_month_day = local_month_day(date, user.timezone, user.time_offset_mins)
+        if new_month_day != month_day:
+            params.append({"id": diary_id, "month_day": new_month_day})
+    if params:
+        session.execute(update(Diary), params)
+    return len(params)
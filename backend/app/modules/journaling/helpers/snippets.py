@@ -0,0 +1,34 @@
+import re
+from typing import Optional
+
+SNIPPET_RADIUS = 60
+
+
+def search_terms(q: str) -> list[str]:
+    """按空白拆分查询词，大小写不敏感去重"""
+    return list({term.lower(): term for term in q.split()}.values())
+
+
+def build_snippet(text: str, q: Optional[str], radius: int = SNIPPET_RADIUS) -> tuple[str, list[tuple[int, int]]]:
+    """
+    围绕正文中第一个命中的查询词截取约 2 * radius 个字符的片段，
+    返回片段与片段内全部命中区间 [start, end)（大小写不敏感，偏移基于返回的片段）；
+    正文没有命中（只命中标题 / 日记本名）时返回开头片段、不带高亮
+    """
+    terms = search_terms(q or "")
+    # 长词优先，避免短词抢先匹配长词的前缀
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE) if terms else None
+
+    first = pattern.search(text) if pattern else None
+    start = max(0, first.start() - radius) if first else 0
+    end = min(len(text), start + 2 * radius)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    snippet = f"{prefix}{text[start:end]}{suffix}"
+
+    highlights = (
+        [(match.start() + len(prefix), match.end() + len(prefix)) for match in pattern.finditer(text[start:end])]
+        if pattern
+        else []
+    )
+    return snippet, highlights
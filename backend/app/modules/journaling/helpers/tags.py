@@ -0,0 +1,81 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, List, Mapping
+
+from sqlmodel import Session, col, delete, select, update
+
+from app.models import Tag, UserTagUsage
+from app.sql_expressions import dialect_insert
+
+
+def normalize_tag_names(tag_names: List[str]) -> List[str]:
+    """去掉首尾空白与空标签，按首次出现顺序去重"""
+    return list(dict.fromkeys(name.strip() for name in tag_names if name and name.strip()))
+
+
+def sync_tags(session: Session, tag_names: List[str]) -> List[Tag]:
+    """
+    把标签名解析为 Tag 对象，查询次数与标签数量无关：
+    一次 IN 查询取已有标签；缺失的批量 INSERT ... ON CONFLICT DO NOTHING（并发创建同名标签时不报错），再查回一次
+    """
+    names = normalize_tag_names(tag_names)
+    if not names:
+        return []
+
+    tags = {tag.name: tag for tag in session.exec(select(Tag).where(col(Tag.name).in_(names))).all()}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        session.execute(dialect_insert(session, Tag).values([{"name": name} for name in missing]).on_conflict_do_nothing())
+        tags.update({tag.name: tag for tag in session.exec(select(Tag).where(col(Tag.name).in_(missing))).all()})
+    return [tags[name] for name in names]
+
+
+def tag_key(name: str) -> str:
+    """标签补全的匹配键：不区分大小写"""
+    return name.lower()
+
+
+def tag_usage_deltas(old_names: Iterable[str], new_names: Iterable[str]) -> Counter:
+    """单篇日记标签从 old_names 变为 new_names 时的使用次数增减"""
+    deltas = Counter(set(new_names))
+    deltas.subtract(set(old_names))
+    return deltas
+
+
+def apply_tag_usage(session: Session, user_id: int, deltas: Mapping[str, int]) -> None:
+    """
+    按增减量维护 UserTagUsage：
+    增加的标签 upsert 累加次数并刷新 last_used；减少的标签扣减次数，归零的行删除
+    """
+    now = datetime.now(timezone.utc)
+    increments = {name: delta for name, delta in deltas.items() if delta > 0}
+    decrements = {name: delta for name, delta in deltas.items() if delta < 0}
+
+    if increments:
+        statement = dialect_insert(session, UserTagUsage).values(
+            [
+                {"user_id": user_id, "tag": name, "tag_key": tag_key(name), "count": delta, "last_used": now}
+                for name, delta in increments.items()
+            ]
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "tag"],
+                set_={"count": UserTagUsage.count + statement.excluded.count, "last_used": statement.excluded.last_used},
+            )
+        )
+
+    if decrements:
+        # 同一增减量的标签合并为一条 UPDATE（单篇日记的保存 / 删除只有 -1 一组）
+        for delta in set(decrements.values()):
+            names = [name for name, value in decrements.items() if value == delta]
+            session.execute(
+                update(UserTagUsage)
+                .where(UserTagUsage.user_id == user_id, col(UserTagUsage.tag).in_(names))
+                .values(count=UserTagUsage.count + delta)
+            )
+        session.execute(
+            delete(UserTagUsage).where(
+                UserTagUsage.user_id == user_id, col(UserTagUsage.tag).in_(list(decrements)), UserTagUsage.count <= 0
+            )
+        )
@@ -1,19 +1,33 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session, col, select
 
 from app.auth import get_current_user
-from app.database import get_session
-from app.models import Tag, User
+from app.database import get_read_session
+from app.models import User, UserTagUsage
+from app.modules.journaling.helpers.tags import tag_key
 
 router = APIRouter(prefix="/api/tags", tags=["tags"])
 
 
 @router.get("/", response_model=List[str])
-def list_tags(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    """获取用户使用过的所有标签名（去重）"""
-    # 简单实现：由于 Tag 目前是全局的，我们可以通过日记本关联来筛选
-    # 但为了高效，我们直接返回所有标签名
-    tags = session.exec(select(Tag.name)).all()
-    return sorted(list(set(tags)))
+def list_tags(
+    q: Optional[str] = Query(None, description="标签名前缀"),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_read_session),
+):
+    """当前用户使用过的标签名，按使用次数、最近使用时间排序；q 为前缀匹配（不区分大小写）"""
+    statement = select(UserTagUsage.tag).where(UserTagUsage.user_id == current_user.id)
+    prefix = tag_key((q or "").strip())
+    if prefix:
+        # 在小写键上用区间而非 LIKE，SQLite / PostgreSQL 都能直接走 (user_id, tag_key) 索引
+        statement = statement.where(
+            col(UserTagUsage.tag_key) >= prefix, col(UserTagUsage.tag_key) < prefix + "\U0010ffff"
+        )
+    statement = statement.order_by(
+        col(UserTagUsage.count).desc(), col(UserTagUsage.last_used).desc(), col(UserTagUsage.tag)
+    ).offset(offset).limit(limit)
+    return session.exec(statement).all()
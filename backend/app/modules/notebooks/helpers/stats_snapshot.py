@@ -1,8 +1,62 @@
 from typing import Any
 
+from sqlmodel import Session, col, func, select, update
+
+from app.api.app.data_version import bump_data_version
+from app.models import Diary, Notebook
+
 
 def update_stats_snapshot(snapshot: dict[str, Any], words_delta: int = 0, entries_delta: int = 0) -> dict[str, Any]:
     updated = dict(snapshot)
     updated["total_words"] = max(0, updated.get("total_words", 0) + words_delta)
     updated["total_entries"] = max(0, updated.get("total_entries", 0) + entries_delta)
     return updated
+
+
+def reconcile_stats_snapshots(session: Session, batch_size: int = 500) -> dict[str, int]:
+    """
+    按实际日记重算 notebook.stats_snapshot，纠正增量维护累积的偏差（导入、绕过写路径的写入等）
+    按 id 分批：每批一次 GROUP BY 聚合，只写回有偏差的笔记本，每批单独提交以缩短写锁持有时间；
+    返回扫描的笔记本数、纠正数与纠正的字数 / 篇数偏差（绝对值之和）
+    """
+    result = {"notebooks": 0, "corrected": 0, "words_drift": 0, "entries_drift": 0}
+    last_id = 0
+    while True:
+        # PostgreSQL 上锁住本批笔记本，避免与并发的增量更新交错；SQLite 的唯一写连接本身已串行化
+        notebooks = session.exec(
+            select(Notebook.id, Notebook.stats_snapshot, Notebook.user_id)
+            .where(Notebook.id > last_id)
+            .order_by(Notebook.id)
+            .limit(batch_size)
+            .with_for_update()
+        ).all()
+        if not notebooks:
+            break
+        last_id = notebooks[-1][0]
+
+        actual = {
+            notebook_id: (words, entries)
+            for notebook_id, words, entries in session.exec(
+                select(Diary.notebook_id, func.coalesce(func.sum(Diary.word_count), 0), func.count())
+                .where(col(Diary.notebook_id).in_([notebook_id for notebook_id, _, _ in notebooks]))
+                .group_by(Diary.notebook_id)
+            ).all()
+        }
+        for notebook_id, snapshot, user_id in notebooks:
+            snapshot = snapshot or {}
+            words, entries = actual.get(notebook_id, (0, 0))
+            words_drift = abs(snapshot.get("total_words", 0) - words)
+            entries_drift = abs(snapshot.get("total_entries", 0) - entries)
+            if words_drift or entries_drift:
+                session.exec(
+                    update(Notebook)
+                    .where(Notebook.id == notebook_id)
+                    .values(stats_snapshot={**snapshot, "total_words": words, "total_entries": entries})
+                )
+                bump_data_version(session, user_id)
+                result["corrected"] += 1
+                result["words_drift"] += words_drift
+                result["entries_drift"] += entries_drift
+        result["notebooks"] += len(notebooks)
+        session.commit()
+    return result
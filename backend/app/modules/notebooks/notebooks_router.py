@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.database import get_session
-from app.models import Notebook, User, Diary
+from sqlmodel import Session, col, delete, func, or_, select
+from app.database import get_read_session, get_session
+from app.models import Notebook, User, Diary, DiaryTagLink, ShareToken, Tag
 from app.schemas import NotebookCreate, NotebookRead
 from app.auth import get_current_user
 from typing import List
 from datetime import datetime
 
+from app.api.app.data_version import bump_data_version
+from app.modules.journaling.helpers.tags import apply_tag_usage
 from app.modules.notebooks.helpers.default_cover import build_default_cover
 
 router = APIRouter(prefix="/api/notebooks", tags=["notebooks"])
@@ -22,6 +24,7 @@ def create_notebook(notebook_in: NotebookCreate, current_user: User = Depends(ge
         updated_at=datetime.utcnow()
     )
     session.add(db_notebook)
+    bump_data_version(session, current_user.id)
     session.commit()
     session.refresh(db_notebook)
     return db_notebook
@@ -39,27 +42,42 @@ def update_notebook(notebook_id: int, notebook_in: NotebookCreate, current_user:
         db_notebook.cover_url = notebook_in.cover_url
         
     session.add(db_notebook)
+    bump_data_version(session, current_user.id)
     session.commit()
     session.refresh(db_notebook)
     return db_notebook
 
 @router.delete("/{notebook_id}")
 def delete_notebook(notebook_id: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    db_notebook = session.exec(select(Notebook).where(Notebook.id == notebook_id, Notebook.user_id == current_user.id)).first()
-    if not db_notebook:
+    """
+    删除日记本及其日记：按 notebook_id 的集合语句在同一事务内删除标签关联、分享、日记与日记本，不把日记正文读进内存
+    日记引用的 /uploads/ 媒体不在这里删除，失去引用后由孤儿文件扫描（/api/system/orphan-files）发现并清理
+    """
+    if not session.exec(select(Notebook.id).where(Notebook.id == notebook_id, Notebook.user_id == current_user.id)).first():
         raise HTTPException(status_code=404, detail="Notebook not found")
     
-    # 级联删除日记
-    diaries = session.exec(select(Diary).where(Diary.notebook_id == notebook_id)).all()
-    for diary in diaries:
-        session.delete(diary)
-        
-    session.delete(db_notebook)
+    # 扣减被删除日记上的标签使用次数
+    tag_counts = session.exec(
+        select(Tag.name, func.count())
+        .join(DiaryTagLink, DiaryTagLink.tag_id == Tag.id)
+        .join(Diary, Diary.id == DiaryTagLink.diary_id)
+        .where(Diary.notebook_id == notebook_id)
+        .group_by(Tag.name)
+    ).all()
+    apply_tag_usage(session, current_user.id, {name: -count for name, count in tag_counts})
+
+    # 先删引用日记的行，再删日记与日记本（开启外键约束时顺序有意义）
+    diary_ids = select(Diary.id).where(Diary.notebook_id == notebook_id)
+    session.exec(delete(DiaryTagLink).where(col(DiaryTagLink.diary_id).in_(diary_ids)))
+    session.exec(delete(ShareToken).where(or_(col(ShareToken.diary_id).in_(diary_ids), ShareToken.notebook_id == notebook_id)))
+    session.exec(delete(Diary).where(Diary.notebook_id == notebook_id))
+    session.exec(delete(Notebook).where(Notebook.id == notebook_id))
+    bump_data_version(session, current_user.id)
     session.commit()
     return {"status": "ok"}
 
 @router.get("/{notebook_id}", response_model=NotebookRead)
-def get_notebook(notebook_id: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def get_notebook(notebook_id: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
     """获取单个日记本详情"""
     db_notebook = session.exec(select(Notebook).where(Notebook.id == notebook_id, Notebook.user_id == current_user.id)).first()
     if not db_notebook:
@@ -67,7 +85,7 @@ def get_notebook(notebook_id: int, current_user: User = Depends(get_current_user
     return db_notebook
 
 @router.get("/", response_model=List[NotebookRead])
-def list_notebooks(limit: int = 50, offset: int = 0, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def list_notebooks(limit: int = 50, offset: int = 0, current_user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
     """列出用户的日记本，支持分页"""
     return session.exec(select(Notebook).where(Notebook.user_id == current_user.id).order_by(Notebook.updated_at.desc()).offset(offset).limit(limit)).all()
 
@@ -98,6 +116,7 @@ def ensure_draft_notebook(current_user: User = Depends(get_current_user), sessio
         updated_at=datetime.utcnow()
     )
     session.add(draft_notebook)
+    bump_data_version(session, current_user.id)
     session.commit()
     session.refresh(draft_notebook)
     return draft_notebook
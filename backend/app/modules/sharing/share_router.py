@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session, select
 from datetime import datetime, timezone, timedelta
-from typing import List
-from app.database import get_session
+from typing import List, Optional
+from app.config import settings
+from app.database import get_read_session, get_session
 from app.models import ShareToken, Diary, Notebook, User
 from app.schemas import ShareCreate, ShareUpdate, ShareRead, SharePublicRead, DiaryRead, NotebookRead
 from app.auth import get_current_user
+from app.api.app.cursor import NEXT_CURSOR_HEADER, diary_keyset_page
+from app.api.app.data_version import bump_data_version
+from app.api.app.public_share import PublicShareView, public_share_view, share_resolution_cache
 
 router = APIRouter(prefix="/api/share", tags=["share"])
 
@@ -60,8 +64,7 @@ def create_share(
         diary = session.get(Diary, share_in.diary_id)
         if not diary:
             raise HTTPException(status_code=404, detail="Diary not found")
-        notebook = session.get(Notebook, diary.notebook_id)
-        if not notebook or notebook.user_id != user.id:
+        if diary.user_id != user.id:
             raise HTTPException(status_code=403, detail="Access denied")
     
     if share_in.notebook_id:
@@ -82,6 +85,7 @@ def create_share(
         expires_at=expires_at
     )
     session.add(share)
+    bump_data_version(session, user.id)
     session.commit()
     session.refresh(share)
     
@@ -91,7 +95,7 @@ def create_share(
 @router.get("/", response_model=List[ShareRead])
 def list_shares(
     user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ):
     """获取当前用户的所有活跃分享"""
     shares = session.exec(
@@ -130,7 +134,9 @@ def update_share(
         share.expires_at = None
     
     session.add(share)
+    bump_data_version(session, user.id)
     session.commit()
+    share_resolution_cache.invalidate(share.token)
     session.refresh(share)
     
     return build_share_read(share, session)
@@ -152,40 +158,43 @@ def delete_share(
     
     share.is_active = False
     session.add(share)
+    bump_data_version(session, user.id)
     session.commit()
+    share_resolution_cache.invalidate(share.token)
     return {"status": "ok"}
 
 
 @router.get("/{token}", response_model=SharePublicRead)
 def get_shared_content(
-    token: str,
-    session: Session = Depends(get_session)
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    view: PublicShareView = Depends(public_share_view),
+    session: Session = Depends(get_read_session)
 ):
-    """通过 token 获取分享内容（公开访问，无需登录）"""
-    share = session.exec(
-        select(ShareToken).where(ShareToken.token == token, ShareToken.is_active == True)
-    ).first()
-    
-    if not share:
-        raise HTTPException(status_code=404, detail="Share not found or expired")
-    
-    # 检查是否过期
-    if share.expires_at:
-        # 处理时区问题：如果 expires_at 是 naive datetime，先转为 aware
-        expires_at = share.expires_at
-        if expires_at.tzinfo is None:
-            # 假设存储的是 UTC 时间
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-        if expires_at < datetime.now(timezone.utc):
-            raise HTTPException(status_code=410, detail="Share link has expired")
+    """
+    通过 token 获取分享内容（公开访问，无需登录）
+    笔记本分享按 cursor 分页，单页不超过 PUBLIC_SHARE_PAGE_SIZE；下一页 cursor 在 next_cursor 与 X-Next-Cursor 响应头中
+    token 解析与渲染结果都有缓存，分享者数据未变时不再查询日记
+    """
+    # 分页参数只对笔记本分享有意义，日记分享不让它们进入缓存键
+    share = view.share
+    page_size = min(limit or settings.PUBLIC_SHARE_PAGE_SIZE, settings.PUBLIC_SHARE_PAGE_SIZE)
+    if share.notebook_id:
+        view.page(cursor, page_size)
+    else:
+        view.page()
+    if (cached := view.hit()) is not None:
+        return cached
     
     result = SharePublicRead(share_type="")
+    headers = {}
     
     if share.diary_id:
         diary = session.get(Diary, share.diary_id)
         if not diary:
             raise HTTPException(status_code=404, detail="Diary not found")
         result.share_type = "diary"
+        # 与既有匿名载荷保持同一字段集：model_dump 不含关系，tags 始终为空，标签不对外公开
         result.diary = DiaryRead.model_validate(diary.model_dump())
     
     elif share.notebook_id:
@@ -193,13 +202,19 @@ def get_shared_content(
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
         
-        # 获取笔记本内所有日记
-        diaries = session.exec(
-            select(Diary).where(Diary.notebook_id == share.notebook_id).order_by(Diary.date.desc())
-        ).all()
+        # 匿名请求只取一页，不把整个笔记本读进内存
+        diaries, next_cursor = diary_keyset_page(
+            session,
+            select(Diary).where(Diary.notebook_id == share.notebook_id),
+            cursor,
+            page_size,
+        )
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
         
         result.share_type = "notebook"
         result.notebook = NotebookRead.model_validate(notebook.model_dump())
         result.diaries = [DiaryRead.model_validate(d.model_dump()) for d in diaries]
+        result.next_cursor = next_cursor
     
-    return result
+    return view.store(result, headers)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import re
 import shutil
@@ -11,13 +12,15 @@ from sqlmodel import Session, select
 
 from app.auth import get_current_user
 from app.config import settings
-from app.database import engine, get_session
+from app.database import dispose_engines, engine, get_read_session
+from app.migrations import run_migrations
 from app.models import BilibiliVideo, Diary, Notebook, User, UserRole, XiaohongshuImage
+from app.modules.journaling.helpers.content_stats import analyze_content
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
-sqlite_file_path = settings.DATABASE_URL.replace("sqlite:///", "")
-backup_dir = os.path.join(os.path.dirname(sqlite_file_path), "backups")
+sqlite_file_path = settings.sqlite_path
+backup_dir = os.path.join(settings.data_dir, "backups")
 os.makedirs(backup_dir, exist_ok=True)
 
 EXCLUDE_URL_PATTERNS = [
@@ -44,29 +47,15 @@ def is_excluded_url(url: str) -> bool:
 
 
 def extract_local_paths_from_content(content: dict) -> set[str]:
-    paths: set[str] = set()
-
-    def extract_from_node(node: dict):
-        if not isinstance(node, dict):
-            return
-        if node.get("type") in ["image", "video", "audio"]:
-            src = node.get("attrs", {}).get("src", "")
-            if src and src.startswith("/uploads/"):
-                paths.add(src)
-        content_list = node.get("content", [])
-        if isinstance(content_list, list):
-            for child in content_list:
-                extract_from_node(child)
-
-    if isinstance(content, dict):
-        extract_from_node(content)
-    return paths
+    return analyze_content(content).local_media
 
 
 @router.get("/system/export")
 async def export_db(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(403)
+    if not settings.is_sqlite:
+        raise HTTPException(400, "Database export is only available for SQLite")
     if not os.path.exists(sqlite_file_path):
         raise HTTPException(404, "Database file not found")
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -77,6 +66,8 @@ async def export_db(current_user: User = Depends(get_current_user)):
 async def import_db(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(403)
+    if not settings.is_sqlite:
+        raise HTTPException(400, "Database import is only available for SQLite")
     if not file.filename or not file.filename.endswith(".db"):
         raise HTTPException(400, "Invalid file type. Must be .db file")
 
@@ -92,7 +83,7 @@ async def import_db(file: UploadFile = File(...), current_user: User = Depends(g
         shutil.copy(sqlite_file_path, backup_path)
         cleanup_old_backups("pre_import_", max_count=3)
 
-    engine.dispose()
+    await dispose_engines()
     for suffix in ["", "-wal", "-shm"]:
         path = sqlite_file_path + suffix
         if os.path.exists(path):
@@ -101,15 +92,20 @@ async def import_db(file: UploadFile = File(...), current_user: User = Depends(g
     with open(sqlite_file_path, "wb") as f:
         f.write(content)
 
+    # 导入的备份可能来自旧版本，立即补齐结构与数据迁移（如 diary.user_id 回填）；
+    # 迁移是同步的写库操作，放到线程中执行以免阻塞事件循环
+    await asyncio.to_thread(run_migrations, engine)
+
     return {"status": "success", "backup": backup_path}
 
 
+# 同步处理函数：遍历磁盘与全表读取都在线程池中进行，不阻塞事件循环
 @router.get("/system/orphan-files")
-async def get_orphan_files(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def get_orphan_files(current_user: User = Depends(get_current_user), session: Session = Depends(get_read_session)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(403, "Admin only")
 
-    data_dir = os.path.dirname(sqlite_file_path)
+    data_dir = settings.data_dir
     uploads_dir = os.path.join(data_dir, "uploads")
     xhs_dir = os.path.join(data_dir, "xhs")
     bilibili_dir = os.path.join(data_dir, "bilibili")
@@ -177,13 +173,11 @@ class OrphanFilesDelete(BaseModel):
 async def delete_orphan_files(
     data: OrphanFilesDelete,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
 ):
-    del session
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(403, "Admin only")
 
-    data_dir = os.path.dirname(sqlite_file_path)
+    data_dir = settings.data_dir
     deleted = []
     failed = []
 
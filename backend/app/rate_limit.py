@@ -0,0 +1,247 @@
+"""
+匿名接口限流
+
+- 公开分享（/api/share/{token}、/api/app/public/shares/*）不需要登录，单个爬虫就能占满 SQLite 读连接：
+  RateLimitMiddleware 按客户端 IP 与分享 token 各一个令牌桶，预算按“每分钟请求数”配置，
+  桶容量为一分钟预算的 1/4（允许短时突发），耗尽时返回 429 与 Retry-After
+- 签名访问的 Immich 代理流（/api/proxy/immich/asset|original|video）同时服务于登录用户自己的编辑器 / 选图器
+  与公开分享页里的图片，请求本身无法区分二者：RateLimitMiddleware 先按客户端 IP 与 asset 各一个宽松的令牌桶
+  限流（在验证签名之前，伪造签名的请求同样被计数），OwnerStreamLimits 再在代理路由验证签名之后，
+  按签名所属用户计算预算与并发名额，一个用户的分享被刷只会限制该用户自己的代理流
+"""
+
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+# 跟踪的令牌桶数量上限，超出时淘汰最久未使用的
+MAX_TRACKED_BUCKETS = 10000
+
+
+class TokenBuckets:
+    """按键的令牌桶集合（LRU 淘汰）：per_minute 为每分钟补充的令牌数，capacity 为桶容量"""
+
+    def __init__(self, max_entries: int = MAX_TRACKED_BUCKETS):
+        self.max_entries = max_entries
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, per_minute: int, capacity: float) -> float:
+        """取一个令牌：成功返回 0，否则返回还需等待的秒数（不扣减）"""
+        return self.take_all([(key, per_minute, capacity)])
+
+    def take_all(self, budgets: list[tuple[str, int, float]]) -> float:
+        """
+        在同一把锁内先检查 (key, per_minute, capacity) 中的每个桶，全部有令牌时才各扣一个并返回 0；
+        任一桶不足时都不扣减，返回最长的等待秒数（被拒绝的请求不会消耗其他桶的预算）
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key, per_minute, capacity in budgets:
+                tokens, updated = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated) * per_minute / 60)
+                levels.append((key, tokens))
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / (per_minute / 60))
+            for key, tokens in levels:
+                self._buckets[key] = (tokens if wait > 0 else tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """一类匿名路由：path 的 key 分组作为第二个令牌桶的键"""
+
+    name: str
+    path: re.Pattern
+    per_ip: int
+    per_key: int
+
+
+def default_rules() -> list[RateLimitRule]:
+    return [
+        RateLimitRule(
+            "share",
+            re.compile(r"^/api/(?:share|app/public/shares)/(?P<key>[^/]+)(?:/entries)?$"),
+            settings.RATE_LIMIT_SHARE_PER_IP,
+            settings.RATE_LIMIT_SHARE_PER_TOKEN,
+        ),
+        RateLimitRule(
+            "proxy",
+            re.compile(r"^/api/proxy/immich/(?:asset|original|video)/(?P<key>[^/]+)$"),
+            settings.RATE_LIMIT_PROXY_PER_IP,
+            settings.RATE_LIMIT_PROXY_PER_ASSET,
+        ),
+    ]
+
+
+def _capacity(per_minute: int) -> float:
+    return max(1.0, per_minute / 4)
+
+
+def trusted_proxies_from_settings() -> frozenset[str]:
+    return frozenset(ip.strip() for ip in settings.RATE_LIMIT_TRUSTED_PROXIES.split(",") if ip.strip())
+
+
+def client_ip(scope: Scope, trusted_proxies: frozenset[str]) -> str:
+    """
+    客户端 IP：直连地址是受信任的反向代理时，取 X-Forwarded-For 中最右侧的非代理地址
+    （更左侧的条目可由客户端伪造）；uvicorn 已按 --forwarded-allow-ips 改写过 client 时两者结果一致
+    """
+    client = scope.get("client")
+    ip = client[0] if client else "-"
+    if ip not in trusted_proxies:
+        return ip
+    forwarded = [
+        value.decode("latin-1") for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+    ]
+    for hop in reversed(",".join(forwarded).split(",")):
+        hop = hop.strip()
+        if hop and hop not in trusted_proxies:
+            return hop
+    return ip
+
+
+def too_many_requests(wait: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Too many requests"},
+        status_code=429,
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
+
+class RateLimitMiddleware:
+    """匹配规则的 GET / HEAD 请求先过令牌桶；rules 默认取自 Settings"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Optional[list[RateLimitRule]] = None,
+        trusted_proxies: Optional[frozenset[str]] = None,
+    ):
+        self.app = app
+        self.rules = default_rules() if rules is None else rules
+        self.trusted_proxies = trusted_proxies_from_settings() if trusted_proxies is None else trusted_proxies
+        self.buckets = TokenBuckets()
+
+    def _match(self, scope: Scope) -> Optional[tuple[RateLimitRule, re.Match]]:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return None
+        for rule in self.rules:
+            match = rule.path.match(scope["path"])
+            if match:
+                return rule, match
+        return None
+
+    def _wait_seconds(self, rule: RateLimitRule, match: re.Match, scope: Scope) -> float:
+        budgets = [(f"{rule.name}:ip:{client_ip(scope, self.trusted_proxies)}", rule.per_ip)]
+        key = match.group("key")
+        if key:
+            budgets.append((f"{rule.name}:key:{key}", rule.per_key))
+        return self.buckets.take_all([
+            (bucket_key, per_minute, _capacity(per_minute)) for bucket_key, per_minute in budgets if per_minute > 0
+        ])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        matched = self._match(scope) if settings.RATE_LIMIT_ENABLED else None
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+
+        rule, match = matched
+        wait = self._wait_seconds(rule, match, scope)
+        if wait > 0:
+            await too_many_requests(wait)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def _rate_limited(wait: float) -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """发送完毕（或客户端断开、发送出错）后归还并发名额的流式响应"""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+class OwnerStreamLimits:
+    """
+    Immich 代理流按签名所属用户限流：admit() 扣该用户的令牌桶，stream() 取该用户的并发名额
+    名额一直占用到响应体发送完毕，拿不到时最多排队 queue_seconds 秒；超出预算或排队超时抛出 429
+    """
+
+    def __init__(
+        self,
+        per_owner: Optional[int] = None,
+        max_streams: Optional[int] = None,
+        queue_seconds: Optional[float] = None,
+    ):
+        self.per_owner = settings.RATE_LIMIT_PROXY_PER_OWNER if per_owner is None else per_owner
+        self.max_streams = settings.PROXY_STREAM_CONCURRENCY if max_streams is None else max_streams
+        self.queue_seconds = settings.PROXY_STREAM_QUEUE_SECONDS if queue_seconds is None else queue_seconds
+        self.buckets = TokenBuckets()
+        self._slots: dict[int, asyncio.Semaphore] = {}
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _owner_slots(self, owner_id: int) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            # 首次使用或事件循环已更换（如测试中多个 TestClient）时重建
+            self._slots = {}
+            self._slots_loop = loop
+        slots = self._slots.get(owner_id)
+        if slots is None:
+            slots = self._slots[owner_id] = asyncio.Semaphore(self.max_streams)
+        return slots
+
+    def admit(self, owner_id: int) -> None:
+        """在请求上游之前调用，超出该用户的每分钟预算时抛出 429"""
+        if not settings.RATE_LIMIT_ENABLED or self.per_owner <= 0:
+            return
+        wait = self.buckets.take(f"proxy:owner:{owner_id}", self.per_owner, _capacity(self.per_owner))
+        if wait > 0:
+            raise _rate_limited(wait)
+
+    async def stream(self, owner_id: int, content, media_type: str) -> StreamingResponse:
+        """取得该用户的并发名额后返回流式响应，名额随响应发送完毕归还"""
+        if not settings.RATE_LIMIT_ENABLED or self.max_streams <= 0:
+            return StreamingResponse(content, media_type=media_type)
+        slots = self._owner_slots(owner_id)
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_seconds)
+        except asyncio.TimeoutError:
+            raise _rate_limited(1)
+        return SlotStreamingResponse(content, slots.release, media_type=media_type)
+
+
+proxy_limits = OwnerStreamLimits()
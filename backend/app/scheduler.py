@@ -6,11 +6,13 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timezone
+from typing import Optional
 from sqlmodel import Session, select
 import asyncio
 import logging
 
-from app.database import engine
+from app.config import settings
+from app.database import engine, read_engine, run_sqlite_maintenance
 from app.models import Task, User
 
 logger = logging.getLogger(__name__)
@@ -26,10 +28,27 @@ TASK_REGISTRY = {
         "description": "每天自动从 Karakeep 获取书签并使用 AI 生成阅读摘要",
         "cron_expr": "0 0 * * *",  # 每日 UTC 0点
         "handler": None,  # 将在下面设置
-    }
+    },
+    "sqlite_maintenance": {
+        "display_name": "数据库维护",
+        "description": "执行 wal_checkpoint(TRUNCATE) 控制 WAL 文件大小，并运行 PRAGMA optimize 更新查询统计",
+        "cron_expr": settings.SQLITE_MAINTENANCE_CRON,
+        "handler": None,
+    },
+    "stats_reconcile": {
+        "display_name": "日记本统计对账",
+        "description": "按实际日记重新计算各日记本的字数与篇数，纠正增量维护产生的偏差，纠正量记录在任务结果中",
+        "cron_expr": settings.STATS_RECONCILE_CRON,
+        "handler": None,
+    },
 }
 
 
+def load_users() -> list[User]:
+    with Session(read_engine) as session:
+        return list(session.exec(select(User)).all())
+
+
 async def run_daily_summary():
     """
     执行每日阅读摘要任务
@@ -39,44 +58,96 @@ async def run_daily_summary():
     
     from app.modules.automation.tasks_router import process_user_daily_summary
     
-    with Session(engine) as session:
-        # 获取所有配置了 Karakeep 和 AI 的用户
-        users = session.exec(select(User)).all()
+    # 只读查询用户列表放到线程中执行，且不在逐个处理期间占用读连接；
+    # process_user_daily_summary 会自行读取用户并通过写队列写入
+    users = await asyncio.to_thread(load_users)
+    
+    for user in users:
+        # 检查用户是否启用了此任务
+        task_configs = user.task_configs or {}
+        user_task_config = task_configs.get("daily_summary", {})
         
-        for user in users:
-            # 检查用户是否启用了此任务
-            task_configs = user.task_configs or {}
-            user_task_config = task_configs.get("daily_summary", {})
-            
-            # 如果用户没有显式启用，默认启用（向后兼容）
-            if not user_task_config.get("enabled", True):
-                logger.info(f"[Scheduler] User {user.username} has disabled daily summary, skipping")
-                continue
-            
-            # 检查用户是否有必要的配置
-            if not (user.karakeep_url and user.karakeep_api_key and user.ai_api_key):
-                logger.info(f"[Scheduler] User {user.username} missing required config, skipping")
-                continue
-            
-            logger.info(f"[Scheduler] Processing daily summary for {user.username}")
-            try:
-                await process_user_daily_summary(user.id)
-            except Exception as e:
-                logger.error(f"[Scheduler] Error processing summary for {user.username}: {e}")
+        # 如果用户没有显式启用，默认启用（向后兼容）
+        if not user_task_config.get("enabled", True):
+            logger.info(f"[Scheduler] User {user.username} has disabled daily summary, skipping")
+            continue
+        
+        # 检查用户是否有必要的配置
+        if not (user.karakeep_url and user.karakeep_api_key and user.ai_api_key):
+            logger.info(f"[Scheduler] User {user.username} missing required config, skipping")
+            continue
+        
+        logger.info(f"[Scheduler] Processing daily summary for {user.username}")
+        try:
+            await process_user_daily_summary(user.id)
+        except Exception as e:
+            logger.error(f"[Scheduler] Error processing summary for {user.username}: {e}")
     
     # 更新任务状态
+    await asyncio.to_thread(mark_task_run, "daily_summary")
+    
+    logger.info("[Scheduler] Daily summary task completed")
+
+
+async def run_sqlite_maintenance_task():
+    """
+    执行数据库维护任务（仅 SQLite）
+    checkpoint 需要等待写连接，放到线程中执行，避免阻塞事件循环
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    
+    logger.info("[Scheduler] Starting SQLite maintenance")
+    try:
+        result = await asyncio.to_thread(run_sqlite_maintenance)
+        logger.info(f"[Scheduler] SQLite maintenance completed: {result}")
+    except Exception as e:
+        logger.error(f"[Scheduler] SQLite maintenance failed: {e}")
+    
+    await asyncio.to_thread(mark_task_run, "sqlite_maintenance")
+
+
+def reconcile_notebook_stats() -> dict:
+    from app.modules.notebooks.helpers.stats_snapshot import reconcile_stats_snapshots
+    
+    with Session(engine) as session:
+        return reconcile_stats_snapshots(session, batch_size=settings.STATS_RECONCILE_BATCH_SIZE)
+
+
+async def run_stats_reconcile_task():
+    """
+    执行 notebook.stats_snapshot 对账任务
+    对账在写连接上分批执行，放到线程中避免阻塞事件循环；纠正的偏差记录到 Task.last_result，
+    长期为 0 说明增量维护可信，读取时无需全量重算
+    """
+    logger.info("[Scheduler] Starting stats reconciliation")
+    result = None
+    try:
+        result = await asyncio.to_thread(reconcile_notebook_stats)
+        level = logging.WARNING if result["corrected"] else logging.INFO
+        logger.log(level, f"[Scheduler] Stats reconciliation completed: {result}")
+    except Exception as e:
+        logger.error(f"[Scheduler] Stats reconciliation failed: {e}")
+    
+    await asyncio.to_thread(mark_task_run, "stats_reconcile", result)
+
+
+def mark_task_run(task_name: str, result: Optional[dict] = None):
+    """记录任务最近一次运行时间，提供 result 时一并记录运行结果（需要写连接，异步任务中放到线程中调用）"""
     with Session(engine) as session:
-        task = session.exec(select(Task).where(Task.name == "daily_summary")).first()
+        task = session.exec(select(Task).where(Task.name == task_name)).first()
         if task:
             task.last_run = datetime.now(timezone.utc)
+            if result is not None:
+                task.last_result = result
             session.add(task)
             session.commit()
-    
-    logger.info("[Scheduler] Daily summary task completed")
 
 
 # 设置任务处理器
 TASK_REGISTRY["daily_summary"]["handler"] = run_daily_summary
+TASK_REGISTRY["sqlite_maintenance"]["handler"] = run_sqlite_maintenance_task
+TASK_REGISTRY["stats_reconcile"]["handler"] = run_stats_reconcile_task
 
 
 def initialize_tasks():
@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, field_validator
+from typing import List, Literal, Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 
 # --- User ---
@@ -64,8 +64,45 @@ class DiaryCreate(DiaryBase):
     tags: List[str] = []
     stats: Optional[Dict[str, Any]] = {}
 
+class DiaryPatch(BaseModel):
+    """字段级更新：只写入请求中出现的字段；content_patch 为作用于当前正文的 RFC 6902 JSON Patch"""
+    version: Optional[int] = None
+    title: Optional[str] = None
+    content: Optional[Dict[str, Any]] = None
+    content_patch: Optional[List[Dict[str, Any]]] = None
+    notebook_id: Optional[int] = None
+    date: Optional[datetime] = None
+    mood: Optional[Dict[str, Any]] = None
+    location: Optional[Dict[str, Any]] = None
+    weather: Optional[Dict[str, Any]] = None
+    tags: Optional[List[str]] = None
+
+class DiaryBulkOperation(BaseModel):
+    """
+    批量操作中的一项：
+    create 用 diary；update 用 id + changes；move 用 id + notebook_id；tag 用 id + add_tags / remove_tags；delete 用 id
+    """
+    op: Literal["create", "update", "move", "tag", "delete"]
+    id: Optional[int] = None
+    diary: Optional[DiaryCreate] = None
+    changes: Optional[DiaryPatch] = None
+    notebook_id: Optional[int] = None
+    add_tags: List[str] = []
+    remove_tags: List[str] = []
+
+class DiaryBulkRequest(BaseModel):
+    operations: List[DiaryBulkOperation] = Field(min_length=1, max_length=1000)
+
+class DiaryBulkResult(BaseModel):
+    op: str
+    id: int
+
+class DiaryBulkResponse(BaseModel):
+    results: List[DiaryBulkResult]
+
 class DiaryRead(DiaryBase):
     id: int
+    version: int = 1
     cover_image_url: Optional[str] = None
     word_count: int
     image_count: int
@@ -135,4 +172,6 @@ class SharePublicRead(BaseModel):
     share_type: str  # "diary" or "notebook"
     diary: Optional[DiaryRead] = None
     notebook: Optional[NotebookRead] = None
-    diaries: Optional[List[DiaryRead]] = None  # 笔记本分享时包含的所有日记
+    diaries: Optional[List[DiaryRead]] = None  # 笔记本分享时的一页日记（按日期倒序）
+    # 下一页 cursor：传回本接口，或用于 /api/app/public/shares/{token}/entries
+    next_cursor: Optional[str] = None
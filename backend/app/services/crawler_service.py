@@ -439,10 +439,12 @@ class CrawlerService:
             print(f"Failed to download image {url}: {e}")
             return False
     
-    async def process_xhs_data(self, data: List[Dict], session) -> Optional[Dict[str, Any]]:
-        """处理小红书数据：保存到数据库并下载图片"""
+    async def process_xhs_data(self, data: List[Dict]) -> Optional[Dict[str, Any]]:
+        """处理小红书数据：保存到数据库并下载图片（查重走异步只读会话，写入提交到写队列）"""
+        from app.database import async_engine, write_queue
         from app.models import XiaohongshuPost, XiaohongshuImage
         from sqlmodel import select
+        from sqlmodel.ext.asyncio.session import AsyncSession
         
         if not data:
             return None
@@ -454,12 +456,13 @@ class CrawlerService:
             return None
         
         # 检查是否已存在
-        existing = session.exec(
-            select(XiaohongshuPost).where(XiaohongshuPost.note_id == note_id)
-        ).first()
+        async with AsyncSession(async_engine) as session:
+            existing = (await session.exec(
+                select(XiaohongshuPost.note_id).where(XiaohongshuPost.note_id == note_id)
+            )).first()
         
         if existing:
-            return {"note_id": existing.note_id, "existing": True}
+            return {"note_id": existing, "existing": True}
         
         # 创建帖子记录
         post = XiaohongshuPost(
@@ -481,10 +484,6 @@ class CrawlerService:
             created_at=datetime.fromtimestamp(post_data.get("time", 0) / 1000, tz=timezone.utc) if post_data.get("time") else None,
             comments=post_data.get("_comments")
         )
-        session.add(post)
-        session.commit()
-        session.refresh(post)
-        
         # 下载图片
         image_list = post_data.get("image_list", "").split(",") if post_data.get("image_list") else []
         saved_images = []
@@ -504,35 +503,42 @@ class CrawlerService:
                 
                 success = await self.download_image(img_url.strip(), save_path)
                 if success:
-                    image = XiaohongshuImage(
-                        post_id=post.id,
-                        image_index=idx,
-                        local_path=local_path,
-                        original_url=img_url.strip()
-                    )
-                    session.add(image)
-                    saved_images.append(local_path)
-        
-        session.commit()
+                    saved_images.append((idx, local_path, img_url.strip()))
         
-        return {
+        result = {
             "note_id": note_id,
             "title": post.title,
-            "images": saved_images,
+            "images": [local_path for _, local_path, _ in saved_images],
             "note_type": post.note_type,
             "existing": False
         }
+        
+        # 图片下载完成后在一个短的写任务内写入帖子与图片
+        def save(session) -> None:
+            session.add(post)
+            session.flush()
+            for idx, local_path, original_url in saved_images:
+                session.add(XiaohongshuImage(
+                    post_id=post.id,
+                    image_index=idx,
+                    local_path=local_path,
+                    original_url=original_url
+                ))
+        
+        await write_queue.submit(save)
+        return result
     
-    async def process_bili_data(self, data: List[Dict], session, bvid: str = None) -> Optional[Dict[str, Any]]:
-        """处理B站数据：保存到数据库并下载封面
+    async def process_bili_data(self, data: List[Dict], bvid: str = None) -> Optional[Dict[str, Any]]:
+        """处理B站数据：保存到数据库并下载封面（查重走异步只读会话，写入提交到写队列）
         
         Args:
             data: 爬取的视频数据
-            session: 数据库会话
             bvid: 原始 BV 号（用户输入的）
         """
+        from app.database import async_engine, write_queue
         from app.models import BilibiliVideo
         from sqlmodel import select
+        from sqlmodel.ext.asyncio.session import AsyncSession
         
         if not data:
             return None
@@ -544,14 +550,15 @@ class CrawlerService:
             return None
         
         # 检查是否已存在（通过 avid 或 bvid）
-        existing = session.exec(
-            select(BilibiliVideo).where(BilibiliVideo.video_id == video_id)
-        ).first()
-        
-        if not existing and bvid:
-            existing = session.exec(
-                select(BilibiliVideo).where(BilibiliVideo.bvid == bvid)
-            ).first()
+        async with AsyncSession(async_engine) as session:
+            existing = (await session.exec(
+                select(BilibiliVideo).where(BilibiliVideo.video_id == video_id)
+            )).first()
+            
+            if not existing and bvid:
+                existing = (await session.exec(
+                    select(BilibiliVideo).where(BilibiliVideo.bvid == bvid)
+                )).first()
         
         if existing:
             return {"video_id": existing.bvid or existing.video_id, "existing": True}
@@ -589,8 +596,7 @@ class CrawlerService:
             if success:
                 video.cover_local_path = local_path
         
-        session.add(video)
-        session.commit()
+        await write_queue.submit(lambda session: session.add(video))
         
         # 返回 BV 号（优先）或 avid
         return_id = bvid or video_id
@@ -0,0 +1,172 @@
+"""
+跨查询复用的 SQL 表达式
+
+JSON 字段的取值路径以字面量内联到 SQL 中（而不是绑定参数），
+这样查询表达式才能与迁移中创建的表达式索引逐字匹配。
+
+各表达式按方言分别编译：默认（SQLite）与 PostgreSQL，
+迁移脚本中的索引表达式需与这里的编译结果保持一致（见 app.migrations.ops）。
+"""
+
+from sqlalchemy import Boolean, Float, String, literal
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from app.config import settings
+from app.modules.journaling.helpers.snippets import search_terms
+
+
+class json_text(FunctionElement):
+    """取 JSON 列中顶层 key 的文本值：json_text(Diary.mood, "label")"""
+
+    type = String()
+    inherit_cache = True
+    # key 参与语句缓存键，否则不同 key 的同列表达式会命中同一条缓存 SQL
+    _traverse_internals = FunctionElement._traverse_internals + [("json_key", InternalTraversal.dp_string)]
+
+    def __init__(self, column, key: str):
+        if not key.isidentifier():
+            raise ValueError(f"Invalid JSON key: {key!r}")
+        self.json_key = key
+        super().__init__(column)
+
+
+@compiles(json_text)
+def _compile_json_text(element: json_text, compiler, **kw) -> str:
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return f"json_extract({column}, '$.{element.json_key}')"
+
+
+@compiles(json_text, "postgresql")
+def _compile_json_text_postgresql(element: json_text, compiler, **kw) -> str:
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return f"({column} ->> '{element.json_key}')"
+
+
+def mood_label(column):
+    return json_text(column, "label")
+
+
+def weather_label(column):
+    return json_text(column, "weather")
+
+
+class date_text(FunctionElement):
+    """日期时间列的 YYYY-MM-DD 文本，用于按天分组统计"""
+
+    type = String()
+    inherit_cache = True
+
+
+@compiles(date_text)
+def _compile_date_text(element: date_text, compiler, **kw) -> str:
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(date_text, "postgresql")
+def _compile_date_text_postgresql(element: date_text, compiler, **kw) -> str:
+    return f"to_char({compiler.process(element.clauses, **kw)}, 'YYYY-MM-DD')"
+
+
+def like_pattern(term: str) -> str:
+    """子串匹配的 LIKE 模式，转义 % / _，查询词按字面匹配（与 ESCAPE '\\' 配合）"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class _diary_text_terms(FunctionElement):
+    """
+    diary_text_match / diary_text_rank 的公共部分：参数为标题、正文纯文本（Diary.content_text）与查询串
+    默认按 search_terms 拆分查询词（与摘要片段的高亮一致），每个词各一个 LIKE 模式；
+    PostgreSQL 直接把查询串交给 plainto_tsquery
+    """
+
+    inherit_cache = True
+
+    def __init__(self, title, content_text, q: str):
+        patterns = [literal(like_pattern(term)) for term in search_terms(q)]
+        super().__init__(title, content_text, literal(q), *patterns)
+
+    def term_hits(self, compiler, **kw) -> list[tuple[str, str]]:
+        """每个查询词的 (标题命中, 正文命中) SQL 条件"""
+        title, content_text, _, *patterns = (compiler.process(clause, **kw) for clause in self.clauses)
+        return [
+            (
+                f"lower(coalesce({title}, '')) LIKE lower({pattern}) ESCAPE '\\'",
+                f"lower(coalesce({content_text}, '')) LIKE lower({pattern}) ESCAPE '\\'",
+            )
+            for pattern in patterns
+        ]
+
+    def postgresql_parts(self, compiler, **kw) -> tuple[str, str, str]:
+        title, content_text, q = (compiler.process(clause, **kw) for clause in list(self.clauses)[:3])
+        config = settings.POSTGRES_TEXT_SEARCH_CONFIG
+        return config, diary_search_document(title, content_text), q
+
+
+class diary_text_match(_diary_text_terms):
+    """
+    日记标题 / 正文关键词匹配：diary_text_match(Diary.title, Diary.content_text, q)
+    默认每个查询词都需出现在标题或正文纯文本中（大小写不敏感的子串匹配）；
+    PostgreSQL 使用 tsvector 全文检索，表达式与 v0015 创建的 GIN 索引一致
+    """
+
+    type = Boolean()
+    inherit_cache = True
+
+
+@compiles(diary_text_match)
+def _compile_diary_text_match(element: diary_text_match, compiler, **kw) -> str:
+    hits = element.term_hits(compiler, **kw)
+    if not hits:
+        return "1 = 1"
+    return "(" + " AND ".join(f"({title_hit} OR {content_hit})" for title_hit, content_hit in hits) + ")"
+
+
+@compiles(diary_text_match, "postgresql")
+def _compile_diary_text_match_postgresql(element: diary_text_match, compiler, **kw) -> str:
+    config, document, q = element.postgresql_parts(compiler, **kw)
+    return f"(to_tsvector('{config}', {document}) @@ plainto_tsquery('{config}', {q}))"
+
+
+class diary_text_rank(_diary_text_terms):
+    """
+    与 diary_text_match 配套的相关度得分，越大越相关：diary_text_rank(Diary.title, Diary.content_text, q)
+    默认每个查询词标题命中计 2 分、正文命中计 1 分；PostgreSQL 为 ts_rank，保留 6 位小数，
+    使分页游标中携带的得分能与重新计算的值精确比较
+    """
+
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(diary_text_rank)
+def _compile_diary_text_rank(element: diary_text_rank, compiler, **kw) -> str:
+    hits = element.term_hits(compiler, **kw)
+    if not hits:
+        return "0"
+    return "(" + " + ".join(
+        f"(CASE WHEN {title_hit} THEN 2 ELSE 0 END) + (CASE WHEN {content_hit} THEN 1 ELSE 0 END)"
+        for title_hit, content_hit in hits
+    ) + ")"
+
+
+@compiles(diary_text_rank, "postgresql")
+def _compile_diary_text_rank_postgresql(element: diary_text_rank, compiler, **kw) -> str:
+    config, document, q = element.postgresql_parts(compiler, **kw)
+    return f"round(CAST(ts_rank(to_tsvector('{config}', {document}), plainto_tsquery('{config}', {q})) AS numeric), 6)"
+
+
+def diary_search_document(title: str, content: str) -> str:
+    """PostgreSQL 全文检索文档表达式（原始 SQL），查询与 GIN 索引共用"""
+    return f"coalesce({title}, '') || ' ' || coalesce({content}, '')"
+
+
+def dialect_insert(session, model):
+    """按会话绑定的方言返回支持 on_conflict_do_nothing / on_conflict_do_update 的 INSERT"""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql_insert(model)
+    return sqlite_insert(model)
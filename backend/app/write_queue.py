@@ -0,0 +1,97 @@
+"""
+异步写队列
+
+async def 路由把写操作（接收同步 Session 的函数）提交到队列，由单个后台协程串行执行：
+- 队列中积压的多个写任务合并为一个事务提交（group commit），减少 fsync 次数
+- 每个任务在独立的 SAVEPOINT 中执行，单个任务失败只回滚自身，异常原样抛回给调用方
+- 数据库操作在线程池中执行，不阻塞事件循环
+
+任务返回的 ORM 对象在提交后处于脱离状态（expire_on_commit=False），
+需要返回的关系字段应在任务内加载。
+"""
+
+import asyncio
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+T = TypeVar("T")
+
+WriteJob = Callable[[Session], Any]
+
+
+class WriteQueue:
+    def __init__(self, engine: Engine, max_batch: int = 64):
+        self.engine = engine
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            # 首次使用或事件循环已更换（如测试中多个 TestClient）时重建
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, job: Callable[[Session], T]) -> T:
+        """提交写任务并等待其所在批次提交完成，返回任务结果"""
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((job, future))
+        return await future
+
+    async def stop(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                outcomes = await asyncio.to_thread(self._commit_batch, [job for job, _ in batch])
+            except Exception as exc:
+                # 开启事务失败（如等待写锁超时）：整批失败，队列继续运行
+                outcomes = [(False, exc)] * len(batch)
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _commit_batch(self, jobs: list[WriteJob]) -> list[tuple[bool, Any]]:
+        outcomes: list[tuple[bool, Any]] = []
+        with Session(self.engine, expire_on_commit=False) as session:
+            connection = session.connection()
+            if connection.dialect.name == "sqlite":
+                # pysqlite 不会在 SAVEPOINT 前自动开启事务；显式 BEGIN IMMEDIATE 让整批在一个事务内，
+                # 并在开始时就拿到写锁，避免读锁升级写锁时的 SQLITE_BUSY
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+            for job in jobs:
+                try:
+                    with session.begin_nested():
+                        value = job(session)
+                    outcomes.append((True, value))
+                except Exception as exc:
+                    outcomes.append((False, exc))
+
+            try:
+                session.commit()
+            except Exception as exc:
+                session.rollback()
+                return [(False, exc)] * len(jobs)
+        return outcomes
@@ -92,11 +92,32 @@ def main() -> None:
 
         search_by_mood = client.get("/api/app/search/entries", headers=headers, params={"mood": "Happy"})
         assert search_by_mood.status_code == 200, search_by_mood.text
-        assert [item["id"] for item in search_by_mood.json()] == [diary["id"]]
+        assert [item["id"] for item in search_by_mood.json()["items"]] == [diary["id"]]
 
         search_by_weather = client.get("/api/app/search/entries", headers=headers, params={"weather": "☀️"})
         assert search_by_weather.status_code == 200, search_by_weather.text
-        assert [item["id"] for item in search_by_weather.json()] == [diary["id"]]
+        assert [item["id"] for item in search_by_weather.json()["items"]] == [diary["id"]]
+
+        search_by_text = client.get(
+            "/api/app/search/entries", headers=headers, params={"q": "smoke", "order": "relevance", "limit": 1}
+        )
+        assert search_by_text.status_code == 200, search_by_text.text
+        first_hit = search_by_text.json()["items"][0]
+        assert first_hit["id"] == diary["id"]
+        assert first_hit["snippet"] == "Hello smoke test"
+        assert first_hit["highlights"] == [[6, 11]]
+
+        stats = client.get("/api/app/stats", headers=headers, params={"days": 7})
+        assert stats.status_code == 200, stats.text
+        assert stats.json()["summary"]["total_entries"] == 2
+
+        unified = client.get("/api/search/unified", headers=headers, params={"q": "Smoke Entry", "include_bookmarks": False})
+        assert unified.status_code == 200, unified.text
+        assert [item["tags"] for item in unified.json()["diaries"]] == [["smoke"]]
+
+        tags = client.get("/api/tags/", headers=headers, params={"q": "sm"})
+        assert tags.status_code == 200, tags.text
+        assert tags.json() == ["smoke"]
 
         share_create = client.post(
             "/api/share/",
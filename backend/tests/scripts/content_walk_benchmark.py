@@ -0,0 +1,121 @@
+"""
+对比正文派生字段的计算开销：旧实现的三次独立遍历 vs analyze_content 单次遍历
+
+运行：cd backend && PYTHONPATH=. python tests/scripts/content_walk_benchmark.py [--size-kb 100] [--repeat 50]
+"""
+
+import argparse
+import json
+import re
+import timeit
+from typing import Any
+
+from app.modules.journaling.helpers.content_stats import WORD_PATTERN, analyze_content
+
+
+def legacy_walk_content(content: dict[str, Any]) -> tuple[int, int]:
+    text = ""
+    image_count = 0
+
+    def rec(node: dict[str, Any]):
+        nonlocal text, image_count
+        if node.get("type") == "text":
+            text += node.get("text", "")
+        elif node.get("type") == "image":
+            image_count += 1
+        for child in node.get("content", []):
+            if isinstance(child, dict):
+                rec(child)
+
+    if "content" in content:
+        for node in content["content"]:
+            if isinstance(node, dict):
+                rec(node)
+
+    pattern = re.compile(WORD_PATTERN.pattern)  # 旧实现每次调用都重新编译
+    return len(pattern.findall(text)), image_count
+
+
+def legacy_extract_first_image_src(content: dict[str, Any]) -> str | None:
+    def walk(nodes: list[dict[str, Any]]) -> str | None:
+        for node in nodes:
+            if node.get("type") == "image":
+                src = node.get("attrs", {}).get("src")
+                if isinstance(src, str) and src:
+                    return src
+            children = node.get("content")
+            if isinstance(children, list):
+                nested = walk(children)
+                if nested:
+                    return nested
+        return None
+
+    return walk(content.get("content", []))
+
+
+def legacy_extract_local_paths(content: dict[str, Any]) -> set[str]:
+    paths: set[str] = set()
+
+    def extract_from_node(node: dict):
+        if not isinstance(node, dict):
+            return
+        if node.get("type") in ["image", "video", "audio"]:
+            src = node.get("attrs", {}).get("src", "")
+            if src and src.startswith("/uploads/"):
+                paths.add(src)
+        for child in node.get("content", []):
+            extract_from_node(child)
+
+    extract_from_node(content)
+    return paths
+
+
+def legacy_three_walks(content: dict[str, Any]):
+    return legacy_walk_content(content), legacy_extract_first_image_src(content), legacy_extract_local_paths(content)
+
+
+def single_pass(content: dict[str, Any]):
+    analysis = analyze_content(content)
+    return (analysis.word_count, analysis.image_count), analysis.first_image_src, analysis.local_media
+
+
+def build_document(size_kb: int) -> dict[str, Any]:
+    """段落、引用嵌套与图片混排的文档，序列化后约 size_kb KB"""
+    nodes: list[dict[str, Any]] = []
+    index = 0
+    while len(json.dumps({"type": "doc", "content": nodes}, ensure_ascii=False)) < size_kb * 1024:
+        paragraph = {
+            "type": "paragraph",
+            "content": [
+                {"type": "text", "text": f"Day {index}: walked along the river, "},
+                {"type": "text", "marks": [{"type": "bold"}], "text": "今天天气很好，"},
+                {"type": "text", "text": "and wrote a few notes about it."},
+            ],
+        }
+        nodes.append(paragraph)
+        if index % 5 == 0:
+            nodes.append({"type": "image", "attrs": {"src": f"/uploads/photo-{index}.jpg"}})
+        if index % 7 == 0:
+            nodes.append({"type": "blockquote", "content": [paragraph]})
+        index += 1
+    return {"type": "doc", "content": nodes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    content = build_document(args.size_kb)
+    assert legacy_three_walks(content) == single_pass(content)
+
+    legacy = min(timeit.repeat(lambda: legacy_three_walks(content), number=args.repeat, repeat=3)) / args.repeat
+    current = min(timeit.repeat(lambda: single_pass(content), number=args.repeat, repeat=3)) / args.repeat
+    print(f"document: {len(json.dumps(content, ensure_ascii=False)) / 1024:.0f} KB")
+    print(f"three walks : {legacy * 1000:.2f} ms")
+    print(f"single pass : {current * 1000:.2f} ms ({legacy / current:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+对比时间线一页的查询 + 序列化开销（按每条日记计）：
+旧实现 select(Diary) 整行读取 + 逐字段构造 EntryCard + FastAPI 按 response_model 二次校验 / 转换 + 标准库 json，
+新实现按卡片列查询 + 行直接校验为 EntryCard + app_json 一次序列化（orjson 已安装时非模型内容走 orjson）
+
+运行：cd backend && PYTHONPATH=. python tests/scripts/timeline_serialization_benchmark.py [--entries 500] [--page 20] [--content-kb 4]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from fastapi.utils import create_model_field
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+import app.models  # noqa: F401
+from app.api.app.cursor import diary_keyset_page
+from app.api.app.home_router import CARD_COLUMNS, to_entry_card
+from app.api.app.responses import app_json, orjson
+from app.api.app.schemas import CursorPage, EntryCard, TimelinePayload
+from app.models import Diary, Notebook, User
+
+TIMELINE_FIELD = create_model_field(name="response", type_=TimelinePayload, mode="serialization")
+
+
+def legacy_entry_card(diary: Diary) -> EntryCard:
+    return EntryCard(
+        id=diary.id,
+        notebook_id=diary.notebook_id,
+        title=diary.title,
+        cover_image_url=diary.cover_image_url,
+        date=diary.date,
+        updated_at=diary.updated_at,
+        word_count=diary.word_count,
+        image_count=diary.image_count,
+        is_pinned=diary.is_pinned,
+        mood=diary.mood,
+        weather_snapshot=diary.weather_snapshot,
+    )
+
+
+def legacy_page(session: Session, limit: int) -> bytes:
+    items, next_cursor = diary_keyset_page(session, select(Diary).where(Diary.user_id == 1), None, limit)
+    payload = TimelinePayload(
+        items=[legacy_entry_card(entry) for entry in items],
+        page=CursorPage(next_cursor=next_cursor, has_more=next_cursor is not None),
+    )
+    # FastAPI 对非 Response 返回值的处理：按 response_model 校验、转换为 JSON 兼容数据，再由 JSONResponse 编码
+    value, _ = TIMELINE_FIELD.validate(payload, {}, loc=("response",))
+    content = TIMELINE_FIELD.serialize(value)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def current_page(session: Session, limit: int) -> bytes:
+    items, next_cursor = diary_keyset_page(session, select(*CARD_COLUMNS).where(Diary.user_id == 1), None, limit)
+    payload = TimelinePayload(
+        items=[to_entry_card(entry) for entry in items],
+        page=CursorPage(next_cursor=next_cursor, has_more=next_cursor is not None),
+    )
+    return app_json(payload).body
+
+
+def build_database(entries: int, content_kb: int):
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    paragraph = {"type": "paragraph", "content": [{"type": "text", "text": "walked along the river, 今天天气很好。" * 8}]}
+    paragraphs = max(1, content_kb * 1024 // len(json.dumps(paragraph, ensure_ascii=False)))
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        session.add(User(id=1, username="bench", hashed_password="x"))
+        session.add(Notebook(id=1, name="bench", user_id=1))
+        for index in range(entries):
+            session.add(
+                Diary(
+                    notebook_id=1,
+                    user_id=1,
+                    title=f"Day {index}",
+                    content={"type": "doc", "content": [paragraph] * paragraphs},
+                    date=now - timedelta(hours=index),
+                    word_count=120,
+                    image_count=index % 3,
+                    cover_image_url=f"/uploads/cover-{index}.jpg",
+                    mood={"label": "Happy", "emoji": "😊"},
+                    weather_snapshot={"weather": "sunny", "temperature": 21},
+                )
+            )
+        session.commit()
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--content-kb", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = build_database(args.entries, args.content_kb)
+    with Session(engine) as session:
+        assert json.loads(legacy_page(session, args.page)) == json.loads(current_page(session, args.page))
+
+        results = {}
+        for name, page in (("legacy", legacy_page), ("current", current_page)):
+            seconds = min(timeit.repeat(lambda: page(session, args.page), number=args.repeat, repeat=3))
+            results[name] = seconds / args.repeat / args.page
+
+    print(f"page: {args.page} entries, content ~{args.content_kb} KB each, orjson: {'yes' if orjson else 'no'}")
+    print(f"legacy  : {results['legacy'] * 1e6:.1f} us/entry")
+    print(f"current : {results['current'] * 1e6:.1f} us/entry ({results['legacy'] / results['current']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class AppETagTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+        from app.api.app.response_cache import response_cache
+        from app.api.app.router import router
+        from app.auth import get_current_user
+        from app.database import get_async_session, get_read_session
+        from app.models import Diary, Notebook, User
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = Path(self.temp_dir.name) / "journey.db"
+        self.engine = create_engine(f"sqlite:///{db_path}")
+        self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+        SQLModel.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(Notebook(id=1, name="n", user_id=1))
+            session.add(Diary(id=1, notebook_id=1, user_id=1, title="t", content={"type": "doc", "content": []}, word_count=3))
+            session.commit()
+
+        def override_session():
+            with Session(self.engine) as session:
+                yield session
+
+        async def override_async_session():
+            async with AsyncSession(self.async_engine, expire_on_commit=False) as session:
+                yield session
+
+        def current_user():
+            # 与真实认证一致：每个请求重新读出用户（含 data_version）
+            with Session(self.engine) as session:
+                user = session.get(User, 1)
+                session.expunge(user)
+                return user
+
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_read_session] = override_session
+        app.dependency_overrides[get_async_session] = override_async_session
+        app.dependency_overrides[get_current_user] = current_user
+        self.client = TestClient(app)
+        response_cache.clear()
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _diary_statements(self, url: str, **kwargs):
+        statements: list[str] = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(self.engine, "before_cursor_execute", listener)
+        event.listen(self.async_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(url, **kwargs)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+            event.remove(self.async_engine.sync_engine, "before_cursor_execute", listener)
+        return response, [statement for statement in statements if "FROM diary" in statement]
+
+    def test_unchanged_view_returns_304_without_querying_diaries(self) -> None:
+        first = self.client.get("/api/app/home")
+        etag = first.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"1.0.'))
+
+        cached, statements = self._diary_statements("/api/app/home", headers={"If-None-Match": f'"other", {etag}'})
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers["ETag"], etag)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(statements, [])
+        self.assertNotEqual(self.client.get("/api/app/timeline").headers["ETag"], etag)
+
+    def test_writes_bump_data_version_and_invalidate_etag(self) -> None:
+        from fastapi import BackgroundTasks
+
+        from app.models import User
+        from app.modules.journaling.diaries_router import patch_diary
+        from app.schemas import DiaryPatch
+
+        etag = self.client.get("/api/app/timeline").headers["ETag"]
+        with Session(self.engine) as session:
+            user = session.get(User, 1)
+            session.expunge(user)
+        with Session(self.engine) as session:
+            patch_diary(1, DiaryPatch(title="renamed"), BackgroundTasks(), user, session)
+        with Session(self.engine) as session:
+            self.assertEqual(session.get(User, 1).data_version, 1)
+
+        response = self.client.get("/api/app/timeline", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["title"], "renamed")
+        self.assertTrue(response.headers["ETag"].startswith('W/"1.1.'))
+
+    def test_server_cache_serves_repeat_requests_until_a_write(self) -> None:
+        from app.api.app.data_version import bump_data_version
+        from app.api.app.response_cache import response_cache
+
+        first, first_statements = self._diary_statements("/api/app/stats?days=7")
+        second, second_statements = self._diary_statements("/api/app/stats?days=7")
+
+        self.assertTrue(first_statements)
+        self.assertEqual(second_statements, [])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(second.json()["summary"]["total_words"], 3)
+
+        with Session(self.engine) as session:
+            bump_data_version(session, 1)
+            session.commit()
+        self.assertIsNone(response_cache.get(1, first.headers["ETag"]))
+        _, statements = self._diary_statements("/api/app/stats?days=7")
+        self.assertTrue(statements)
+
+    def test_response_cache_evicts_lru_and_reads_file_store(self) -> None:
+        from app.api.app.response_cache import ResponseCache
+
+        cache = ResponseCache(2)
+        cache.put(1, "a", b"1")
+        cache.put(1, "b", b"2")
+        cache.get(1, "a")
+        cache.put(2, "c", b"3")
+        self.assertEqual((cache.get(1, "a"), cache.get(1, "b"), cache.get(2, "c")), (b"1", None, b"3"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            ResponseCache(2, directory).put(1, "a", b"1")
+            shared = ResponseCache(2, directory)
+            self.assertEqual(shared.get(1, "a"), b"1")
+            shared.invalidate_user(1)
+            self.assertIsNone(ResponseCache(2, directory).get(1, "a"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResponseCache(2, directory)
+            for index in range(50):
+                cache.put(1, f"key-{index}", b"x")
+            self.assertEqual(len(list(Path(directory, "1").glob("*.json"))), 2)
+            self.assertEqual(cache.get(1, "key-49"), b"x")
+
+            # 另一个进程（或重启前）写入、不在本进程内存中的文件同样受每个用户的上限约束
+            other = ResponseCache(2, directory)
+            other.put(1, "other", b"y")
+            self.assertEqual(len(list(Path(directory, "1").glob("*.json"))), 2)
+            self.assertEqual(ResponseCache(2, directory).get(1, "other"), b"y")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import re
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+FULL_SCAN = re.compile(r"^SCAN (diary|notebook|sharetoken|diarytaglink|tag)\b")
+
+# 每个 api/app 接口 -> (示例请求, 执行计划中必须出现的索引)
+ENDPOINT_PLANS = {
+    "/api/app/home": ("/api/app/home", {"ix_diary_pinned_user_date", "ix_diary_user_date_id", "ix_diary_user_month_day"}),
+    "/api/app/timeline": ("/api/app/timeline", {"ix_diary_user_date_id"}),
+    "/api/app/entries/{entry_id}": ("/api/app/entries/1", set()),
+    "/api/app/notebooks/{notebook_id}": ("/api/app/notebooks/1", set()),
+    "/api/app/notebooks/{notebook_id}/entries": ("/api/app/notebooks/1/entries", {"ix_diary_notebook_date_id"}),
+    "/api/app/search/entries": ("/api/app/search/entries?mood=Happy", {"ix_diary_user_mood_label"}),
+    "/api/app/search/bookmarks": ("/api/app/search/bookmarks", set()),
+    "/api/app/stats": ("/api/app/stats", {"ix_diary_user_date_id"}),
+    "/api/app/public/shares/{token}": ("/api/app/public/shares/share-token", {"ix_sharetoken_token"}),
+    "/api/app/public/shares/{token}/entries": ("/api/app/public/shares/share-token/entries", {"ix_diary_notebook_date_id"}),
+}
+
+EXTRA_REQUESTS = [
+    ("/api/app/timeline?notebook_id=1", {"ix_diary_notebook_date_id"}),
+    ("/api/app/search/entries?weather=sunny", {"ix_diary_user_weather"}),
+    ("/api/app/search/entries?tag=tag-1-0", {"ix_diarytaglink_tag_id"}),
+    ("/api/app/search/entries?q=entry", {"ix_diary_user_date_id"}),
+]
+
+
+class AppQueryPlanTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from app.api.app.router import router
+        from app.auth import get_current_user
+        from app.database import get_async_session, get_read_session, get_session
+        from app.migrations import run_migrations
+        from app.models import Diary, Notebook, ShareToken, Tag, User
+
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        db_path = Path(cls.temp_dir.name) / "journey.db"
+        cls.engine = create_engine(f"sqlite:///{db_path}")
+        # NullPool：连接随请求关闭，不会残留在 TestClient 的事件循环里
+        cls.async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+        run_migrations(cls.engine)
+
+        now = datetime.now(timezone.utc)
+        with Session(cls.engine) as session:
+            users = [User(username=f"user-{index}", hashed_password="x") for index in range(3)]
+            session.add_all(users)
+            session.commit()
+            for user in users:
+                for notebook_index in range(3):
+                    notebook = Notebook(name=f"notebook-{notebook_index}", user_id=user.id)
+                    session.add(notebook)
+                    session.commit()
+                    for day in range(12):
+                        session.add(
+                            Diary(
+                                notebook_id=notebook.id,
+                                user_id=user.id,
+                                title=f"entry {day}",
+                                content={"type": "doc", "content": []},
+                                date=now - timedelta(days=day * 45),
+                                mood={"label": "Happy" if day % 2 else "Sad"},
+                                weather_snapshot={"weather": "sunny" if day % 3 else "rainy"},
+                                is_pinned=day % 5 == 0,
+                                tags=[Tag(name=f"tag-{user.id}-{notebook_index}-{day}")] if day else [Tag(name=f"tag-{user.id}-{notebook_index}")],
+                            )
+                        )
+                    session.commit()
+            session.add(ShareToken(token="share-token", notebook_id=1, created_by=1))
+            session.commit()
+            cls.user = session.get(User, 1)
+            session.expunge(cls.user)
+
+        def override_session():
+            with Session(cls.engine) as session:
+                yield session
+
+        async def override_async_session():
+            async with AsyncSession(cls.async_engine, expire_on_commit=False) as session:
+                yield session
+
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_session] = override_session
+        app.dependency_overrides[get_read_session] = override_session
+        app.dependency_overrides[get_async_session] = override_async_session
+        app.dependency_overrides[get_current_user] = lambda: cls.user
+        cls.router = router
+        cls.client = TestClient(app)
+
+        cls.statements: list[tuple[str, tuple]] = []
+        event.listen(cls.engine, "before_cursor_execute", cls._capture)
+        event.listen(cls.async_engine.sync_engine, "before_cursor_execute", cls._capture)
+
+    @classmethod
+    def _capture(cls, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            cls.statements.append((statement, parameters))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        event.remove(cls.engine, "before_cursor_execute", cls._capture)
+        event.remove(cls.async_engine.sync_engine, "before_cursor_execute", cls._capture)
+        cls.engine.dispose()
+        cls.temp_dir.cleanup()
+
+    def _plan_details(self, url: str) -> list[str]:
+        from app.api.app.public_share import share_resolution_cache
+        from app.api.app.response_cache import public_response_cache, response_cache
+
+        response_cache.clear()
+        public_response_cache.clear()
+        share_resolution_cache.clear()
+        self.statements.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, msg=f"{url}: {response.text}")
+
+        details: list[str] = []
+        with self.engine.connect() as conn:
+            for statement, parameters in list(self.statements):
+                rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                details.extend(row[3] for row in rows)
+        return details
+
+    def _assert_plan(self, url: str, expected_indexes: set[str]) -> None:
+        details = self._plan_details(url)
+        full_scans = [detail for detail in details if FULL_SCAN.match(detail)]
+        self.assertEqual(full_scans, [], msg=f"{url} full table scan:\n" + "\n".join(details))
+        for index_name in expected_indexes:
+            self.assertTrue(
+                any(index_name in detail for detail in details),
+                msg=f"{url} does not use {index_name}:\n" + "\n".join(details),
+            )
+
+    def test_every_app_endpoint_has_a_plan_expectation(self) -> None:
+        paths = {route.path for route in self.router.routes if isinstance(route, APIRoute)}
+        self.assertEqual(paths, set(ENDPOINT_PLANS))
+
+    def test_app_endpoints_use_hot_query_indexes(self) -> None:
+        for url, expected_indexes in [*ENDPOINT_PLANS.values(), *EXTRA_REQUESTS]:
+            with self.subTest(url=url):
+                self._assert_plan(url, expected_indexes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,6 +41,61 @@ class CoverImageHelperTest(unittest.TestCase):
             self.assertEqual(local_file.read_bytes(), b"png-bytes")
             get_mock.assert_called_once()
 
+    def test_existing_cache_skips_download_and_refresh_sends_validators(self) -> None:
+        from app.modules.journaling.helpers.cover_image import cache_remote_cover_image
+
+        class FakeResponse:
+            def __init__(self, status_code: int, headers: dict, content: bytes = b"") -> None:
+                self.status_code = status_code
+                self.headers = headers
+                self.content = content
+
+            def raise_for_status(self) -> None:
+                return None
+
+        url = "https://example.com/cover.png"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir)
+            first = FakeResponse(200, {"content-type": "image/png", "etag": '"v1"'}, b"png-bytes")
+            with patch("app.modules.journaling.helpers.cover_image.httpx.get", return_value=first):
+                cached_path = cache_remote_cover_image(url, cache_dir=cache_dir)
+
+            with patch("app.modules.journaling.helpers.cover_image.httpx.get") as get_mock:
+                self.assertEqual(cache_remote_cover_image(url, cache_dir=cache_dir), cached_path)
+            get_mock.assert_not_called()
+
+            not_modified = FakeResponse(304, {"etag": '"v1"'})
+            with patch("app.modules.journaling.helpers.cover_image.httpx.get", return_value=not_modified) as get_mock:
+                self.assertEqual(cache_remote_cover_image(url, cache_dir=cache_dir, refresh=True), cached_path)
+            self.assertEqual(get_mock.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+            self.assertEqual((cache_dir / cached_path.removeprefix("/cover_cache/")).read_bytes(), b"png-bytes")
+
+    def test_background_cover_job_only_replaces_unchanged_cover(self) -> None:
+        from sqlalchemy import create_engine
+        from sqlmodel import Session, SQLModel
+
+        import app.models  # noqa: F401
+        from app.models import Diary
+        from app.modules.journaling import diaries_router
+
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(Diary(id=1, notebook_id=1, title="a", content={}, cover_image_url="https://example.com/a.png"))
+            session.add(Diary(id=2, notebook_id=1, title="b", content={}, cover_image_url="/uploads/edited.png"))
+            session.commit()
+
+        with patch.object(diaries_router, "engine", engine), patch.object(
+            diaries_router, "cache_remote_cover_image", return_value="/cover_cache/a.png"
+        ):
+            diaries_router.cache_diary_cover(1, "https://example.com/a.png", "https://example.com/a.png")
+            diaries_router.cache_diary_cover(2, "https://example.com/a.png", "https://example.com/a.png")
+
+        with Session(engine) as session:
+            self.assertEqual(session.get(Diary, 1).cover_image_url, "/cover_cache/a.png")
+            self.assertEqual(session.get(Diary, 2).cover_image_url, "/uploads/edited.png")
+        engine.dispose()
+
     def test_entry_card_schema_includes_cover_image_url(self) -> None:
         from app.api.app.schemas import EntryCard
 
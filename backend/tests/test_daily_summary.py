@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+
+class FakeResponse:
+    status_code = 200
+
+    def json(self):
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return {"bookmarks": [{"id": "b1", "createdAt": f"{today}T06:01:41.000Z", "content": {"title": "Article", "url": "https://example.com"}}]}
+
+
+class FakeAsyncClient:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, *args, **kwargs):
+        return FakeResponse()
+
+
+class DailySummaryTest(unittest.TestCase):
+    def test_triggered_summary_writes_without_waiting_for_the_request_connection(self) -> None:
+        from cryptography.fernet import Fernet
+
+        import app.models  # noqa: F401
+        from app.database import get_read_session
+        from app.models import Diary, Notebook, User
+        from app.modules.automation import tasks_router
+        from app.security import encrypt_data
+        from app.write_queue import WriteQueue
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch("app.config.settings.ENCRYPTION_KEY", Fernet.generate_key().decode()):
+            db_path = Path(temp_dir) / "journey.db"
+            # 与生产一致的单连接写引擎；等待写连接超时即说明有请求占着它
+            engine = create_engine(f"sqlite:///{db_path}", pool_size=1, max_overflow=0, pool_timeout=1)
+            read_engine = create_engine(f"sqlite:///{db_path}")
+            SQLModel.metadata.create_all(engine)
+            with Session(engine) as session:
+                session.add(User(
+                    id=1, username="u", hashed_password="x", karakeep_url="https://karakeep.test",
+                    karakeep_api_key=encrypt_data("k"), ai_api_key=encrypt_data("a"),
+                ))
+                session.commit()
+
+            def override_session():
+                with Session(read_engine) as session:
+                    yield session
+
+            async def summary(user, bookmarks):
+                return "**Reading** notes"
+
+            app = FastAPI()
+            app.include_router(tasks_router.router)
+            app.dependency_overrides[get_read_session] = override_session
+            with (
+                patch.object(tasks_router, "read_engine", read_engine),
+                patch.object(tasks_router, "write_queue", WriteQueue(engine)),
+                patch.object(tasks_router.httpx, "AsyncClient", FakeAsyncClient),
+                patch.object(tasks_router, "generate_ai_summary", summary),
+            ):
+                response = TestClient(app).post("/api/tasks/trigger-daily-summary")
+
+            self.assertEqual(response.json(), {"status": "started", "count": 1})
+            with Session(read_engine) as session:
+                notebook = session.exec(select(Notebook).where(Notebook.name == "Everyday Reading")).one()
+                diary = session.exec(select(Diary)).one()
+                self.assertEqual(diary.notebook_id, notebook.id)
+                self.assertEqual(notebook.stats_snapshot["total_entries"], 1)
+                self.assertEqual(session.get(User, 1).data_version, 1)
+            engine.dispose()
+            read_engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
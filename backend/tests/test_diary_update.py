@@ -0,0 +1,237 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import BackgroundTasks
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel, select
+
+
+class DiaryUpdateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import Notebook, User
+
+        self.engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(Notebook(id=1, name="n", user_id=1))
+            session.commit()
+            self.user = session.get(User, 1)
+            session.expunge(self.user)
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def _save(self, diary_id: int, **fields):
+        from app.modules.journaling.diaries_router import update_diary
+        from app.schemas import DiaryCreate
+
+        payload = DiaryCreate(**{"notebook_id": 1, "title": "t", "tags": ["a"], **fields})
+        with Session(self.engine) as session:
+            return update_diary(diary_id, payload, BackgroundTasks(), self.user, session)
+
+    def test_unchanged_content_skips_derived_work(self) -> None:
+        from app.models import Diary
+        from app.modules.journaling.helpers.content_stats import content_digest, walk_content
+
+        content = {"type": "doc", "content": [{"type": "text", "text": "hello world"}]}
+        with Session(self.engine) as session:
+            session.add(Diary(id=1, notebook_id=1, user_id=1, title="t", content=content))
+            session.commit()
+
+        word_count, _ = walk_content(content)
+        first = self._save(1, content=content)
+        self.assertEqual(first.word_count, word_count)
+        self.assertEqual(first.content_digest, content_digest(content))
+
+        statements: list[str] = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        with patch("app.modules.journaling.diaries_router.analyze_content") as walk_mock, patch(
+            "app.modules.journaling.diaries_router.cover_url_for_source"
+        ) as cover_mock:
+            second = self._save(1, content=dict(reversed(list(content.items()))), title="renamed")
+
+        walk_mock.assert_not_called()
+        cover_mock.assert_not_called()
+        self.assertEqual((second.title, second.word_count), ("renamed", word_count))
+        self.assertFalse(any("INTO tag" in statement or "notebook SET" in statement for statement in statements))
+
+    def _assert_writer_free_for_cover_job(self, save) -> None:
+        """保存返回后、会话关闭前（即后台任务运行时）写连接必须已归还，封面任务能立即拿到它"""
+        import tempfile
+        from pathlib import Path
+
+        from app.models import Diary, Notebook, User
+        from app.modules.journaling import diaries_router
+        from app.schemas import DiaryRead
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = create_engine(f"sqlite:///{Path(temp_dir) / 'journey.db'}", pool_size=1, max_overflow=0, pool_timeout=1)
+            SQLModel.metadata.create_all(engine)
+            with Session(engine) as session:
+                session.add(User(id=1, username="u", hashed_password="x"))
+                session.add(Notebook(id=1, name="n", user_id=1))
+                session.add(Diary(id=1, notebook_id=1, user_id=1, title="t", content={"type": "doc", "content": []}))
+                session.commit()
+
+            image = {"type": "doc", "content": [{"type": "image", "attrs": {"src": "https://example.com/a.png"}}]}
+            background_tasks = BackgroundTasks()
+            with Session(engine) as session:
+                saved = save(session, background_tasks, image)
+                with patch.object(diaries_router, "engine", engine), patch.object(
+                    diaries_router, "cache_remote_cover_image", return_value="/cover_cache/a.png"
+                ):
+                    for task in background_tasks.tasks:
+                        task.func(*task.args, **task.kwargs)
+                self.assertEqual(DiaryRead.model_validate(saved, from_attributes=True).cover_image_url, "https://example.com/a.png")
+
+            with Session(engine) as session:
+                self.assertEqual(session.get(Diary, 1).cover_image_url, "/cover_cache/a.png")
+            engine.dispose()
+
+    def test_save_releases_writer_before_cover_caching(self) -> None:
+        from app.modules.journaling.diaries_router import update_diary
+        from app.schemas import DiaryCreate
+
+        self._assert_writer_free_for_cover_job(
+            lambda session, background_tasks, content: update_diary(
+                1, DiaryCreate(notebook_id=1, title="t", content=content), background_tasks, self.user, session
+            )
+        )
+
+    def test_patch_releases_writer_before_cover_caching(self) -> None:
+        from app.modules.journaling.diaries_router import patch_diary
+        from app.schemas import DiaryPatch
+
+        self._assert_writer_free_for_cover_job(
+            lambda session, background_tasks, content: patch_diary(
+                1, DiaryPatch(content=content), background_tasks, self.user, session
+            )
+        )
+
+    def _patch(self, diary_id: int, **fields):
+        from app.modules.journaling.diaries_router import patch_diary
+        from app.schemas import DiaryPatch
+
+        with Session(self.engine) as session:
+            return patch_diary(diary_id, DiaryPatch(**fields), BackgroundTasks(), self.user, session)
+
+    def test_patch_writes_only_given_fields_and_applies_content_patch(self) -> None:
+        from app.models import Diary, Notebook
+        from app.modules.journaling.helpers.content_stats import walk_content
+
+        content = {"type": "doc", "content": [{"type": "text", "text": "hello"}]}
+        with Session(self.engine) as session:
+            session.add(Diary(id=1, notebook_id=1, user_id=1, title="t", content=content, mood={"label": "Happy"}))
+            session.commit()
+
+        renamed = self._patch(1, title="renamed")
+        self.assertEqual((renamed.title, renamed.mood, renamed.version), ("renamed", {"label": "Happy"}, 2))
+
+        patched = self._patch(
+            1,
+            version=2,
+            content_patch=[{"op": "add", "path": "/content/-", "value": {"type": "text", "text": " world"}}],
+        )
+        expected = {"type": "doc", "content": [{"type": "text", "text": "hello"}, {"type": "text", "text": " world"}]}
+        self.assertEqual(patched.content, expected)
+        self.assertEqual(patched.word_count, walk_content(expected)[0])
+        self.assertEqual(patched.version, 3)
+        with Session(self.engine) as session:
+            self.assertEqual(session.get(Notebook, 1).stats_snapshot["total_words"], patched.word_count)
+
+    def test_patch_rejects_stale_version_and_invalid_patch(self) -> None:
+        from fastapi import HTTPException
+
+        from app.models import Diary
+
+        with Session(self.engine) as session:
+            session.add(Diary(id=1, notebook_id=1, user_id=1, title="t", content={"type": "doc", "content": []}, version=4))
+            session.commit()
+
+        with self.assertRaises(HTTPException) as stale:
+            self._patch(1, version=3, title="late")
+        self.assertEqual(stale.exception.status_code, 409)
+        self.assertEqual(stale.exception.detail["version"], 4)
+
+        with self.assertRaises(HTTPException) as invalid:
+            self._patch(1, version=4, content_patch=[{"op": "remove", "path": "/content/0"}])
+        self.assertEqual(invalid.exception.status_code, 422)
+
+        for value in ("oops", {"type": "paragraph"}):
+            with self.assertRaises(HTTPException) as replaced_root:
+                self._patch(1, version=4, content_patch=[{"op": "replace", "path": "", "value": value}])
+            self.assertEqual(replaced_root.exception.status_code, 422)
+
+        with Session(self.engine) as session:
+            diary = session.get(Diary, 1)
+            self.assertEqual((diary.title, diary.version), ("t", 4))
+
+    def _bulk(self, operations):
+        from app.modules.journaling.diaries_router import bulk_diaries
+        from app.schemas import DiaryBulkRequest
+
+        with Session(self.engine) as session:
+            return bulk_diaries(DiaryBulkRequest(operations=operations), BackgroundTasks(), self.user, session)
+
+    def test_bulk_operations_aggregate_notebook_stats_and_tag_usage(self) -> None:
+        from app.models import Diary, Notebook, UserTagUsage
+        from app.modules.journaling.helpers.content_stats import walk_content
+
+        content = {"type": "doc", "content": [{"type": "text", "text": "hi"}]}
+        words, _ = walk_content(content)
+        with Session(self.engine) as session:
+            session.add(Notebook(id=2, name="m", user_id=1))
+            session.commit()
+        created = self._bulk(
+            [{"op": "create", "diary": {"notebook_id": 1, "content": content, "tags": ["a", "b"]}} for _ in range(3)]
+        )
+        first, second, third = (item.id for item in created.results)
+
+        statements: list[str] = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        result = self._bulk(
+            [
+                {"op": "move", "id": first, "notebook_id": 2},
+                {"op": "move", "id": second, "notebook_id": 2},
+                {"op": "tag", "id": second, "add_tags": ["c"], "remove_tags": ["a"]},
+                {"op": "update", "id": third, "changes": {"title": "renamed"}},
+                {"op": "delete", "id": third},
+            ]
+        )
+
+        self.assertEqual([item.op for item in result.results], ["move", "move", "tag", "update", "delete"])
+        self.assertEqual(sum("UPDATE notebook" in statement for statement in statements), 2)
+        with Session(self.engine) as session:
+            self.assertEqual(session.get(Notebook, 1).stats_snapshot, {"total_words": 0, "total_entries": 0})
+            self.assertEqual(session.get(Notebook, 2).stats_snapshot, {"total_words": 2 * words, "total_entries": 2})
+            self.assertIsNone(session.get(Diary, third))
+            usage = {row.tag: row.count for row in session.exec(select(UserTagUsage)).all()}
+        self.assertEqual(usage, {"a": 1, "b": 2, "c": 1})
+
+    def test_bulk_rolls_back_all_operations_on_failure(self) -> None:
+        from fastapi import HTTPException
+
+        from app.models import Diary
+
+        with Session(self.engine) as session:
+            session.add(Diary(id=1, notebook_id=1, user_id=1, title="t", content={"type": "doc", "content": []}))
+            session.commit()
+
+        with self.assertRaises(HTTPException) as failure:
+            self._bulk([{"op": "update", "id": 1, "changes": {"title": "changed"}}, {"op": "delete", "id": 99}])
+        self.assertEqual((failure.exception.status_code, failure.exception.detail["index"]), (404, 1))
+        with Session(self.engine) as session:
+            self.assertEqual(session.get(Diary, 1).title, "t")
+
+        root_patch = [{"op": "replace", "path": "", "value": "oops"}]
+        with self.assertRaises(HTTPException) as invalid:
+            self._bulk([{"op": "update", "id": 1, "changes": {"version": 1, "content_patch": root_patch}}])
+        self.assertEqual((invalid.exception.status_code, invalid.exception.detail["index"]), (422, 0))
+        with Session(self.engine) as session:
+            self.assertEqual(session.get(Diary, 1).content, {"type": "doc", "content": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
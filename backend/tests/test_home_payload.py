@@ -0,0 +1,115 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, select
+
+
+class _UncachedView:
+    def hit(self):
+        return None
+
+    def store(self, payload):
+        return payload
+
+
+class HomePayloadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import Notebook, User
+
+        # 写队列在线程中执行写任务，内存库需共享同一个连接
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x", timezone="Asia/Shanghai"))
+            session.add(User(id=2, username="v", hashed_password="x"))
+            session.add(Notebook(id=1, name="n", user_id=1))
+            session.add(Notebook(id=2, name="m", user_id=2))
+            session.commit()
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def _user(self, session: Session, user_id: int = 1):
+        from app.models import User
+
+        return session.get(User, user_id)
+
+    def _add(self, session: Session, user_id: int, date: datetime, **fields):
+        from app.models import Diary
+        from app.modules.journaling.helpers.local_dates import local_month_day
+
+        user = self._user(session, user_id)
+        diary = Diary(
+            notebook_id=user_id, user_id=user_id, title=fields.pop("title", "t"), content={"type": "doc", "content": []},
+            date=date, month_day=local_month_day(date, user.timezone, user.time_offset_mins), **fields,
+        )
+        session.add(diary)
+        session.commit()
+        return diary.id
+
+    def test_local_dates_follow_timezone_and_offset(self) -> None:
+        from app.modules.journaling.helpers.local_dates import local_day_start, local_month_day
+
+        moment = datetime(2025, 12, 31, 20, tzinfo=timezone.utc)
+        self.assertEqual(local_month_day(moment, "UTC"), "12-31")
+        self.assertEqual(local_month_day(moment, "Asia/Shanghai"), "01-01")
+        self.assertEqual(local_month_day(moment, "UTC", 300), "01-01")
+        self.assertEqual(local_month_day(moment, "Not/AZone"), "12-31")
+        self.assertEqual(local_day_start(moment, "Asia/Shanghai"), datetime(2025, 12, 31, 16, tzinfo=timezone.utc))
+
+    def test_home_payload_is_one_query_with_all_past_years_on_this_day(self) -> None:
+        from app.api.app.home_router import get_home_payload
+        from app.modules.journaling.helpers.local_dates import to_user_local
+
+        now = datetime.now(timezone.utc)
+        local_now = to_user_local(now, "Asia/Shanghai")
+        # 本地今天中午（UTC+8）对应的 UTC 时间，往前推若干年得到"那年今日"
+        noon = datetime(local_now.year, local_now.month, local_now.day, 4, tzinfo=timezone.utc)
+        if (noon.month, noon.day) == (2, 29):
+            self.skipTest("no same month-day in non-leap years")
+        with Session(self.engine) as session:
+            today = self._add(session, 1, now - timedelta(minutes=1), title="today")
+            pinned = self._add(session, 1, now - timedelta(days=3), is_pinned=True)
+            one_year = self._add(session, 1, noon.replace(year=noon.year - 1))
+            three_years = self._add(session, 1, noon.replace(year=noon.year - 3))
+            self._add(session, 1, noon - timedelta(days=400))
+            self._add(session, 2, noon - timedelta(days=365))
+
+            user = self._user(session)
+            statements: list[str] = []
+            event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+            payload = get_home_payload(limit=3, user=user, session=session, view=_UncachedView())
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn("UNION ALL", statements[0])
+        # 分区内的顺序由外层 ORDER BY 保证，不依赖子查询排序在 UNION ALL 后保留
+        self.assertTrue(statements[0].rstrip().endswith("ORDER BY section, date DESC, id DESC"))
+        self.assertNotIn("content", statements[0].split("FROM")[0])
+        self.assertEqual([card.id for card in payload.pinned], [pinned])
+        self.assertEqual([card.id for card in payload.recent], [today, pinned, one_year])
+        self.assertEqual([card.id for card in payload.on_this_day], [one_year, three_years])
+
+    def test_timezone_change_recomputes_month_day(self) -> None:
+        from app.models import Diary
+        from app.modules.identity.users_router import update_user_me
+        from app.schemas import UserUpdate
+        from app.write_queue import WriteQueue
+
+        with Session(self.engine) as session:
+            diary_id = self._add(session, 1, datetime(2025, 3, 1, 20, tzinfo=timezone.utc))
+            self.assertEqual(session.get(Diary, diary_id).month_day, "03-02")
+
+        import asyncio
+
+        with Session(self.engine) as session:
+            user = self._user(session)
+        asyncio.run(update_user_me(UserUpdate(timezone="UTC"), user, WriteQueue(self.engine)))
+        with Session(self.engine) as session:
+            self.assertEqual(session.exec(select(Diary.month_day).where(Diary.id == diary_id)).one(), "03-01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
 
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel, select
+
 
 class JournalingHelpersTest(unittest.TestCase):
     def test_walk_content_counts_words_and_images(self) -> None:
@@ -22,6 +25,136 @@ class JournalingHelpersTest(unittest.TestCase):
 
         self.assertEqual(walk_content(content), (17, 2))
 
+    def test_analyze_content_collects_all_derived_fields_in_one_pass(self) -> None:
+        from app.modules.journaling.helpers.content_stats import analyze_content, content_digest
+
+        content = {
+            "type": "doc",
+            "content": [
+                {"type": "paragraph", "content": [{"type": "text", "text": "Hel"}, {"type": "text", "text": "lo"}]},
+                {"type": "image", "attrs": {"src": ""}},
+                {"type": "blockquote", "content": [{"type": "image", "attrs": {"src": "/uploads/a.png"}}]},
+                {"type": "video", "attrs": {"src": "/uploads/b.mp4"}},
+                {"type": "image", "attrs": {"src": "https://example.com/c.png"}},
+                "not-a-node",
+            ],
+        }
+
+        analysis = analyze_content(content)
+
+        self.assertEqual(analysis.text, "Hello")
+        self.assertEqual(analysis.image_count, 3)
+        self.assertEqual(analysis.first_image_src, "/uploads/a.png")
+        self.assertEqual(analysis.local_media, {"/uploads/a.png", "/uploads/b.mp4"})
+        self.assertEqual(analysis.digest, content_digest(content))
+        self.assertEqual(analyze_content(None).word_count, 0)
+
+    def test_sync_tags_uses_constant_number_of_statements(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import Tag
+        from app.modules.journaling.helpers.tags import sync_tags
+
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        statements: list[str] = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        with Session(engine) as session:
+            session.add(Tag(name="existing"))
+            session.commit()
+            statements.clear()
+
+            names = [" existing ", "", *[f"tag-{index}" for index in range(20)], "tag-0"]
+            tags = sync_tags(session, names)
+            self.assertEqual([tag.name for tag in tags], ["existing", *[f"tag-{index}" for index in range(20)]])
+            self.assertTrue(all(tag.id for tag in tags))
+            self.assertEqual(len(statements), 3)
+
+            statements.clear()
+            self.assertEqual([tag.id for tag in sync_tags(session, names)], [tag.id for tag in tags])
+            self.assertEqual(len(statements), 1)
+        engine.dispose()
+
+
+    def test_tag_usage_counts_follow_diary_tag_changes(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import User, UserTagUsage
+        from app.modules.journaling.helpers.tags import apply_tag_usage, tag_usage_deltas
+
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+
+        def usage(session) -> dict[str, int]:
+            return {row.tag: row.count for row in session.exec(select(UserTagUsage)).all()}
+
+        with Session(engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            apply_tag_usage(session, 1, tag_usage_deltas([], ["trip", "food"]))
+            apply_tag_usage(session, 1, tag_usage_deltas([], ["trip"]))
+            self.assertEqual(usage(session), {"trip": 2, "food": 1})
+
+            apply_tag_usage(session, 1, tag_usage_deltas(["trip", "food"], ["trip", "work"]))
+            self.assertEqual(usage(session), {"trip": 2, "work": 1})
+
+            apply_tag_usage(session, 1, {"trip": -2, "work": -1})
+            self.assertEqual(usage(session), {})
+        engine.dispose()
+
+    def test_tag_prefix_lookup_ignores_case(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import User
+        from app.modules.journaling.helpers.tags import apply_tag_usage
+        from app.modules.journaling.tags_router import list_tags
+
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+
+        with Session(engine) as session:
+            user = User(id=1, username="u", hashed_password="x")
+            session.add(user)
+            apply_tag_usage(session, 1, {"Trip": 2, "trip-2025": 1, "Éclair": 1, "work": 1})
+            self.assertEqual(list_tags(q=" tR", limit=100, offset=0, current_user=user, session=session), ["Trip", "trip-2025"])
+            self.assertEqual(list_tags(q="éc", limit=100, offset=0, current_user=user, session=session), ["Éclair"])
+        engine.dispose()
+
+    def test_build_snippet_centers_on_first_hit_and_returns_highlights(self) -> None:
+        from app.modules.journaling.helpers.snippets import build_snippet
+
+        text = "a" * 100 + " Morning RIVER walk by the river " + "b" * 100
+        snippet, highlights = build_snippet(text, "river  morning", radius=40)
+
+        self.assertTrue(snippet.startswith("…") and snippet.endswith("…"))
+        self.assertEqual([snippet[start:end] for start, end in highlights], ["Morning", "RIVER", "river"])
+        self.assertEqual(build_snippet("short text", "missing"), ("short text", []))
+
+    def test_apply_json_patch_follows_rfc6902(self) -> None:
+        from app.modules.journaling.helpers.json_patch import JsonPatchError, apply_json_patch
+
+        document = {"a/b": 1, "list": [1, 2, 3], "nested": {"x": {"y": 1}}}
+        result = apply_json_patch(
+            document,
+            [
+                {"op": "test", "path": "/a~1b", "value": 1},
+                {"op": "replace", "path": "/list/0", "value": 10},
+                {"op": "add", "path": "/list/1", "value": 15},
+                {"op": "remove", "path": "/list/3"},
+                {"op": "copy", "from": "/nested/x", "path": "/copied"},
+                {"op": "move", "from": "/nested/x/y", "path": "/list/-"},
+            ],
+        )
+
+        self.assertEqual(result, {"a/b": 1, "list": [10, 15, 2, 1], "nested": {"x": {}}, "copied": {"y": 1}})
+        self.assertEqual(document["list"], [1, 2, 3])
+        for operations in (
+            [{"op": "test", "path": "/a~1b", "value": 2}],
+            [{"op": "remove", "path": "/missing"}],
+            [{"op": "add", "path": "/list/9", "value": 0}],
+            [{"op": "move", "from": "/nested", "path": "/nested/x"}],
+            [{"op": "increment", "path": "/list/0"}],
+        ):
+            with self.assertRaises(JsonPatchError):
+                apply_json_patch(document, operations)
+
 
 if __name__ == "__main__":
     unittest.main()
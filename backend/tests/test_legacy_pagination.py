@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+
+class LegacyPaginationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import Diary, Notebook, User
+
+        self.engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(self.engine)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(Notebook(id=1, name="n", user_id=1))
+            for diary_id in range(1, 8):
+                # 两两同一天，验证 (date, id) 键集在日期相同时不重不漏
+                date = start + timedelta(days=diary_id // 2)
+                session.add(Diary(id=diary_id, notebook_id=1, user_id=1, content={}, date=date, is_pinned=diary_id % 2 == 1))
+            session.commit()
+            self.user = session.get(User, 1)
+            session.expunge(self.user)
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def _pages(self, fetch) -> list[list[int]]:
+        pages, cursor = [], None
+        while True:
+            response = Response()
+            with Session(self.engine) as session:
+                pages.append([diary.id for diary in fetch(response, cursor, session)])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return pages
+
+    def test_timeline_and_diary_lists_page_by_keyset_cursor(self) -> None:
+        from app.modules.discovery.timeline_router import get_timeline
+        from app.modules.journaling.diaries_router import get_pinned, list_by_notebook
+
+        timeline = self._pages(
+            lambda response, cursor, session: get_timeline(
+                response, None, None, None, None, None, cursor, 3, self.user, session
+            )
+        )
+        by_notebook = self._pages(
+            lambda response, cursor, session: list_by_notebook(1, response, 3, cursor, 0, self.user, session)
+        )
+        pinned = self._pages(lambda response, cursor, session: get_pinned(response, 2, cursor, self.user, session))
+
+        self.assertEqual(timeline, [[7, 6, 5], [4, 3, 2], [1]])
+        self.assertEqual(by_notebook, timeline)
+        self.assertEqual(pinned, [[7, 5], [3, 1]])
+
+    def test_public_notebook_share_is_capped_and_continues_on_app_endpoint(self) -> None:
+        import json
+        from unittest.mock import patch
+
+        from starlette.requests import Request
+
+        from app.api.app.public_share import PublicShareView, resolve_share, share_resolution_cache
+        from app.api.app.public_share_entries_router import get_public_share_entries
+        from app.api.app.response_cache import public_response_cache
+        from app.models import ShareToken
+        from app.modules.sharing.share_router import get_shared_content
+
+        with Session(self.engine) as session:
+            session.add(ShareToken(token="public", notebook_id=1, created_by=1))
+            session.commit()
+        share_resolution_cache.clear()
+        public_response_cache.clear()
+
+        with patch("app.config.settings.PUBLIC_SHARE_PAGE_SIZE", 3), Session(self.engine) as session:
+            share = resolve_share(session, "public")
+            view = lambda path: PublicShareView(share, Request({"type": "http", "path": path, "headers": []}))  # noqa: E731
+            response = get_shared_content(None, 500, view("/api/share/public"), session)
+            first = json.loads(response.body)
+            rest_view = view("/api/app/public/shares/public/entries")
+            rest = json.loads(get_public_share_entries(first["next_cursor"], 100, rest_view, session).body)
+
+        self.assertEqual([diary["id"] for diary in first["diaries"]], [7, 6, 5])
+        self.assertEqual(response.headers["X-Next-Cursor"], first["next_cursor"])
+        self.assertEqual([item["id"] for item in rest["items"]], [4, 3, 2])
+        self.assertTrue(rest["page"]["has_more"])
+
+    def test_invalid_cursor_is_rejected(self) -> None:
+        from app.modules.journaling.diaries_router import get_recent
+
+        with Session(self.engine) as session, self.assertRaises(HTTPException) as error:
+            get_recent(Response(), 5, "not-a-cursor", 0, self.user, session)
+        self.assertEqual(error.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
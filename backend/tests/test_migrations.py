@@ -0,0 +1,221 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, inspect, text
+
+
+def _engine(temp_dir: str):
+    return create_engine(f"sqlite:///{Path(temp_dir) / 'journey.db'}")
+
+
+class MigrationRunnerTest(unittest.TestCase):
+    def test_fresh_database_is_created_and_stamped_at_head(self) -> None:
+        from app.migrations import current_version, head_version, run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            self.assertEqual(run_migrations(engine), head_version())
+            self.assertEqual(current_version(engine), head_version())
+            self.assertIn("diary", inspect(engine).get_table_names())
+
+            statements: list[str] = []
+            event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+            run_migrations(engine)
+            self.assertEqual(len(statements), 1)
+            self.assertIn("schema_version", statements[0])
+            engine.dispose()
+
+    def test_legacy_database_gets_missing_columns(self) -> None:
+        from app.migrations import run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with engine.begin() as conn:
+                conn.exec_driver_sql('CREATE TABLE "tag" (id INTEGER PRIMARY KEY)')
+                conn.exec_driver_sql('INSERT INTO "tag" (id) VALUES (1)')
+
+            run_migrations(engine)
+
+            columns = {col["name"] for col in inspect(engine).get_columns("tag")}
+            self.assertIn("name", columns)
+            with engine.connect() as conn:
+                self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM "tag"')).scalar(), 1)
+            engine.dispose()
+
+    def test_legacy_diaries_get_user_id_backfilled(self) -> None:
+        from app.migrations import run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with engine.begin() as conn:
+                conn.exec_driver_sql('CREATE TABLE "notebook" (id INTEGER PRIMARY KEY, user_id INTEGER)')
+                conn.exec_driver_sql('CREATE TABLE "diary" (id INTEGER PRIMARY KEY, notebook_id INTEGER)')
+                conn.exec_driver_sql('INSERT INTO "notebook" (id, user_id) VALUES (1, 7), (2, 9)')
+                conn.exec_driver_sql('INSERT INTO "diary" (id, notebook_id) VALUES (1, 1), (2, 2), (3, 1)')
+
+            run_migrations(engine)
+
+            with engine.connect() as conn:
+                rows = conn.execute(text('SELECT id, user_id FROM "diary" ORDER BY id')).all()
+            self.assertEqual([tuple(row) for row in rows], [(1, 7), (2, 9), (3, 7)])
+            engine.dispose()
+
+    def test_tag_usage_is_backfilled_per_user(self) -> None:
+        from app.migrations import run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with engine.begin() as conn:
+                conn.exec_driver_sql('CREATE TABLE "user" (id INTEGER PRIMARY KEY)')
+                conn.exec_driver_sql('CREATE TABLE "notebook" (id INTEGER PRIMARY KEY, user_id INTEGER)')
+                conn.exec_driver_sql('CREATE TABLE "diary" (id INTEGER PRIMARY KEY, notebook_id INTEGER)')
+                conn.exec_driver_sql('CREATE TABLE "tag" (id INTEGER PRIMARY KEY, name VARCHAR)')
+                conn.exec_driver_sql('CREATE TABLE "diarytaglink" (diary_id INTEGER, tag_id INTEGER, PRIMARY KEY (diary_id, tag_id))')
+                conn.exec_driver_sql('INSERT INTO "user" (id) VALUES (7), (9)')
+                conn.exec_driver_sql('INSERT INTO "notebook" (id, user_id) VALUES (1, 7), (2, 9)')
+                conn.exec_driver_sql('INSERT INTO "diary" (id, notebook_id) VALUES (1, 1), (2, 1), (3, 2)')
+                conn.exec_driver_sql('INSERT INTO "tag" (id, name) VALUES (1, \'trip\'), (2, \'work\')')
+                conn.exec_driver_sql('INSERT INTO "diarytaglink" (diary_id, tag_id) VALUES (1, 1), (2, 1), (2, 2), (3, 1)')
+
+            run_migrations(engine)
+
+            with engine.connect() as conn:
+                rows = conn.execute(text('SELECT user_id, tag, count FROM "usertagusage" ORDER BY user_id, tag')).all()
+            self.assertEqual([tuple(row) for row in rows], [(7, "trip", 2), (7, "work", 1), (9, "trip", 1)])
+            engine.dispose()
+
+    def test_tag_usage_key_is_backfilled_lowercase(self) -> None:
+        from app.migrations import run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with engine.begin() as conn:
+                conn.exec_driver_sql('CREATE TABLE "user" (id INTEGER PRIMARY KEY)')
+                conn.exec_driver_sql(
+                    'CREATE TABLE "usertagusage" (user_id INTEGER, tag VARCHAR, count INTEGER, last_used DATETIME, '
+                    "PRIMARY KEY (user_id, tag))"
+                )
+                conn.exec_driver_sql('INSERT INTO "user" (id) VALUES (7)')
+                conn.exec_driver_sql(
+                    "INSERT INTO \"usertagusage\" (user_id, tag, count) VALUES (7, 'Trip', 2), (7, '\u00c9clair', 1)"
+                )
+
+            run_migrations(engine)
+
+            with engine.connect() as conn:
+                rows = conn.execute(text('SELECT tag, tag_key FROM "usertagusage" ORDER BY tag')).all()
+            self.assertEqual([tuple(row) for row in rows], [("Trip", "trip"), ("Éclair", "éclair")])
+            self.assertIn("ix_usertagusage_user_key", {index["name"] for index in inspect(engine).get_indexes("usertagusage")})
+            engine.dispose()
+
+    def test_month_day_is_backfilled_in_user_timezone(self) -> None:
+        from app.migrations import run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with engine.begin() as conn:
+                conn.exec_driver_sql('CREATE TABLE "user" (id INTEGER PRIMARY KEY, timezone VARCHAR, time_offset_mins INTEGER)')
+                conn.exec_driver_sql('CREATE TABLE "notebook" (id INTEGER PRIMARY KEY, user_id INTEGER)')
+                conn.exec_driver_sql('CREATE TABLE "diary" (id INTEGER PRIMARY KEY, notebook_id INTEGER, date DATETIME)')
+                conn.exec_driver_sql("INSERT INTO \"user\" VALUES (1, 'UTC', 0), (2, 'Asia/Shanghai', 0), (3, 'UTC', -120)")
+                conn.exec_driver_sql('INSERT INTO "notebook" (id, user_id) VALUES (1, 1), (2, 2), (3, 3)')
+                conn.exec_driver_sql(
+                    "INSERT INTO \"diary\" (id, notebook_id, date) VALUES "
+                    "(1, 1, '2025-03-01 20:00:00'), (2, 2, '2025-03-01 20:00:00'), (3, 3, '2025-03-01 01:00:00')"
+                )
+
+            run_migrations(engine)
+
+            with engine.connect() as conn:
+                rows = conn.execute(text('SELECT id, month_day FROM "diary" ORDER BY id')).all()
+            self.assertEqual([tuple(row) for row in rows], [(1, "03-01"), (2, "03-02"), (3, "02-28")])
+            engine.dispose()
+
+    def test_content_text_is_backfilled_from_content(self) -> None:
+        from app.migrations import run_migrations
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with engine.begin() as conn:
+                conn.exec_driver_sql('CREATE TABLE "notebook" (id INTEGER PRIMARY KEY, user_id INTEGER)')
+                conn.exec_driver_sql('CREATE TABLE "diary" (id INTEGER PRIMARY KEY, notebook_id INTEGER, content JSON)')
+                conn.exec_driver_sql('INSERT INTO "notebook" (id, user_id) VALUES (1, 1)')
+                conn.exec_driver_sql(
+                    "INSERT INTO \"diary\" (id, notebook_id, content) VALUES "
+                    "(1, 1, '{\"type\": \"doc\", \"content\": [{\"type\": \"paragraph\", \"content\": [{\"type\": \"text\", \"text\": \"\\u516c\\u56ed\"}]}]}'), "
+                    "(2, 1, NULL)"
+                )
+
+            run_migrations(engine)
+
+            with engine.connect() as conn:
+                rows = conn.execute(text('SELECT id, content_text FROM "diary" ORDER BY id')).all()
+            self.assertEqual([tuple(row) for row in rows], [(1, "公园"), (2, "")])
+            engine.dispose()
+
+    def test_failed_schema_migration_rolls_back_whole_batch(self) -> None:
+        from app.migrations import current_version, run_migrations
+
+        def upgrade(conn) -> None:
+            conn.exec_driver_sql("CREATE TABLE half_done (id INTEGER PRIMARY KEY)")
+            raise RuntimeError("boom")
+
+        broken = SimpleNamespace(VERSION=1, DESCRIPTION="broken", upgrade=upgrade)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with self.assertRaises(RuntimeError):
+                run_migrations(engine, [broken])
+
+            self.assertNotIn("half_done", inspect(engine).get_table_names())
+            self.assertEqual(current_version(engine), 0)
+            engine.dispose()
+
+    def test_data_migration_resumes_from_saved_cursor(self) -> None:
+        from app.migrations import current_version, run_migrations
+
+        def create_rows(conn) -> None:
+            conn.exec_driver_sql("CREATE TABLE item (id INTEGER PRIMARY KEY, done INTEGER DEFAULT 0)")
+            for item_id in range(1, 8):
+                conn.exec_driver_sql(f"INSERT INTO item (id) VALUES ({item_id})")
+
+        seen_cursors: list[str | None] = []
+        fail_after = {"batches": 2}
+
+        def run_batch(conn, cursor):
+            seen_cursors.append(cursor)
+            if fail_after["batches"] == 0:
+                raise RuntimeError("interrupted")
+            fail_after["batches"] -= 1
+            last_id = int(cursor or 0)
+            rows = conn.exec_driver_sql(
+                f"SELECT id FROM item WHERE id > {last_id} ORDER BY id LIMIT 3"
+            ).all()
+            if not rows:
+                return None
+            conn.exec_driver_sql(f"UPDATE item SET done = 1 WHERE id > {last_id} AND id <= {rows[-1][0]}")
+            return str(rows[-1][0])
+
+        migrations = [
+            SimpleNamespace(VERSION=1, DESCRIPTION="rows", upgrade=create_rows),
+            SimpleNamespace(VERSION=2, DESCRIPTION="backfill", run_batch=run_batch),
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            with self.assertRaises(RuntimeError):
+                run_migrations(engine, migrations)
+            self.assertEqual(current_version(engine), 1)
+
+            fail_after["batches"] = 10
+            run_migrations(engine, migrations)
+
+            self.assertEqual(seen_cursors, [None, "3", "6", "6", "7"])
+            self.assertEqual(current_version(engine), 2)
+            with engine.connect() as conn:
+                self.assertEqual(conn.exec_driver_sql("SELECT COUNT(*) FROM item WHERE done = 0").scalar(), 0)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
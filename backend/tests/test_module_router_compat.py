@@ -117,12 +117,14 @@ class ModuleRouterCompatibilityTest(unittest.TestCase):
             _route_signatures(module_router),
             {
                 ("/api/diaries/", ("POST",)),
+                ("/api/diaries/bulk", ("POST",)),
                 ("/api/diaries/recent", ("GET",)),
                 ("/api/diaries/pinned", ("GET",)),
                 ("/api/diaries/last-year-today", ("GET",)),
                 ("/api/diaries/notebook/{notebook_id}", ("GET",)),
                 ("/api/diaries/{diary_id}", ("GET",)),
                 ("/api/diaries/{diary_id}", ("PUT",)),
+                ("/api/diaries/{diary_id}", ("PATCH",)),
                 ("/api/diaries/{diary_id}", ("DELETE",)),
                 ("/api/diaries/{diary_id}/toggle-pin", ("POST",)),
             },
@@ -0,0 +1,54 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel, func, select
+
+
+class NotebookDeleteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+
+        self.engine = create_engine("sqlite://")
+        event.listen(self.engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+        SQLModel.metadata.create_all(self.engine)
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def test_delete_notebook_uses_set_statements_and_removes_dependents(self) -> None:
+        from app.models import Diary, DiaryTagLink, Notebook, ShareToken, Tag, User, UserTagUsage
+        from app.modules.notebooks.notebooks_router import delete_notebook
+
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add_all([Notebook(id=1, name="gone", user_id=1), Notebook(id=2, name="kept", user_id=1)])
+            session.add(Tag(id=1, name="walk"))
+            session.commit()
+            for diary_id in range(1, 51):
+                notebook_id = 1 if diary_id <= 40 else 2
+                session.add(Diary(id=diary_id, notebook_id=notebook_id, user_id=1, content={"type": "doc", "content": []}))
+            session.commit()
+            session.add_all([DiaryTagLink(diary_id=diary_id, tag_id=1) for diary_id in (1, 2, 41)])
+            session.add_all([ShareToken(diary_id=1, created_by=1), ShareToken(notebook_id=1, created_by=1), ShareToken(diary_id=41, created_by=1)])
+            session.add(UserTagUsage(user_id=1, tag="walk", count=3))
+            session.commit()
+            user = session.get(User, 1)
+            session.expunge(user)
+
+        statements: list[str] = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        with Session(self.engine) as session:
+            self.assertEqual(delete_notebook(1, user, session), {"status": "ok"})
+
+        self.assertFalse(any(statement.startswith("SELECT diary.content") or "diary.content," in statement for statement in statements))
+        self.assertEqual(sum(statement.startswith("DELETE FROM diary ") for statement in statements), 1)
+        with Session(self.engine) as session:
+            self.assertIsNone(session.get(Notebook, 1))
+            self.assertEqual(session.exec(select(func.count()).select_from(Diary)).one(), 10)
+            self.assertEqual(session.exec(select(DiaryTagLink.diary_id)).all(), [41])
+            self.assertEqual(session.exec(select(ShareToken.diary_id)).all(), [41])
+            self.assertEqual(session.get(UserTagUsage, (1, "walk")).count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
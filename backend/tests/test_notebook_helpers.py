@@ -23,6 +23,53 @@ class NotebookHelpersTest(unittest.TestCase):
             {"total_words": 0, "total_entries": 0},
         )
 
+    def test_reconcile_stats_snapshots_fixes_drift_with_one_aggregate_per_batch(self) -> None:
+        from sqlalchemy import create_engine, event
+        from sqlmodel import Session, SQLModel, select
+
+        import app.models  # noqa: F401
+        from app.models import Diary, Notebook, User
+        from app.modules.notebooks.helpers.stats_snapshot import reconcile_stats_snapshots
+
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add_all(
+                [
+                    Notebook(id=1, name="accurate", user_id=1, stats_snapshot={"total_words": 7, "total_entries": 2}),
+                    Notebook(id=2, name="drifted", user_id=1, stats_snapshot={"total_words": 1, "total_entries": 5}),
+                    Notebook(id=3, name="empty", user_id=1, stats_snapshot={"total_words": 4, "total_entries": 1}),
+                ]
+            )
+            session.add_all(
+                [
+                    Diary(notebook_id=1, user_id=1, content={}, word_count=3),
+                    Diary(notebook_id=1, user_id=1, content={}, word_count=4),
+                    Diary(notebook_id=2, user_id=1, content={}, word_count=10),
+                ]
+            )
+            session.commit()
+
+        statements: list[str] = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        with Session(engine) as session:
+            result = reconcile_stats_snapshots(session, batch_size=2)
+
+        self.assertEqual(result, {"notebooks": 3, "corrected": 2, "words_drift": 13, "entries_drift": 5})
+        self.assertEqual(sum("GROUP BY diary.notebook_id" in statement for statement in statements), 2)
+        with Session(engine) as session:
+            snapshots = {notebook.id: notebook.stats_snapshot for notebook in session.exec(select(Notebook)).all()}
+        self.assertEqual(
+            snapshots,
+            {
+                1: {"total_words": 7, "total_entries": 2},
+                2: {"total_words": 10, "total_entries": 1},
+                3: {"total_words": 0, "total_entries": 0},
+            },
+        )
+        engine.dispose()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,166 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.dialect = postgresql.dialect()
+        self.statements: list[str] = []
+
+    def exec_driver_sql(self, statement: str):
+        self.statements.append(statement)
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class PostgresDialectCompileTest(unittest.TestCase):
+    def test_query_expressions_compile_for_postgresql(self) -> None:
+        from sqlmodel import select
+
+        from app.models import Diary
+        from app.sql_expressions import date_text, diary_text_match, mood_label
+
+        sql = _compile(
+            select(date_text(Diary.date)).where(
+                mood_label(Diary.mood) == "Happy",
+                diary_text_match(Diary.title, Diary.content_text, "walk"),
+            )
+        )
+
+        self.assertIn("to_char(diary.date, 'YYYY-MM-DD')", sql)
+        self.assertIn("(diary.mood ->> 'label')", sql)
+        self.assertIn(
+            "to_tsvector('simple', coalesce(diary.title, '') || ' ' || coalesce(diary.content_text, ''))"
+            " @@ plainto_tsquery('simple',",
+            sql,
+        )
+        self.assertNotIn("json_extract", sql)
+
+    def test_search_rank_compiles_to_rounded_ts_rank(self) -> None:
+        from sqlmodel import select
+
+        from app.models import Diary
+        from app.sql_expressions import diary_text_rank
+
+        sql = _compile(select(diary_text_rank(Diary.title, Diary.content_text, "walk")))
+
+        self.assertIn("round(CAST(ts_rank(to_tsvector('simple', coalesce(diary.title, '')", sql)
+        self.assertIn("plainto_tsquery('simple',", sql)
+        self.assertIn("AS NUMERIC), 6)", sql.upper())
+
+    def test_json_columns_use_jsonb(self) -> None:
+        from sqlalchemy.schema import CreateTable
+
+        from app.models import Diary
+
+        ddl = _compile(CreateTable(Diary.__table__))
+        self.assertIn("content JSONB", ddl)
+        self.assertIn("mood JSONB", ddl)
+
+    def test_index_migrations_emit_postgresql_expressions(self) -> None:
+        from app.migrations.versions import v0002_hot_query_indexes, v0005_postgres_diary_search
+
+        conn = _RecordingConnection()
+        v0002_hot_query_indexes.upgrade(conn)
+        v0005_postgres_diary_search.upgrade(conn)
+        statements = "\n".join(conn.statements)
+
+        self.assertIn('"ix_diary_mood_label" ON "diary" ((mood ->> \'label\'))', statements)
+        self.assertIn("WHERE is_pinned = true", statements)
+        self.assertIn(
+            '"ix_diary_search_tsv" ON "diary" USING gin (to_tsvector(\'simple\', '
+            "coalesce(title, '') || ' ' || coalesce(CAST(content AS TEXT), '')))",
+            statements,
+        )
+        self.assertNotIn("json_extract", statements)
+
+    def test_search_index_migration_is_noop_on_sqlite(self) -> None:
+        from sqlalchemy.dialects import sqlite
+
+        from app.migrations.versions import v0005_postgres_diary_search
+
+        conn = SimpleNamespace(dialect=sqlite.dialect(), exec_driver_sql=self.fail)
+        v0005_postgres_diary_search.upgrade(conn)
+
+
+@unittest.skipUnless(TEST_POSTGRES_URL, "TEST_POSTGRES_URL not set (points to a disposable PostgreSQL database)")
+class PostgresBackendTest(unittest.TestCase):
+    def setUp(self) -> None:
+        from sqlalchemy import create_engine
+        from sqlalchemy.engine import make_url
+
+        url = make_url(TEST_POSTGRES_URL)
+        if url.drivername == "postgresql":
+            url = url.set(drivername="postgresql+psycopg")
+        self.engine = create_engine(url)
+        self._drop_all()
+
+    def tearDown(self) -> None:
+        self._drop_all()
+        self.engine.dispose()
+
+    def _drop_all(self) -> None:
+        from sqlmodel import SQLModel
+
+        import app.models  # noqa: F401
+
+        SQLModel.metadata.drop_all(self.engine)
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql('DROP TABLE IF EXISTS "schema_version"')
+
+    def test_migrations_and_queries_run_on_postgresql(self) -> None:
+        from sqlmodel import Session, select
+
+        from app.migrations import current_version, head_version, run_migrations
+        from app.models import Diary, Notebook, User
+        from app.sql_expressions import date_text, diary_text_match, mood_label
+
+        run_migrations(self.engine)
+        self.assertEqual(current_version(self.engine), head_version())
+
+        with Session(self.engine) as session:
+            user = User(username="pg-user", hashed_password="x")
+            session.add(user)
+            session.commit()
+            notebook = Notebook(name="pg-notebook", user_id=user.id)
+            session.add(notebook)
+            session.commit()
+            session.add(
+                Diary(
+                    notebook_id=notebook.id,
+                    user_id=user.id,
+                    title="Morning walk",
+                    content={"type": "doc", "content": [{"type": "text", "text": "river sunrise"}]},
+                    date=datetime(2026, 3, 1, 8, tzinfo=timezone.utc),
+                    mood={"label": "Happy"},
+                )
+            )
+            session.commit()
+
+            matched = session.exec(select(Diary.title).where(diary_text_match(Diary.title, Diary.content, "sunrise"))).all()
+            missed = session.exec(select(Diary.title).where(diary_text_match(Diary.title, Diary.content, "ocean"))).all()
+            by_mood = session.exec(select(Diary.title).where(Diary.user_id == user.id, mood_label(Diary.mood) == "Happy")).all()
+            days = session.exec(select(date_text(Diary.date)).where(Diary.user_id == user.id)).all()
+
+            session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+            plan = session.connection().execute(
+                select(Diary.id).where(diary_text_match(Diary.title, Diary.content, "sunrise")).prefix_with("EXPLAIN")
+            ).scalars().all()
+
+        self.assertEqual(matched, ["Morning walk"])
+        self.assertEqual(missed, [])
+        self.assertEqual(by_mood, ["Morning walk"])
+        self.assertEqual(days, ["2026-03-01"])
+        self.assertTrue(any("ix_diary_search_tsv" in line for line in plan), msg="\n".join(plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
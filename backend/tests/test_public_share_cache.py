@@ -0,0 +1,164 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel
+
+
+class PublicShareCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+        from app.api.app.public_share import share_resolution_cache
+        from app.api.app.response_cache import public_response_cache
+        from app.api.app.router import router as app_router
+        from app.database import get_read_session
+        from app.models import Diary, Notebook, ShareToken, User
+        from app.modules.sharing.router import router as share_router
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{Path(self.temp_dir.name) / 'journey.db'}")
+        SQLModel.metadata.create_all(self.engine)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(Notebook(id=1, name="n", user_id=1))
+            for diary_id in range(1, 4):
+                session.add(Diary(id=diary_id, notebook_id=1, user_id=1, title=f"d{diary_id}", content={}, date=start + timedelta(days=diary_id)))
+            session.add(ShareToken(id=1, token="viral", notebook_id=1, created_by=1))
+            session.commit()
+            self.user = session.get(User, 1)
+            session.expunge(self.user)
+
+        def override_session():
+            with Session(self.engine) as session:
+                yield session
+
+        app = FastAPI()
+        app.include_router(app_router)
+        app.include_router(share_router)
+        app.dependency_overrides[get_read_session] = override_session
+        self.client = TestClient(app)
+        share_resolution_cache.clear()
+        public_response_cache.clear()
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _statements(self, url: str, **kwargs):
+        statements: list[str] = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(url, **kwargs)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+        return response, statements
+
+    def test_repeat_hits_only_check_owner_data_version(self) -> None:
+        for url in ("/api/share/viral?limit=2", "/api/app/public/shares/viral", "/api/app/public/shares/viral/entries"):
+            first, _ = self._statements(url)
+            second, statements = self._statements(url)
+
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+            self.assertEqual(second.headers["Cache-Control"], "public, no-cache")
+            self.assertEqual(len(statements), 1)
+            self.assertIn("data_version", statements[0])
+            self.assertNotIn("sharetoken", statements[0])
+
+            revalidated = self.client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+            self.assertEqual((revalidated.status_code, revalidated.content), (304, b""))
+
+        legacy = self.client.get("/api/share/viral?limit=2")
+        self.assertEqual(legacy.headers["X-Next-Cursor"], legacy.json()["next_cursor"])
+        self.assertEqual([diary["id"] for diary in legacy.json()["diaries"]], [3, 2])
+
+    def test_legacy_share_payload_keeps_tags_private(self) -> None:
+        from app.models import Diary, ShareToken, Tag
+
+        with Session(self.engine) as session:
+            session.get(Diary, 3).tags = [Tag(name="private")]
+            session.add(ShareToken(id=2, token="single", diary_id=3, created_by=1))
+            session.commit()
+
+        notebook_page = self.client.get("/api/share/viral").json()
+        self.assertEqual([diary["tags"] for diary in notebook_page["diaries"]], [[], [], []])
+        self.assertEqual(self.client.get("/api/share/single").json()["diary"]["tags"], [])
+
+    def test_unaccepted_query_parameters_do_not_create_cache_entries(self) -> None:
+        from app.api.app.response_cache import public_response_cache, response_cache
+
+        first = self.client.get("/api/app/public/shares/viral/entries?limit=2")
+        for junk in range(5):
+            response, statements = self._statements(f"/api/app/public/shares/viral/entries?limit=2&junk={junk}")
+            self.assertEqual(response.headers["ETag"], first.headers["ETag"])
+            self.assertEqual(len(statements), 1)
+        # limit 超过上限时按实际页大小规范化，与 limit=上限 是同一个缓存键
+        capped = self.client.get("/api/app/public/shares/viral/entries?limit=100")
+        self.assertEqual(capped.headers["ETag"], self.client.get("/api/app/public/shares/viral/entries?limit=50").headers["ETag"])
+        self.assertEqual(self.client.get("/api/app/public/shares/viral?limit=7").headers["ETag"], self.client.get("/api/app/public/shares/viral").headers["ETag"])
+        self.assertEqual(self.client.get("/api/share/viral?cursor=bad").status_code, 400)
+
+        self.assertEqual(len(public_response_cache._entries), 3)
+        self.assertEqual(len(response_cache._entries), 0)
+
+    def test_owner_writes_invalidate_resolution_and_rendered_pages(self) -> None:
+        from fastapi import BackgroundTasks
+
+        from app.api.app.data_version import bump_data_version
+        from app.models import ShareToken
+        from app.modules.journaling.diaries_router import patch_diary
+        from app.modules.sharing.share_router import delete_share
+        from app.schemas import DiaryPatch
+
+        etag = self.client.get("/api/app/public/shares/viral/entries").headers["ETag"]
+        with Session(self.engine) as session:
+            patch_diary(3, DiaryPatch(title="renamed"), BackgroundTasks(), self.user, session)
+        response = self.client.get("/api/app/public/shares/viral/entries", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["title"], "renamed")
+
+        # 其他 worker 撤销分享：本进程的解析缓存未清除，靠 data_version 核对发现
+        with Session(self.engine) as session:
+            session.get(ShareToken, 1).is_active = False
+            bump_data_version(session, 1)
+            session.commit()
+        self.assertEqual(self.client.get("/api/app/public/shares/viral").status_code, 404)
+
+        with Session(self.engine) as session:
+            share = session.get(ShareToken, 1)
+            share.is_active = True
+            share.expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+            bump_data_version(session, 1)
+            session.commit()
+        self.assertEqual(self.client.get("/api/share/viral").status_code, 200)
+        with Session(self.engine) as session:
+            delete_share(1, self.user, session)
+        self.assertEqual(self.client.get("/api/share/viral").status_code, 404)
+
+    def test_cached_expiry_is_checked_on_every_hit(self) -> None:
+        from unittest.mock import patch
+
+        from app.models import ShareToken
+
+        with Session(self.engine) as session:
+            session.get(ShareToken, 1).expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+            session.commit()
+        self.assertEqual(self.client.get("/api/app/public/shares/viral").status_code, 200)
+
+        later = datetime.now(timezone.utc) + timedelta(minutes=10)
+        with patch("app.api.app.public_share.datetime") as clock:
+            clock.now.return_value = later
+            response, statements = self._statements("/api/app/public/shares/viral")
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(len(statements), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import re
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+class RateLimitTest(unittest.TestCase):
+    def _client(self, rules, trusted_proxies=frozenset()) -> TestClient:
+        from app.rate_limit import RateLimitMiddleware
+
+        app = FastAPI()
+
+        @app.get("/api/share/{token}")
+        def shared(token: str):
+            return {"token": token}
+
+        @app.get("/api/v1/diaries")
+        def diaries():
+            return []
+
+        app.add_middleware(RateLimitMiddleware, rules=rules, trusted_proxies=trusted_proxies)
+        return TestClient(app)
+
+    def test_share_budget_per_ip_and_per_token_returns_429_with_retry_after(self) -> None:
+        from app.rate_limit import RateLimitRule
+
+        pattern = re.compile(r"^/api/share/(?P<key>[^/]+)$")
+        client = self._client([RateLimitRule("share", pattern, per_ip=8, per_key=0)])
+        statuses = [client.get(f"/api/share/t{index}").status_code for index in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        limited = client.get("/api/share/other")
+        self.assertEqual(limited.status_code, 429)
+        self.assertEqual(limited.headers["Retry-After"], "8")
+        # 未匹配规则的路由（已登录用户的接口）不受影响
+        self.assertTrue(all(client.get("/api/v1/diaries").status_code == 200 for _ in range(10)))
+
+        client = self._client([RateLimitRule("share", pattern, per_ip=0, per_key=4)])
+        self.assertEqual([client.get("/api/share/hot").status_code for _ in range(2)], [200, 429])
+        self.assertEqual(client.get("/api/share/cold").status_code, 200)
+        self.assertEqual(client.post("/api/share/hot").status_code, 405)
+
+    def test_rejected_requests_do_not_spend_other_buckets(self) -> None:
+        from app.rate_limit import RateLimitRule
+
+        pattern = re.compile(r"^/api/share/(?P<key>[^/]+)$")
+        client = self._client([RateLimitRule("share", pattern, per_ip=8, per_key=4)])
+        # IP 桶容量 2、token 桶容量 1：被 token 桶拒绝的请求不消耗 IP 桶，换个 token 仍能访问
+        self.assertEqual([client.get("/api/share/hot").status_code for _ in range(3)], [200, 429, 429])
+        self.assertEqual(client.get("/api/share/cold").status_code, 200)
+        self.assertEqual(client.get("/api/share/warm").status_code, 429)
+
+    def test_forwarded_client_ip_is_used_only_behind_trusted_proxies(self) -> None:
+        from app.rate_limit import RateLimitRule
+
+        pattern = re.compile(r"^/api/share/(?P<key>[^/]+)$")
+        rules = [RateLimitRule("share", pattern, per_ip=4, per_key=0)]
+
+        def statuses(client, forwarded_for):
+            return [client.get("/api/share/t", headers={"X-Forwarded-For": ip}).status_code for ip in forwarded_for]
+
+        # TestClient 的直连地址为 "testclient"
+        behind_proxy = self._client(rules, trusted_proxies=frozenset({"testclient"}))
+        self.assertEqual(statuses(behind_proxy, ["1.1.1.1", "2.2.2.2", "9.9.9.9, 2.2.2.2", "3.3.3.3, testclient"]), [200, 200, 429, 200])
+        direct = self._client(rules)
+        self.assertEqual(statuses(direct, ["1.1.1.1", "2.2.2.2"]), [200, 429])
+
+    def test_proxy_signatures_are_limited_per_ip_before_verification(self) -> None:
+        from unittest.mock import patch
+
+        from fastapi import HTTPException
+
+        from app.config import settings
+        from app.rate_limit import RateLimitMiddleware, default_rules
+
+        verified = []
+        app = FastAPI()
+
+        @app.get("/api/proxy/immich/asset/{asset_id}")
+        def asset(asset_id: str, sig: str):
+            verified.append(asset_id)
+            raise HTTPException(status_code=403, detail="Invalid signature")
+
+        with patch.multiple(settings, RATE_LIMIT_PROXY_PER_IP=8, RATE_LIMIT_PROXY_PER_ASSET=0):
+            app.add_middleware(RateLimitMiddleware, rules=default_rules(), trusted_proxies=frozenset())
+            client = TestClient(app)
+            statuses = [client.get(f"/api/proxy/immich/asset/a{index}?sig=bogus").status_code for index in range(3)]
+        # 伪造签名的请求在验证签名之前就被 IP 桶拒绝，不再查询用户、计算 HMAC
+        self.assertEqual(statuses, [403, 403, 429])
+        self.assertEqual(verified, ["a0", "a1"])
+
+    def test_proxy_streams_are_limited_per_signature_owner(self) -> None:
+        from fastapi import HTTPException
+
+        from app.rate_limit import OwnerStreamLimits
+
+        limits = OwnerStreamLimits(per_owner=0, max_streams=1, queue_seconds=0.05)
+        release = asyncio.Event()
+
+        async def body():
+            await release.wait()
+            yield b"done"
+
+        async def request(owner_id: int, sent: list):
+            try:
+                response = await limits.stream(owner_id, body(), media_type="image/webp")
+            except HTTPException as exc:
+                sent.append({"status": exc.status_code, "headers": exc.headers})
+                return
+
+            async def receive():
+                await release.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+
+            await response({"type": "http", "method": "GET", "path": "/", "headers": []}, receive, send)
+
+        async def scenario():
+            first, second, other, third = [], [], [], []
+            streaming = asyncio.create_task(request(1, first))
+            await asyncio.sleep(0)
+            # 同一用户的名额被占满时排队超时；其他用户（如另一个人的分享被刷）互不影响
+            await request(1, second)
+            other_owner = asyncio.create_task(request(2, other))
+            await asyncio.sleep(0)
+            release.set()
+            await streaming
+            await other_owner
+            await request(1, third)
+            return first, second, other, third
+
+        first, second, other, third = asyncio.run(scenario())
+        self.assertEqual([sent[0]["status"] for sent in (first, second, other, third)], [200, 429, 200, 200])
+        self.assertEqual(second[0]["headers"], {"Retry-After": "1"})
+
+        limits = OwnerStreamLimits(per_owner=8, max_streams=0)
+        limits.admit(1)
+        limits.admit(1)
+        with self.assertRaises(HTTPException) as raised:
+            limits.admit(1)
+        self.assertEqual((raised.exception.status_code, raised.exception.headers), (429, {"Retry-After": "8"}))
+        limits.admit(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+
+class SearchEntriesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        import app.models  # noqa: F401
+        from app.models import Diary, Notebook, User
+
+        self.engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(self.engine)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        with Session(self.engine) as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(Notebook(id=1, name="n", user_id=1))
+            for diary_id in range(1, 8):
+                # 两两同一天，相关度相同的结果按 (date, id) 键集分页
+                date = start + timedelta(days=diary_id // 2)
+                session.add(Diary(id=diary_id, notebook_id=1, user_id=1, content={}, date=date))
+            session.commit()
+            self.user = session.get(User, 1)
+            session.expunge(self.user)
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def test_search_entries_pages_by_relevance_with_snippets(self) -> None:
+        from app.api.app.search_entries_router import search_entries
+        from app.models import Diary
+
+        with Session(self.engine) as session:
+            for diary in session.exec(select(Diary)).all():
+                # 标题命中计 2 分、正文命中计 1 分：2 / 4 / 6 标题与正文都命中，其余只有正文命中
+                diary.title = "River walk" if diary.id % 2 == 0 else "Notes"
+                diary.content = {"type": "doc", "content": [{"type": "text", "text": f"Walked by the river #{diary.id}"}]}
+                diary.content_text = f"Walked by the river #{diary.id}"
+                session.add(diary)
+            session.commit()
+
+        pages, cursor = [], None
+        while True:
+            with Session(self.engine) as session:
+                payload = search_entries("river", None, None, None, None, cursor, 3, "relevance", self.user, session)
+            pages.append([item.id for item in payload.items])
+            cursor = payload.page.next_cursor
+            if not cursor:
+                break
+
+        self.assertEqual(pages, [[6, 4, 2], [7, 5, 3], [1]])
+        self.assertEqual((payload.items[0].snippet, payload.items[0].highlights), ("Walked by the river #1", [(14, 19)]))
+
+    def test_search_matches_plain_text_per_term(self) -> None:
+        from app.api.app.search_entries_router import search_entries
+        from app.models import Diary
+        from app.modules.journaling.helpers.content_stats import analyze_content
+
+        texts = {1: "今天去公园散步", 2: "Walked along the river", 3: "River bank, then a long walk home"}
+        with Session(self.engine) as session:
+            for diary in session.exec(select(Diary)).all():
+                diary.title = "Notes"
+                diary.content = {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": texts.get(diary.id, "")}]}]}
+                diary.content_text = analyze_content(diary.content).text
+                session.add(diary)
+            session.commit()
+
+            def search(q):
+                payload = search_entries(q, None, None, None, None, None, 20, "relevance", self.user, session)
+                return [(item.id, item.snippet, item.highlights) for item in payload.items]
+
+            # 中文按原文匹配；文档结构里的 "type" / "paragraph" / "text" 不会命中
+            self.assertEqual(search("公园"), [(1, "今天去公园散步", [(3, 5)])])
+            self.assertEqual(search("paragraph"), [])
+            self.assertEqual(search("text"), [])
+            # 多个查询词各自匹配（不要求整串相邻），片段高亮同一组词
+            self.assertEqual(search("walk river"), [
+                (3, "River bank, then a long walk home", [(0, 5), (24, 28)]),
+                (2, "Walked along the river", [(0, 4), (17, 22)]),
+            ])
+            self.assertEqual(search("50%"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
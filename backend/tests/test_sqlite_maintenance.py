@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, text
+
+
+class SqliteMaintenanceTest(unittest.TestCase):
+    def test_writer_pragmas_follow_settings(self) -> None:
+        from app.config import settings
+        from app.database import connection_pragmas
+
+        writer = connection_pragmas()
+        reader = connection_pragmas(read_only=True)
+
+        self.assertIn(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}", writer)
+        self.assertIn(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}", writer)
+        self.assertIn(f"PRAGMA cache_size=-{settings.SQLITE_READ_CACHE_SIZE_KIB}", reader)
+        self.assertLess(settings.SQLITE_READ_CACHE_SIZE_KIB, settings.SQLITE_CACHE_SIZE_KIB)
+        self.assertIn(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}", reader)
+        self.assertIn(f"PRAGMA wal_autocheckpoint={settings.SQLITE_WAL_AUTOCHECKPOINT}", writer)
+        self.assertIn("PRAGMA query_only=ON", reader)
+        self.assertNotIn("PRAGMA query_only=ON", writer)
+
+    def test_maintenance_truncates_wal(self) -> None:
+        from app.database import run_sqlite_maintenance, set_sqlite_pragma
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "journey.db"
+            engine = create_engine(f"sqlite:///{db_path}")
+            event.listen(engine, "connect", set_sqlite_pragma)
+            with engine.begin() as conn:
+                conn.exec_driver_sql("PRAGMA wal_autocheckpoint=0")
+                conn.exec_driver_sql("CREATE TABLE item (id INTEGER PRIMARY KEY, body TEXT)")
+                conn.execute(text("INSERT INTO item (body) VALUES (:body)"), [{"body": "x" * 1000}] * 200)
+
+            wal_path = Path(f"{db_path}-wal")
+            self.assertGreater(wal_path.stat().st_size, 0)
+
+            result = run_sqlite_maintenance(engine)
+
+            self.assertEqual(result["busy"], 0)
+            self.assertEqual(wal_path.stat().st_size, 0)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
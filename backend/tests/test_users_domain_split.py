@@ -57,6 +57,37 @@ class UsersDomainSplitTest(unittest.TestCase):
             },
         )
 
+    def test_delete_user_removes_tag_usage_rows(self) -> None:
+        import asyncio
+
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import StaticPool
+        from sqlmodel import Session, SQLModel, select
+
+        import app.models  # noqa: F401
+        from app.models import User, UserRole, UserTagUsage
+        from app.modules.identity.users_router import delete_user
+        from app.modules.journaling.helpers.tags import apply_tag_usage
+        from app.write_queue import WriteQueue
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        admin = User(id=1, username="admin", hashed_password="x", role=UserRole.ADMIN)
+        with Session(engine, expire_on_commit=False) as session:
+            session.add(admin)
+            session.add(User(id=2, username="v", hashed_password="x"))
+            apply_tag_usage(session, 1, {"trip": 1})
+            apply_tag_usage(session, 2, {"trip": 1, "work": 2})
+            session.commit()
+
+        result = asyncio.run(delete_user(2, admin, WriteQueue(engine)))
+        self.assertEqual(result["message"], "User v deleted")
+        with Session(engine) as session:
+            self.assertIsNone(session.get(User, 2))
+            rows = session.exec(select(UserTagUsage.user_id, UserTagUsage.tag)).all()
+        self.assertEqual([tuple(row) for row in rows], [(1, "trip")])
+        engine.dispose()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+
+class MixedWriteLoadTest(unittest.TestCase):
+    def test_sync_and_async_writers_share_the_single_writer_connection(self) -> None:
+        import app.models  # noqa: F401
+        from app.auth import get_current_user
+        from app.database import get_session, get_write_queue
+        from app.models import Diary, Notebook, User
+        from app.modules.identity.users_router import router as users_router
+        from app.modules.journaling.diaries_router import router as diaries_router
+        from app.write_queue import WriteQueue
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 与生产一致的单连接写引擎；事件循环被阻塞时请求会等到 pool_timeout 后报错
+            engine = create_engine(
+                f"sqlite:///{Path(temp_dir) / 'journey.db'}",
+                connect_args={"check_same_thread": False},
+                pool_size=1,
+                max_overflow=0,
+                pool_timeout=3,
+            )
+            read_engine = create_engine(f"sqlite:///{Path(temp_dir) / 'journey.db'}", connect_args={"check_same_thread": False})
+            SQLModel.metadata.create_all(engine)
+            with Session(engine) as session:
+                session.add(User(id=1, username="u", hashed_password="x"))
+                session.add(Notebook(id=1, name="n", user_id=1))
+                for diary_id in range(1, 13):
+                    session.add(Diary(id=diary_id, notebook_id=1, user_id=1, content={}, date=datetime(2026, 1, diary_id, tzinfo=timezone.utc)))
+                session.commit()
+
+            def current_user():
+                # 与 get_current_user 一致：每个请求一个脱离会话的 User
+                with Session(read_engine) as session:
+                    user = session.get(User, 1)
+                    session.expunge(user)
+                    return user
+
+            def override_session():
+                with Session(engine) as session:
+                    yield session
+
+            write_queue = WriteQueue(engine)
+            app = FastAPI()
+            app.include_router(diaries_router)
+            app.include_router(users_router)
+            app.dependency_overrides[get_session] = override_session
+            app.dependency_overrides[get_write_queue] = lambda: write_queue
+            app.dependency_overrides[get_current_user] = current_user
+
+            async def scenario():
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    requests = [client.post(f"/api/diaries/{diary_id}/toggle-pin") for diary_id in range(1, 13)]
+                    requests += [client.patch("/api/users/me", json={"time_offset_mins": offset}) for offset in range(12)]
+                    started = time.monotonic()
+                    responses = await asyncio.gather(*requests)
+                    elapsed = time.monotonic() - started
+                await write_queue.stop()
+                return responses, elapsed
+
+            responses, elapsed = asyncio.run(scenario())
+            self.assertEqual([response.status_code for response in responses], [200] * 24)
+            self.assertLess(elapsed, 2)
+            with Session(engine) as session:
+                self.assertTrue(all(diary.is_pinned for diary in session.get(Notebook, 1).diaries))
+            engine.dispose()
+            read_engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+
+def _engine(temp_dir: str):
+    engine = create_engine(f"sqlite:///{Path(temp_dir) / 'journey.db'}", pool_size=1, max_overflow=0)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE item (id INTEGER PRIMARY KEY, name VARCHAR UNIQUE)")
+    return engine
+
+
+def _insert(name: str):
+    def job(session):
+        session.execute(text("INSERT INTO item (name) VALUES (:name)"), {"name": name})
+        return name
+
+    return job
+
+
+class WriteQueueTest(unittest.TestCase):
+    def test_queued_jobs_share_one_transaction_and_fail_independently(self) -> None:
+        from app.write_queue import WriteQueue
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            statements: list[str] = []
+            event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+            queue = WriteQueue(engine)
+
+            async def run():
+                results = await asyncio.gather(
+                    queue.submit(_insert("a")),
+                    queue.submit(_insert("a")),
+                    queue.submit(_insert("b")),
+                    return_exceptions=True,
+                )
+                await queue.stop()
+                return results
+
+            first, duplicate, third = asyncio.run(run())
+
+            self.assertEqual((first, third), ("a", "b"))
+            self.assertIsInstance(duplicate, IntegrityError)
+            self.assertEqual(statements.count("BEGIN IMMEDIATE"), 1)
+            with engine.connect() as conn:
+                names = conn.execute(text("SELECT name FROM item ORDER BY name")).scalars().all()
+            self.assertEqual(names, ["a", "b"])
+            engine.dispose()
+
+    def test_read_connections_reject_writes(self) -> None:
+        from app.database import set_read_pragma
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = _engine(temp_dir)
+            engine.dispose()
+            event.listen(engine, "connect", set_read_pragma)
+
+            with engine.connect() as conn:
+                self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM item")).scalar(), 0)
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("INSERT INTO item (name) VALUES ('x')"))
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,7 +12,12 @@ export default function TagPicker({ selectedTags, onUpdate, onClose }: any) {
   const [q, setQ] = useState('')
   const [localTags, setLocalTags] = useState<string[]>(selectedTags)
   
-  const { data: allTags = [] } = useQuery({ queryKey: ['tags'], queryFn: () => api.get('/tags/').then(r => r.data) })
+  // 后端按使用频次返回当前用户的标签，输入时按前缀查询
+  const prefix = q.trim()
+  const { data: allTags = [] } = useQuery({
+    queryKey: ['tags', prefix],
+    queryFn: () => api.get('/tags/', { params: prefix ? { q: prefix } : undefined }).then(r => r.data),
+  })
 
   const toggleTag = (name: string) => {
     setLocalTags(prev => 
@@ -29,7 +34,8 @@ export default function TagPicker({ selectedTags, onUpdate, onClose }: any) {
     setQ('')
   }
 
-  const filtered = allTags.filter((t:string) => t.toLowerCase().includes(q.toLowerCase()) && !localTags.includes(t))
+  // 与后端一致：不区分大小写的前缀匹配
+  const filtered = allTags.filter((t:string) => t.toLowerCase().startsWith(prefix.toLowerCase()) && !localTags.includes(t))
 
   const handleConfirm = () => {
     onUpdate(localTags)
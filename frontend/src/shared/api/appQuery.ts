@@ -24,6 +24,16 @@ export type TimelinePayload = {
   page: CursorPage
 }
 
+export type SearchEntryCard = EntryCard & {
+  snippet?: string | null
+  highlights: Array<[number, number]>
+}
+
+export type SearchEntriesPayload = {
+  items: SearchEntryCard[]
+  page: CursorPage
+}
+
 export type PublicShareEntry = EntryCard & {
   content: Record<string, unknown>
   tags: string[]
@@ -109,7 +119,16 @@ export const appQueryApi = {
   notebookDetail: async (notebookId: number): Promise<NotebookDetail> => (await api.get(`/app/notebooks/${notebookId}`)).data,
   publicShareSummary: async (token: string): Promise<PublicShareSummary> => (await api.get(`/app/public/shares/${token}`)).data,
   statsSummary: async (days: number): Promise<StatsSummaryPayload> => (await api.get('/app/stats', { params: { days } })).data,
-  searchEntries: async (params: { q?: string; tag?: string; mood?: string; weather?: string; notebookId?: number }): Promise<EntryCard[]> =>
+  searchEntries: async (params: {
+    q?: string
+    tag?: string
+    mood?: string
+    weather?: string
+    notebookId?: number
+    cursor?: string
+    limit?: number
+    order?: 'date' | 'relevance'
+  }): Promise<SearchEntriesPayload> =>
     (
       await api.get('/app/search/entries', {
         params: {
@@ -118,6 +137,9 @@ export const appQueryApi = {
           mood: params.mood,
           weather: params.weather,
           notebook_id: params.notebookId,
+          cursor: params.cursor,
+          limit: params.limit,
+          order: params.order,
         },
       })
     ).data,
@@ -41,7 +41,9 @@ export const diaryApi = {
   get: async (id: number) => (await api.get(`/diaries/${id}`)).data,
   listByNotebook: async (id: number, limit?: number, offset?: number) => (await api.get(`/diaries/notebook/${id}`, { params: { limit, offset } })).data,
   create: async (d: any) => (await api.post('/diaries/', d)).data,
+  bulk: async (operations: any[]) => (await api.post('/diaries/bulk', { operations })).data,
   update: async (id: number, d: any) => (await api.put(`/diaries/${id}`, d)).data,
+  patch: async (id: number, d: any) => (await api.patch(`/diaries/${id}`, d)).data,
   delete: async (id: number) => (await api.delete(`/diaries/${id}`)).data,
   togglePin: async (id: number) => (await api.post(`/diaries/${id}/toggle-pin`)).data
 }
@@ -129,7 +131,9 @@ export const shareApi = {
   create: async (data: { diary_id?: number; notebook_id?: number; expires_in_days?: number | null }) => (await api.post('/share/', data)).data,
   update: async (id: number, data: { expires_at: string | null }) => (await api.patch(`/share/${id}`, data)).data,
   delete: async (id: number) => (await api.delete(`/share/${id}`)).data,
-  getPublic: async (token: string) => (await api.get(`/share/${token}`)).data
+  // 笔记本分享只返回一页日记与 next_cursor，后续页用 appQueryApi.publicShareEntriesPage
+  getPublic: async (token: string, params?: { cursor?: string; limit?: number }) =>
+    (await api.get(`/share/${token}`, { params })).data
 }
 
 export const taskApi = {
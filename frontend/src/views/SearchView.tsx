@@ -32,13 +32,14 @@ export default function SearchView() {
 
   const { data: diaries = [], isLoading: isLoadingDiaries } = useQuery<EntryCard[]>({
     queryKey: ['app', 'search', 'entries', q, filters],
-    queryFn: () => appQueryApi.searchEntries({
+    queryFn: async () => (await appQueryApi.searchEntries({
       q,
       tag: filters.tag ?? undefined,
       mood: filters.mood ?? undefined,
       weather: filters.weather ?? undefined,
       notebookId: filters.notebook_id ?? undefined,
-    }),
+      limit: 50,
+    })).items,
     enabled: searchEnabled && filters.include_diaries
   })
 
@@ -14,6 +14,7 @@ interface Task {
   is_enabled: boolean
   cron_expr: string
   last_run: string | null
+  last_result: Record<string, unknown> | null
   next_run: string | null
   user_enabled: boolean
 }